@@ -0,0 +1,93 @@
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from blobengine import BlobSettings
+from blobengine.detect import BLOB_DETECTORS
+from blobengine.motion import create_motion_backend
+
+from .synthetic import synthetic_frames, video_frames
+
+
+def motion_inputs(source, settings):
+    # (gray, motion_mask, truth) for every frame after the first, as _track_motion sees them
+    motion = create_motion_backend(settings)
+    prev_gray = None
+    inputs = []
+    for frame, truth in source:
+        gray = cv2.equalizeHist(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+        if prev_gray is not None:
+            inputs.append((gray, motion.motion_mask(prev_gray, gray, settings.motion_threshold), truth))
+        prev_gray = gray
+    return inputs
+
+
+def match(points, reference, tolerance):
+    # Number of points that have a reference point within tolerance (one-to-one, greedy)
+    if not len(points) or not len(reference):
+        return 0
+    points = np.asarray(points, dtype=np.float64)[:, :2]
+    reference = np.asarray(reference, dtype=np.float64)[:, :2]
+    dist = np.linalg.norm(points[:, None, :] - reference[None, :, :], axis=2)
+    matched = 0
+    while dist.size and dist.min() < tolerance:
+        i, j = np.unravel_index(dist.argmin(), dist.shape)
+        dist[i, :] = np.inf
+        dist[:, j] = np.inf
+        matched += 1
+    return matched
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare blob detectors on the same motion masks.")
+    parser.add_argument("--video", help="benchmark on a real video instead of synthetic frames")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--blobs", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=10.0, help="max center distance (px) for two detections to match")
+    parser.add_argument("--min-area", type=int, default=BlobSettings.min_area)
+    args = parser.parse_args(argv)
+
+    settings = BlobSettings(min_area=args.min_area)
+    if args.video:
+        source = video_frames(args.video, args.frames)
+    else:
+        source = synthetic_frames(args.width, args.height, args.frames, args.blobs)
+    inputs = motion_inputs(source, settings)
+
+    results = {}
+    for name, detector_class in BLOB_DETECTORS.items():
+        detector = detector_class(settings.min_area)
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            detections = [detector.detect(gray, mask) for gray, mask, _ in inputs]
+            best = min(best, time.perf_counter() - start)
+        results[name] = (best / len(inputs), detections)
+
+    baseline_time, baseline = results["simple"]
+    print(f"{len(inputs)} frames, best of {args.repeat}")
+    print(f"{'detector':<12} {'ms/frame':>9} {'speedup':>8} {'blobs/frame':>12} {'vs simple':>10} {'truth recall':>13}")
+    for name, (per_frame, detections) in results.items():
+        count = sum(len(d) for d in detections)
+        agreement = sum(match(d, b, args.tolerance) for d, b in zip(detections, baseline))
+        base_count = sum(len(b) for b in baseline)
+        parity = f"{agreement / base_count:.1%}" if base_count else "-"
+        if inputs[0][2] is not None:
+            truth_total = sum(len(t) for _, _, t in inputs)
+            recall = sum(match(t, d, args.tolerance) for (_, _, t), d in zip(inputs, detections)) / truth_total
+            recall = f"{recall:.1%}"
+        else:
+            recall = "-"
+        print(
+            f"{name:<12} {per_frame * 1000:>9.2f} {baseline_time / per_frame:>7.1f}x "
+            f"{count / len(inputs):>12.1f} {parity:>10} {recall:>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
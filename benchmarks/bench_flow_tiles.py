@@ -0,0 +1,76 @@
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+
+from blobengine import BlobSettings
+from blobengine.detect import create_blob_detector
+from blobengine.motion import MOTION_BACKENDS, create_motion_backend
+
+from .bench_detectors import match
+from .synthetic import synthetic_frames, video_frames
+
+
+def gray_frames(source):
+    return [cv2.equalizeHist(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)) for frame, _ in source]
+
+
+def run(grays, settings):
+    # Per-frame motion_mask latency (ms), masks and detections for one tile count
+    motion = create_motion_backend(settings)
+    detector = create_blob_detector(settings)
+    times, masks, detections = [], [], []
+    for prev_gray, gray in zip(grays, grays[1:]):
+        start = time.perf_counter()
+        mask = motion.motion_mask(prev_gray, gray, settings.motion_threshold)
+        times.append((time.perf_counter() - start) * 1000)
+        masks.append(mask)
+        detections.append(detector.detect(gray, mask))
+    return np.array(times), masks, detections
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Motion-mask latency against flow tile count, with seam check.")
+    parser.add_argument("--video", help="benchmark on a real video instead of synthetic frames")
+    parser.add_argument("--width", type=int, default=3840)
+    parser.add_argument("--height", type=int, default=2160)
+    parser.add_argument("--frames", type=int, default=10)
+    parser.add_argument("--blobs", type=int, default=60)
+    parser.add_argument("--tiles", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--motion-backend", choices=sorted(MOTION_BACKENDS), default=BlobSettings.motion_backend)
+    parser.add_argument("--tolerance", type=float, default=3.0, help="max center distance (px) for two detections to match")
+    args = parser.parse_args(argv)
+
+    if args.video:
+        source = video_frames(args.video, args.frames)
+    else:
+        scale = args.height / 720
+        radius = (max(2, round(6 * scale)), max(3, round(18 * scale)))
+        source = synthetic_frames(args.width, args.height, args.frames, args.blobs, radius=radius, speed=4.0 * scale)
+    grays = gray_frames(source)
+
+    print(f"{grays[0].shape[1]}x{grays[0].shape[0]}, {len(grays) - 1} frames, {args.motion_backend}, {os.cpu_count()} cpus")
+    print(f"{'tiles':>5} {'p50 ms':>8} {'p95 ms':>8} {'speedup':>8} {'mask diff':>10} {'blobs':>7} {'vs 1 tile':>10}")
+    baseline = None
+    for tiles in args.tiles:
+        settings = BlobSettings(motion_backend=args.motion_backend, flow_tiles=tiles)
+        times, masks, detections = run(grays, settings)
+        if baseline is None:
+            baseline = (np.median(times), masks, detections)
+        base_time, base_masks, base_detections = baseline
+        # Share of mask pixels that differ from the untiled mask: the cost of the seams
+        diff = np.mean([np.count_nonzero(m != b) / m.size for m, b in zip(masks, base_masks)])
+        count = sum(len(d) for d in detections)
+        base_count = sum(len(d) for d in base_detections)
+        agreement = sum(match(d, b, args.tolerance) for d, b in zip(detections, base_detections))
+        parity = f"{agreement / base_count:.1%}" if base_count else "-"
+        print(
+            f"{tiles:>5} {np.median(times):>8.1f} {np.percentile(times, 95):>8.1f} {base_time / np.median(times):>7.2f}x "
+            f"{diff:>10.4%} {count:>7} {parity:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
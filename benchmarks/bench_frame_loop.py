@@ -0,0 +1,75 @@
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from blobengine import BlobEngine, BlobSettings
+from blobengine.motion import MOTION_BACKENDS
+from blobengine.profiling import peak_rss_mb
+
+from .synthetic import synthetic_frames, video_frames
+
+
+def run(frames, settings, warmup, trace):
+    # Analyze and draw every frame; returns per-frame ms after warm-up and, when tracing,
+    # the per-frame transient allocation peak (MB) and the memory retained since warm-up
+    engine = BlobEngine(settings)
+    engine.total_frames = len(frames)
+    times, peaks = [], []
+    retained = 0.0
+    if trace:
+        tracemalloc.start()
+    for index, source in enumerate(frames):
+        frame = source.copy()
+        if trace:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        tracks, frame_count = engine.analyze_frame(frame)
+        engine.render_frame(frame, tracks, frame_count)
+        elapsed = time.perf_counter() - start
+        if index < warmup:
+            if trace and index == warmup - 1:
+                baseline = tracemalloc.get_traced_memory()[0]
+            continue
+        times.append(elapsed * 1000)
+        if trace:
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append((peak - before) / 2 ** 20)
+            retained = (current - baseline) / 2 ** 20
+    if trace:
+        tracemalloc.stop()
+    return np.array(times), np.array(peaks), retained
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Steady-state cost of the analyze+draw frame loop: time and allocations.")
+    parser.add_argument("--video", help="benchmark on a real video instead of synthetic frames")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--blobs", type=int, default=60)
+    parser.add_argument("--motion-backend", choices=sorted(MOTION_BACKENDS), default=BlobSettings.motion_backend)
+    parser.add_argument("--warm-start", action="store_true", help="also time flow seeded with the previous frame's flow")
+    args = parser.parse_args(argv)
+
+    if args.video:
+        frames = [frame for frame, _ in video_frames(args.video, args.frames)]
+    else:
+        frames = [frame for frame, _ in synthetic_frames(args.width, args.height, args.frames, args.blobs)]
+
+    variants = [("cold start", False)] + ([("warm start", True)] if args.warm_start else [])
+    print(f"{frames[0].shape[1]}x{frames[0].shape[0]}, {len(frames) - args.warmup} frames after {args.warmup} warm-up, {args.motion_backend}")
+    print(f"{'flow':<11} {'p50 ms':>8} {'mean ms':>8} {'alloc MB/frame':>15} {'retained MB':>12}")
+    for name, warm_start in variants:
+        settings = BlobSettings(motion_backend=args.motion_backend, flow_warm_start=warm_start)
+        times, _, _ = run(frames, settings, args.warmup, trace=False)
+        _, peaks, retained = run(frames, settings, args.warmup, trace=True)
+        print(f"{name:<11} {np.median(times):>8.1f} {times.mean():>8.1f} {peaks.mean():>15.2f} {retained:>12.2f}")
+    print(f"peak RSS {peak_rss_mb():.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from blobengine import BlobEngine, BlobSettings
+from blobengine.tracking import Tracks
+
+
+def reference_overlay(engine, frame, objects, max_connection_distance):
+    # The original pairwise double loop from _draw_elements, kept as the pixel reference
+    centers = [(data["center"], oid) for oid, data in objects.items()]
+    for i, (center1, id1) in enumerate(centers):
+        for j, (center2, id2) in enumerate(centers[i + 1:], start=i + 1):
+            dist = ((center1[0] - center2[0]) ** 2 + (center1[1] - center2[1]) ** 2) ** 0.5
+            if dist < max_connection_distance:
+                cv2.line(frame, center1, center2, engine.GRAY, 1)
+                cv2.line(frame, (center1[0] + 1, center1[1] + 1), (center2[0] + 1, center2[1] + 1), engine.WHITE, 1)
+    for obj_id, data in objects.items():
+        cx, cy = data["center"]
+        size = data["size"]
+        radius = int(size / 2)
+        cv2.circle(frame, (cx + engine.shadow_offset, cy + engine.shadow_offset), radius, engine.GRAY, 2)
+        cv2.circle(frame, (cx, cy), radius, engine.WHITE, 2)
+        text = f"#{obj_id}"
+        text_size, _ = cv2.getTextSize(text, engine.font, engine.font_scale, 1)
+        tx, ty = int(cx + size / 2 + 5), int(cy)
+        cv2.rectangle(frame, (tx - 3, ty - text_size[1] - 3), (tx + text_size[0] + 3, ty + 3), engine.BLACK, -1)
+        cv2.putText(frame, text, (tx + 1, ty + 1), engine.font, engine.font_scale, engine.GRAY, 1)
+        cv2.putText(frame, text, (tx, ty), engine.font, engine.font_scale, engine.WHITE, 1)
+
+
+def random_tracks(blobs, width, height, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = np.column_stack((rng.integers(0, width, blobs), rng.integers(0, height, blobs)))
+    sizes = rng.uniform(3, 40, blobs)
+    return Tracks(
+        rng.permutation(blobs * 3)[:blobs] + 1,
+        centers.astype(np.int64),
+        sizes,
+        np.pi * (sizes / 2) ** 2,
+        np.zeros(blobs, np.int64),
+        np.zeros(blobs),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Connection/blob overlay rendering: pairwise loop vs grid hash.")
+    parser.add_argument("--blobs", type=int, nargs="+", default=[10, 50, 200, 500, 1000, 2000])
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--distance", type=int, default=BlobSettings.max_connection_distance)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    engine = BlobEngine()
+    background = np.random.default_rng(1).integers(0, 255, (args.height, args.width, 3), dtype=np.uint8)
+    print(f"{'blobs':>6} {'reference ms':>13} {'grid ms':>9} {'speedup':>8} {'identical':>10}")
+    for blobs in args.blobs:
+        tracks = random_tracks(blobs, args.width, args.height, seed=blobs)
+        objects = tracks.to_dict()
+        timings = {}
+        outputs = {}
+        for name, draw in (
+            ("reference", lambda frame: reference_overlay(engine, frame, objects, args.distance)),
+            ("grid", lambda frame: engine._draw_overlay(frame, tracks, args.distance)),
+        ):
+            best = float("inf")
+            for _ in range(args.repeat):
+                frame = background.copy()
+                start = time.perf_counter()
+                draw(frame)
+                best = min(best, time.perf_counter() - start)
+            timings[name], outputs[name] = best, frame
+        identical = np.array_equal(outputs["reference"], outputs["grid"])
+        print(
+            f"{blobs:>6} {timings['reference'] * 1000:>13.2f} {timings['grid'] * 1000:>9.2f} "
+            f"{timings['reference'] / timings['grid']:>7.1f}x {'yes' if identical else 'NO':>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
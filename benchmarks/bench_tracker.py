@@ -0,0 +1,66 @@
+import argparse
+import time
+
+import numpy as np
+
+from blobengine.tracking import TRACKERS
+
+
+def synthetic_detections(blobs, frames, width=1920, height=1080, seed=0, dropout=0.1):
+    # Random-walking blobs as (M, 4) cx, cy, size, area detections; some blobs are
+    # missed each frame so tracks are created and pruned as in real footage
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform((0, 0), (width, height), (blobs, 2))
+    sizes = rng.uniform(5, 40, blobs)
+    for _ in range(frames):
+        positions = np.clip(positions + rng.normal(0, 3, positions.shape), 0, (width - 1, height - 1))
+        seen = rng.random(blobs) >= dropout
+        size = sizes[seen] * rng.uniform(0.9, 1.1, seen.sum())
+        yield np.column_stack((np.trunc(positions[seen]), size, np.pi * (size / 2) ** 2))
+
+
+def same_tracks(a, b):
+    return (
+        np.array_equal(a.ids, b.ids)
+        and np.array_equal(a.centers, b.centers)
+        and np.array_equal(a.sizes, b.sizes)
+        and np.array_equal(a.ages, b.ages)
+        and np.array_equal(a.activity, b.activity)
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tracker scaling benchmark: dict-of-dicts vs array tracker.")
+    parser.add_argument("--blobs", type=int, nargs="+", default=[10, 50, 100, 500, 1000, 5000])
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--dict-limit", type=int, default=1000, help="skip the dict tracker above this many blobs")
+    args = parser.parse_args(argv)
+
+    print(f"{'blobs':>6} {'tracker':<8} {'ms/frame':>10} {'tracks':>8} {'speedup':>8} {'parity':>7}")
+    for blobs in args.blobs:
+        detections = list(synthetic_detections(blobs, args.frames))
+        timings, snapshots = {}, {}
+        for name, tracker_class in TRACKERS.items():
+            if name == "dict" and blobs > args.dict_limit:
+                continue
+            tracker = tracker_class()
+            snapshots[name] = []
+            start = time.perf_counter()
+            for frame_detections in detections:
+                tracker.assign(frame_detections)
+                snapshots[name].append(tracker.snapshot())
+            timings[name] = (time.perf_counter() - start) / len(detections)
+
+        parity = "-"
+        if "dict" in snapshots:
+            parity = "yes" if all(map(same_tracks, snapshots["dict"], snapshots["array"])) else "NO"
+        for name, per_frame in timings.items():
+            speedup = f"{timings['dict'] / per_frame:.1f}x" if "dict" in timings else "-"
+            print(
+                f"{blobs:>6} {name:<8} {per_frame * 1000:>10.3f} {len(snapshots[name][-1]):>8} "
+                f"{speedup:>8} {parity if name == 'array' else '':>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
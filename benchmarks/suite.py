@@ -0,0 +1,224 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from blobengine import BlobEngine, BlobPipeline, BlobSettings
+from blobengine.profiling import STAGES, peak_rss_mb
+from blobengine.settings import parse_setting
+
+from .bench_detectors import match
+from .synthetic import DENSITIES, RESOLUTIONS, load_truth, scenario_frames, video_frames, write_video
+
+PERCENTILES = (50, 95, 99)
+
+
+def scenario_video(workdir, resolution, density, frames, seed):
+    # Generated clips are cached in workdir, so repeated runs measure the same input
+    # (-rim: clips cached before the discs were drawn dark with a bright rim are not reused)
+    path = os.path.join(workdir, f"{resolution}-{density}-{frames}f-s{seed}-rim.avi")
+    if not (os.path.exists(path) and os.path.exists(path + ".truth.npz")):
+        write_video(path, scenario_frames(resolution, density, frames, seed))
+    return path
+
+
+def measure_speed(path, settings, staged):
+    # Runs in its own process so peak RSS belongs to this scenario alone
+    pipeline = BlobPipeline(settings, staged=staged, profile=True)
+    output = path + ".out.avi"
+    start = time.perf_counter()
+    frames = pipeline.run(path, output)
+    elapsed = time.perf_counter() - start
+    os.remove(output)
+
+    latency = {}
+    records = pipeline.profiler.frames.values()
+    for stage in STAGES:
+        times = np.array([r[stage] for r in records if stage in r], np.float64) * 1000
+        if len(times):
+            latency[stage] = {f"p{p}": float(np.percentile(times, p)) for p in PERCENTILES}
+    return {
+        "frames": frames,
+        "seconds": elapsed,
+        "fps": frames / elapsed if elapsed > 0 else 0.0,
+        "latency_ms": latency,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def measure_accuracy(path, settings, tolerance):
+    # Serial pass over the clip through the same analyze/render calls the pipeline makes
+    # (motion gate, analysis proxy, output size): detection and track recall against the
+    # ground truth, and a digest of the rendered frames that changes whenever the output does
+    engine = BlobEngine(settings)
+    truths = load_truth(path)
+    digest = hashlib.sha1()
+    truth_total = detections_total = detected = tracked = 0
+    for index, (frame, _) in enumerate(video_frames(path)):
+        if index == 0:
+            height, width = frame.shape[:2]
+            output_size = settings.output_size(width, height)
+        tracks, frame_count = engine.analyze_frame(frame)
+        # Keypoints in source pixels; empty on frames the motion gate skipped
+        detections = engine.keypoints
+        digest.update(engine.render_output(frame, tracks, frame_count, output_size).tobytes())
+        # The first frame has no motion to measure
+        if truths is None or index == 0 or index >= len(truths):
+            continue
+        truth = truths[index]
+        truth_total += len(truth)
+        detections_total += len(detections)
+        detected += match(truth, detections, tolerance)
+        tracked += match(truth, tracks.centers, tolerance)
+
+    return {
+        "detection_recall": detected / truth_total if truth_total else None,
+        "detection_precision": detected / detections_total if detections_total else None,
+        "track_recall": tracked / truth_total if truth_total else None,
+        "render_digest": digest.hexdigest(),
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "describe", "--always", "--dirty"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+    }
+
+
+def parse_overrides(pairs):
+    # KEY=VALUE settings overrides, converted to the type of the default value
+    defaults = BlobSettings()
+    overrides = {}
+    for pair in pairs:
+        key, _, value = pair.partition("=")
+        if not hasattr(defaults, key):
+            raise ValueError(f"Unknown setting: {key}")
+        overrides[key] = parse_setting(key, value)
+    return overrides
+
+
+def _fmt(value, spec):
+    if value is None:
+        return format("-", ">" + spec.split(".")[0])
+    return format(value, spec)
+
+
+def print_results(results):
+    print(f"{'scenario':<16} {'fps':>7} {'flow p95':>9} {'draw p95':>9} {'rss MB':>7} {'det rec':>8} {'det prec':>9} {'trk rec':>8}")
+    for r in results["scenarios"]:
+        latency = r["latency_ms"]
+        print(
+            f"{r['name']:<16} {r['fps']:>7.1f} {_fmt(latency.get('flow', {}).get('p95'), '9.2f')} "
+            f"{_fmt(latency.get('draw', {}).get('p95'), '9.2f')} {r['peak_rss_mb']:>7.0f} "
+            f"{_fmt(r['detection_recall'], '8.1%')} {_fmt(r['detection_precision'], '9.1%')} {_fmt(r['track_recall'], '8.1%')}"
+        )
+
+
+def compare(results, baseline, max_slowdown, max_recall_drop):
+    # Returns the number of regressions: fps drops beyond max_slowdown percent, recall drops
+    # beyond max_recall_drop points, or changed output
+    base = {r["name"]: r for r in baseline["scenarios"]}
+    print(f"\nvs {baseline['environment'].get('commit') or 'baseline'}")
+    print(f"{'scenario':<16} {'fps':>8} {'det rec':>8} {'trk rec':>8} {'output':>8}")
+    regressions = 0
+    for r in results["scenarios"]:
+        b = base.get(r["name"])
+        if b is None:
+            continue
+        change = (r["fps"] / b["fps"] - 1) * 100 if b["fps"] else 0.0
+        same = r["render_digest"] == b["render_digest"]
+        deltas = []
+        worse = False
+        for key in ("detection_recall", "track_recall"):
+            if r[key] is None or b[key] is None:
+                deltas.append("-")
+            else:
+                delta = (r[key] - b[key]) * 100
+                worse |= delta < -max_recall_drop
+                deltas.append(f"{delta:+.1f}pt")
+        slow = change < -max_slowdown
+        regressions += slow + worse + (not same)
+        print(
+            f"{r['name']:<16} {change:>+7.1f}% {deltas[0]:>8} {deltas[1]:>8} {'same' if same else 'CHANGED':>8}"
+            f"{'  SLOWER' if slow else ''}{'  LOWER RECALL' if worse else ''}"
+        )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synthetic-video benchmark and regression suite for the full pipeline.")
+    parser.add_argument("--resolutions", nargs="+", choices=list(RESOLUTIONS), default=["480p", "720p", "1080p"])
+    parser.add_argument("--densities", nargs="+", choices=list(DENSITIES), default=["sparse", "crowded"])
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tolerance", type=float, default=10.0, help="match distance (px at 720p, scaled with frame height)")
+    parser.add_argument("--serial", action="store_true", help="time the single-threaded pipeline")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="KEY=VALUE", help="override a BlobSettings field")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "blobengine-bench"), help="cache for generated clips")
+    parser.add_argument("--output", help="results JSON (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="results JSON of an earlier run to compare against")
+    parser.add_argument("--max-slowdown", type=float, default=10.0, help="fps drop (percent) reported as a regression")
+    parser.add_argument("--max-recall-drop", type=float, default=2.0, help="detection or track recall drop (points) reported as a regression")
+    args = parser.parse_args(argv)
+
+    settings = BlobSettings.from_dict(parse_overrides(args.overrides))
+    os.makedirs(args.workdir, exist_ok=True)
+    results = {"environment": environment(), "settings": settings.to_dict(), "frames": args.frames, "scenarios": []}
+
+    context = multiprocessing.get_context("spawn")
+    for resolution in args.resolutions:
+        for density in args.densities:
+            name = f"{resolution}-{density}"
+            print(f"{name}...", file=sys.stderr, flush=True)
+            path = scenario_video(args.workdir, resolution, density, args.frames, args.seed)
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                speed = pool.submit(measure_speed, path, settings, not args.serial).result()
+            tolerance = args.tolerance * RESOLUTIONS[resolution][1] / 720
+            accuracy = measure_accuracy(path, settings, tolerance)
+            width, height = RESOLUTIONS[resolution]
+            results["scenarios"].append(
+                {"name": name, "width": width, "height": height, "blobs": DENSITIES[density], **speed, **accuracy}
+            )
+
+    print_results(results)
+    output = args.output
+    if output is None:
+        output = os.path.join(os.path.dirname(__file__), "results", f"{results['environment']['commit'] or int(time.time())}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=1)
+    print(f"Results saved to: {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.max_slowdown, args.max_recall_drop)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import os
+
+import numpy as np
+import cv2
+
+# Named presets for the regression suite: frame sizes from 480p to 4K, blob counts from sparse to crowded
+RESOLUTIONS = {
+    "480p": (854, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "4k": (3840, 2160),
+}
+DENSITIES = {
+    "sparse": 10,
+    "medium": 50,
+    "crowded": 200,
+}
+# Width of the bright rim around each disc, in pixels
+RIM = 3
+
+
+def synthetic_frames(width, height, frames, blobs, seed=0, radius=(6, 18), speed=4.0):
+    # Dark discs with a bright rim moving over a static light textured background; yields
+    # (frame, truth) where truth is an (N, 3) array of x, y, radius for every disc. The
+    # default SimpleBlobDetector looks for dark blobs with lighter surroundings inside the
+    # motion mask, which a flat disc's partial mask does not give it; the moving rim does.
+    rng = np.random.default_rng(seed)
+    background = rng.integers(170, 230, (height, width, 3), dtype=np.uint8)
+    background = cv2.GaussianBlur(background, (3, 3), 0)
+    positions = rng.uniform((0, 0), (width, height), (blobs, 2))
+    # Every disc moves at least half of speed, so each one leaves a motion mask to find
+    angles = rng.uniform(0, 2 * np.pi, blobs)
+    velocities = np.column_stack((np.cos(angles), np.sin(angles))) * rng.uniform(speed / 2, speed, (blobs, 1))
+    radii = rng.integers(radius[0], radius[1] + 1, blobs)
+    for _ in range(frames):
+        frame = background.copy()
+        for (x, y), r in zip(positions, radii):
+            cv2.circle(frame, (int(x), int(y)), int(r) + RIM, (255, 255, 255), -1)
+            cv2.circle(frame, (int(x), int(y)), int(r), (30, 30, 30), -1)
+        truth = np.column_stack((positions.astype(int), radii))
+        yield frame, truth
+        positions += velocities
+        # Bounce off the borders so blobs stay in frame
+        for axis, limit in ((0, width), (1, height)):
+            out = (positions[:, axis] < 0) | (positions[:, axis] >= limit)
+            velocities[out, axis] *= -1
+            positions[:, axis] = np.clip(positions[:, axis], 0, limit - 1)
+
+
+def video_frames(path, frames=None):
+    video = cv2.VideoCapture(path)
+    if not video.isOpened():
+        raise RuntimeError(f"Failed to open video: {path}")
+    count = 0
+    try:
+        while frames is None or count < frames:
+            ret, frame = video.read()
+            if not ret:
+                break
+            yield frame, None
+            count += 1
+    finally:
+        video.release()
+
+
+def scenario_frames(resolution, density, frames, seed=0):
+    # Preset synthetic clip; disc radius and speed scale with frame height so every
+    # resolution shows the same scene
+    width, height = RESOLUTIONS[resolution]
+    scale = height / 720
+    radius = (max(2, round(6 * scale)), max(3, round(18 * scale)))
+    return synthetic_frames(width, height, frames, DENSITIES[density], seed, radius, 4.0 * scale)
+
+
+def write_video(path, source, fps=30.0):
+    # Encode (frame, truth) pairs to an XVID file and save the truth next to it as
+    # <path>.truth.npz; returns the list of per-frame truth arrays
+    writer = None
+    truths = []
+    try:
+        for frame, truth in source:
+            if writer is None:
+                height, width = frame.shape[:2]
+                writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"XVID"), fps, (width, height))
+                if not writer.isOpened():
+                    raise RuntimeError(f"Failed to open video writer: {path}")
+            writer.write(frame)
+            truths.append(truth)
+    finally:
+        if writer is not None:
+            writer.release()
+    np.savez_compressed(path + ".truth.npz", *truths)
+    return truths
+
+
+def load_truth(path):
+    truth_path = path + ".truth.npz"
+    if not os.path.exists(truth_path):
+        return None
+    with np.load(truth_path) as data:
+        return [data[f"arr_{i}"] for i in range(len(data.files))]
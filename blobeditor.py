@@ -1,5 +1,4 @@
 import cv2
-import numpy as np
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk, scrolledtext
 import os
@@ -8,6 +7,13 @@ import tkinter.font as tkFont
 from ttkbootstrap import Style  # Using ttkbootstrap for modern themes
 import threading
 
+from blobengine import MOTION_BACKENDS, OUTPUT_RESOLUTIONS, TRAIL_MODES, BlobPipeline, BlobSettings
+from blobengine.batch import BatchRunner, JobQueue
+from blobengine.cache import AnalysisCache
+from blobengine.checkpoint import Checkpoint
+from blobengine.videoio import ENCODERS
+from blobengine.preview import PreviewMailbox, fit_frame
+
 class DelusionalMotionVideoBlobEditorApp:
     def __init__(self, root):
         self.root = root
@@ -17,34 +23,45 @@ class DelusionalMotionVideoBlobEditorApp:
 
         # Core variables
         self.input_path = self.output_path = None
-        self.video = self.writer = None
+        self.pipeline = None
         self.running = False
-        self.objects = {}
-        self.object_id = self.frame_count = self.total_frames = 0
-        self.prev_gray = None
-        self.trail_buffer = []
         self.preview_photo = None
-
-        # OpenCV constants
-        self.WHITE = (255, 255, 255)
-        self.BLACK = (0, 0, 0)
-        self.GRAY = (180, 180, 180)
-        self.font = cv2.FONT_HERSHEY_SIMPLEX
-        self.font_scale = 0.4
-        self.line_thickness = 1
-        self.shadow_offset = 2
+        self.preview_mailbox = PreviewMailbox()
+        # Batch queue, persisted between sessions; runs on a process pool next to the editor
+        self.job_queue = JobQueue()
+        self.batch_runner = None
 
         # Tkinter variables
-        self.blob_size_scale = tk.DoubleVar(value=0.5)
-        self.max_connection_distance = tk.IntVar(value=150)
-        self.motion_threshold = tk.DoubleVar(value=1.0)
-        self.min_area = tk.IntVar(value=50)
-        self.trail_opacity = tk.DoubleVar(value=0.2)
-        self.output_resolution = tk.StringVar(value="Match Input")
-        self.bitrate = tk.IntVar(value=100000)
-
-        # Initialize blob detector and GUI
-        self._setup_blob_detector()
+        defaults = BlobSettings()
+        self.blob_size_scale = tk.DoubleVar(value=defaults.blob_size_scale)
+        self.max_connection_distance = tk.IntVar(value=defaults.max_connection_distance)
+        self.motion_threshold = tk.DoubleVar(value=defaults.motion_threshold)
+        self.min_area = tk.IntVar(value=defaults.min_area)
+        self.trail_opacity = tk.DoubleVar(value=defaults.trail_opacity)
+        self.output_resolution = tk.StringVar(value=defaults.output_resolution)
+        self.bitrate = tk.IntVar(value=defaults.bitrate)
+        self.motion_backend = tk.StringVar(value=defaults.motion_backend)
+        self.motion_gate = tk.DoubleVar(value=defaults.motion_gate)
+        self.trail_mode = tk.StringVar(value=defaults.trail_mode)
+        self.encoder = tk.StringVar(value=defaults.encoder)
+        self.analysis_scale = tk.DoubleVar(value=defaults.analysis_scale)
+        self.draw_at_output = tk.BooleanVar(value=defaults.draw_at_output)
+        self.start_time = tk.DoubleVar(value=defaults.start_time)
+        self.end_time = tk.DoubleVar(value=defaults.end_time)
+        self.trail_length = tk.IntVar(value=defaults.trail_length)
+        self.preview_enabled = tk.BooleanVar(value=True)
+        self.preview_fps = tk.IntVar(value=15)
+        self.profile_enabled = tk.BooleanVar(value=False)
+        self.cache_enabled = tk.BooleanVar(value=True)
+        self.export_tracks = tk.BooleanVar(value=False)
+        self.resumable = tk.BooleanVar(value=False)
+
+        # Push slider changes into a running pipeline instead of polling per frame
+        for var in (self.blob_size_scale, self.max_connection_distance, self.motion_threshold, self.min_area, self.trail_opacity,
+                    self.trail_mode, self.trail_length, self.motion_gate):
+            var.trace_add("write", lambda *_: self._sync_settings())
+
+        # Initialize GUI
         self._apply_theme()
         self._setup_gui()
 
@@ -55,20 +72,39 @@ class DelusionalMotionVideoBlobEditorApp:
         self.custom_font = tkFont.Font(family="Montserrat", size=14, weight="bold")
         self.header_font = tkFont.Font(family="Montserrat", size=28, weight="bold")
 
-    def _setup_blob_detector(self):
-        params = cv2.SimpleBlobDetector_Params()
-        params.minThreshold = 5
-        params.maxThreshold = 250
-        params.filterByArea = True
-        params.minArea = self.min_area.get()
-        params.maxArea = 25000
-        params.filterByCircularity = False
-        params.filterByConvexity = False
-        params.filterByInertia = False
-        self.blob_detector = cv2.SimpleBlobDetector_create(params)
-
-    def _update_blob_detector(self):
-        self._setup_blob_detector()
+    def _settings(self):
+        return BlobSettings(
+            min_area=self.min_area.get(),
+            motion_threshold=self.motion_threshold.get(),
+            blob_size_scale=self.blob_size_scale.get(),
+            max_connection_distance=self.max_connection_distance.get(),
+            trail_opacity=self.trail_opacity.get(),
+            output_resolution=self.output_resolution.get(),
+            bitrate=self.bitrate.get(),
+            motion_backend=self.motion_backend.get(),
+            motion_gate=self.motion_gate.get(),
+            trail_mode=self.trail_mode.get(),
+            trail_length=self.trail_length.get(),
+            encoder=self.encoder.get(),
+            analysis_scale=self.analysis_scale.get(),
+            draw_at_output=self.draw_at_output.get(),
+            start_time=self.start_time.get(),
+            end_time=self.end_time.get(),
+        )
+
+    def _sync_settings(self):
+        if self.pipeline and self.running:
+            settings = self._settings()
+            self.pipeline.update_settings(
+                min_area=settings.min_area,
+                motion_threshold=settings.motion_threshold,
+                blob_size_scale=settings.blob_size_scale,
+                max_connection_distance=settings.max_connection_distance,
+                trail_opacity=settings.trail_opacity,
+                trail_mode=settings.trail_mode,
+                trail_length=settings.trail_length,
+                motion_gate=settings.motion_gate,
+            )
 
     def _setup_gui(self):
         # Header
@@ -107,6 +143,46 @@ class DelusionalMotionVideoBlobEditorApp:
             borderwidth=0,
             width=15,
         ).pack(side=tk.LEFT, padx=10)
+        tk.Button(
+            header,
+            text="Add to Queue",
+            command=self._add_to_queue,
+            font=self.custom_font,
+            bg=self.style.colors.secondary,
+            fg="#ffffff",
+            activebackground="#ff4d4d",
+            activeforeground="#ffffff",
+            relief=tk.FLAT,
+            borderwidth=0,
+            width=15,
+        ).pack(side=tk.LEFT, padx=10)
+        tk.Button(
+            header,
+            text="Queue Folder",
+            command=self._queue_folder,
+            font=self.custom_font,
+            bg=self.style.colors.secondary,
+            fg="#ffffff",
+            activebackground="#ff4d4d",
+            activeforeground="#ffffff",
+            relief=tk.FLAT,
+            borderwidth=0,
+            width=15,
+        ).pack(side=tk.LEFT, padx=10)
+        self.queue_button = tk.Button(
+            header,
+            text="Run Queue",
+            command=self._toggle_queue,
+            font=self.custom_font,
+            bg=self.style.colors.secondary,
+            fg="#ffffff",
+            activebackground="#ff4d4d",
+            activeforeground="#ffffff",
+            relief=tk.FLAT,
+            borderwidth=0,
+            width=15,
+        )
+        self.queue_button.pack(side=tk.LEFT, padx=10)
 
         # Main content area
         main_frame = tk.Frame(self.root, bg=self.style.colors.bg)
@@ -134,7 +210,11 @@ class DelusionalMotionVideoBlobEditorApp:
             ("Blob Size Scale", self.blob_size_scale, 0.1, 1.0, "Scale the size of detected blobs"),
             ("Connection Distance", self.max_connection_distance, 50, 300, "Max distance for blob connections"),
             ("Trail Opacity", self.trail_opacity, 0.1, 1.0, "Opacity of blob motion trails"),
+            ("Trail Length", self.trail_length, 1, 30, "Number of frames in blob motion trails"),
             ("Bitrate (kbps)", self.bitrate, 5000, 200000, "Output video quality"),
+            ("Motion Gate", self.motion_gate, 0.0, 30.0, "Skip optical flow on frames that barely changed (0 = off)"),
+            ("Analysis Scale", self.analysis_scale, 0.25, 1.0, "Run motion analysis on a smaller proxy of each frame"),
+            ("Preview FPS", self.preview_fps, 1, 30, "Maximum live preview refresh rate"),
         ]
 
         for text, var, from_, to_, tooltip in controls:
@@ -159,8 +239,6 @@ class DelusionalMotionVideoBlobEditorApp:
             # Add tooltip
             scale.bind("<Enter>", lambda e, t=tooltip: self._show_tooltip(e, t))
             scale.bind("<Leave>", self._hide_tooltip)
-            if text == "Min Blob Area":
-                scale.configure(command=lambda x: self._update_blob_detector())
 
         # Resolution dropdown
         tk.Label(
@@ -173,13 +251,105 @@ class DelusionalMotionVideoBlobEditorApp:
         ttk.OptionMenu(
             control_frame,
             self.output_resolution,
-            "Match Input",
-            "Match Input",
-            "1920x1080",
-            "3840x2160",
+            OUTPUT_RESOLUTIONS[0],
+            *OUTPUT_RESOLUTIONS,
+            style="TMenubutton",
+        ).pack(pady=5)
+
+        # Time range (seconds, end 0 = to the end of the video)
+        range_frame = tk.Frame(control_frame, bg=self.style.colors.dark)
+        range_frame.pack(fill=tk.X, pady=10)
+        for text, var in (("Start (s)", self.start_time), ("End (s)", self.end_time)):
+            tk.Label(
+                range_frame,
+                text=text,
+                font=self.custom_font,
+                bg=self.style.colors.dark,
+                fg="#e0e0e0",
+            ).pack(side=tk.LEFT)
+            ttk.Entry(range_frame, textvariable=var, width=8).pack(side=tk.LEFT, padx=10)
+
+        # Motion backend dropdown
+        tk.Label(
+            control_frame,
+            text="Motion Backend",
+            font=self.custom_font,
+            bg=self.style.colors.dark,
+            fg="#e0e0e0",
+        ).pack(pady=10)
+        ttk.OptionMenu(
+            control_frame,
+            self.motion_backend,
+            self.motion_backend.get(),
+            *MOTION_BACKENDS,
+            style="TMenubutton",
+        ).pack(pady=5)
+
+        # Trail mode dropdown
+        tk.Label(
+            control_frame,
+            text="Trail Mode",
+            font=self.custom_font,
+            bg=self.style.colors.dark,
+            fg="#e0e0e0",
+        ).pack(pady=10)
+        ttk.OptionMenu(
+            control_frame,
+            self.trail_mode,
+            self.trail_mode.get(),
+            *TRAIL_MODES,
             style="TMenubutton",
         ).pack(pady=5)
 
+        # Encoder dropdown; the ffmpeg encoders honor the bitrate
+        tk.Label(
+            control_frame,
+            text="Encoder",
+            font=self.custom_font,
+            bg=self.style.colors.dark,
+            fg="#e0e0e0",
+        ).pack(pady=10)
+        ttk.OptionMenu(
+            control_frame,
+            self.encoder,
+            self.encoder.get(),
+            *ENCODERS,
+            style="TMenubutton",
+        ).pack(pady=5)
+
+        ttk.Checkbutton(
+            control_frame,
+            text="Draw at Output Resolution",
+            variable=self.draw_at_output,
+        ).pack(pady=10)
+
+        # Preview toggle; processing speed does not depend on it
+        ttk.Checkbutton(
+            control_frame,
+            text="Live Preview",
+            variable=self.preview_enabled,
+        ).pack(pady=10)
+        ttk.Checkbutton(
+            control_frame,
+            text="Stage Profiling",
+            variable=self.profile_enabled,
+        ).pack(pady=5)
+        ttk.Checkbutton(
+            control_frame,
+            text="Cache Motion Analysis",
+            variable=self.cache_enabled,
+        ).pack(pady=5)
+        ttk.Checkbutton(
+            control_frame,
+            text="Export Track Data",
+            variable=self.export_tracks,
+        ).pack(pady=5)
+        ttk.Checkbutton(
+            control_frame,
+            text="Resumable Render",
+            variable=self.resumable,
+        ).pack(pady=5)
+
         # Process button
         self.process_button = tk.Button(
             control_frame,
@@ -321,30 +491,19 @@ class DelusionalMotionVideoBlobEditorApp:
         self.log_text.see(tk.END)
 
     def _update_preview(self, frame):
-        preview_width, preview_height = 1280, 720
-        h, w = frame.shape[:2]
-        aspect_ratio = w / h
-        if aspect_ratio > preview_width / preview_height:
-            new_width = preview_width
-            new_height = int(new_width / aspect_ratio)
-        else:
-            new_height = preview_height
-            new_width = int(new_height * aspect_ratio)
-        frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LANCZOS4)
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        frame_rgb = cv2.cvtColor(fit_frame(frame, 1280, 720), cv2.COLOR_BGR2RGB)
         image = Image.fromarray(frame_rgb)
         self.preview_photo = ImageTk.PhotoImage(image)
         self.preview_label.config(image=self.preview_photo, text="")
-        self.root.update()
 
     def _select_input(self):
-        self.input_path = filedialog.askopenfilename(filetypes=[("Video files", "*.mp4 *.avi *.mov")])
+        self.input_path = filedialog.askopenfilename(filetypes=[("Video files", "*.mp4 *.avi *.mov *.mkv")])
         if self.input_path:
             self._log(f"Loaded: {os.path.basename(self.input_path)}")
             self._check_ready()
 
     def _select_output(self):
-        self.output_path = filedialog.asksaveasfilename(defaultextension=".avi", filetypes=[("AVI files", "*.avi")])
+        self.output_path = filedialog.asksaveasfilename(defaultextension=".avi", filetypes=[("AVI files", "*.avi"), ("MP4 files", "*.mp4"), ("MKV files", "*.mkv")])
         if self.output_path:
             self._log(f"Output set: {os.path.basename(self.output_path)}")
             self._check_ready()
@@ -354,234 +513,140 @@ class DelusionalMotionVideoBlobEditorApp:
 
     def _start_processing(self):
         self.running = True
+        # The worker only drops its latest frame in the mailbox; the Tk loop pulls it at the preview rate
+        self.preview_mailbox = PreviewMailbox()
+        cache = AnalysisCache() if self.cache_enabled.get() else None
+        # Track data goes next to the output video, e.g. output.tracks/
+        export_tracks = os.path.splitext(self.output_path)[0] + ".tracks" if self.export_tracks.get() else None
+        # Checkpoints go next to the output video too; rerunning the same job resumes from them
+        checkpoint = Checkpoint(self.output_path + ".ckpt") if self.resumable.get() else None
+        self.pipeline = BlobPipeline(
+            self._settings(), progress_every=1, profile=self.profile_enabled.get(), cache=cache, export_tracks=export_tracks,
+            checkpoint=checkpoint,
+        )
+        self.pipeline.on_progress = self.preview_mailbox.put
         self.process_button.config(state=tk.DISABLED, text="Blobbing...")
         self._log("Initiating blob domination...")
         threading.Thread(target=self._process_video, daemon=True).start()
-
-    def _track_motion(self, frame):
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        gray = cv2.equalizeHist(gray)
-        if self.prev_gray is None:
-            self.prev_gray = gray
-            return []
-
-        flow = cv2.calcOpticalFlowFarneback(self.prev_gray, gray, None, 0.5, 3, 10, 3, 5, 1.1, 0)
-        magnitude, _ = cv2.cartToPolar(flow[..., 0], flow[..., 1])
-        motion_mask = cv2.threshold(magnitude, self.motion_threshold.get(), 255, cv2.THRESH_BINARY)[1].astype(np.uint8)
-        motion_mask = cv2.dilate(motion_mask, np.ones((5, 5), np.uint8), iterations=1)
-
-        masked_gray = cv2.bitwise_and(gray, gray, mask=motion_mask)
-        masked_gray = cv2.GaussianBlur(masked_gray, (5, 5), 0)
-        keypoints = self.blob_detector.detect(masked_gray)
-        blob_objects = []
-        for kp in keypoints:
-            cx, cy = int(kp.pt[0]), int(kp.pt[1])
-            size = kp.size * self.blob_size_scale.get()
-            area = np.pi * (size / 2) ** 2
-            blob_objects.append((cx, cy, size, area, None))
-
-        self.prev_gray = gray
-        return blob_objects
-
-    def _assign_objects(self, tracked_objects):
-        current_objects = {}
-        for cx, cy, size, area, obj_id in tracked_objects:
-            key = obj_id if obj_id is not None else (cx, cy)
-            current_objects[key] = (cx, cy, size, area)
-
-        updated_objects = {}
-        for key, (cx, cy, size, area) in current_objects.items():
-            matched = False
-            if key in self.objects:
-                prev_cx, prev_cy = self.objects[key]["center"]
-                dist = ((cx - prev_cx) ** 2 + (cy - prev_cy) ** 2) ** 0.5
-                new_cx = int(cx * 0.5 + prev_cx * 0.5)
-                new_cy = int(cy * 0.5 + prev_cy * 0.5)
-                new_size = size * 0.6 + self.objects[key]["size"] * 0.4
-                updated_objects[key] = {
-                    "center": (new_cx, new_cy),
-                    "size": new_size,
-                    "area": area,
-                    "age": min(self.objects[key]["age"] + 1, 50),
-                    "activity": min(self.objects[key]["activity"] + dist * 0.3, 200),
-                    "is_yolo": False,
-                }
-                matched = True
-            elif isinstance(key, tuple):
-                for oid, data in self.objects.items():
-                    prev_cx, prev_cy = data["center"]
-                    dist = ((cx - prev_cx) ** 2 + (cy - prev_cy) ** 2) ** 0.5
-                    if dist < 50 + size * 0.2:
-                        new_cx = int(cx * 0.5 + prev_cx * 0.5)
-                        new_cy = int(cy * 0.5 + prev_cy * 0.5)
-                        new_size = size * 0.6 + data["size"] * 0.4
-                        updated_objects[oid] = {
-                            "center": (new_cx, new_cy),
-                            "size": new_size,
-                            "area": area,
-                            "age": min(data["age"] + 1, 50),
-                            "activity": min(data["activity"] + dist * 0.3, 200),
-                            "is_yolo": False,
-                        }
-                        matched = True
-                        break
-            if not matched:
-                self.object_id += 1
-                updated_objects[self.object_id] = {
-                    "center": (cx, cy),
-                    "size": size,
-                    "area": area,
-                    "age": 0,
-                    "activity": 0,
-                    "is_yolo": False,
-                }
-
-        self.objects = {
-            oid: data for oid, data in updated_objects.items()
-            if data["age"] < 50 or data["activity"] > 5
-        }
-
-    def _draw_elements(self, frame):
-        self.trail_buffer.append(frame.copy())
-        if len(self.trail_buffer) > 5:
-            self.trail_buffer.pop(0)
-        trail_frame = np.zeros_like(frame)
-        for i, past_frame in enumerate(self.trail_buffer):
-            alpha = self.trail_opacity.get() * (i + 1) / len(self.trail_buffer)
-            trail_frame = cv2.addWeighted(trail_frame, 1 - alpha, past_frame, alpha, 0)
-
-        centers = [(data["center"], oid) for oid, data in self.objects.items()]
-        for i, (center1, id1) in enumerate(centers):
-            for j, (center2, id2) in enumerate(centers[i + 1:], start=i + 1):
-                dist = ((center1[0] - center2[0]) ** 2 + (center1[1] - center2[1]) ** 2) ** 0.5
-                if dist < self.max_connection_distance.get():
-                    cv2.line(frame, center1, center2, self.GRAY, 1)
-                    cv2.line(
-                        frame,
-                        (center1[0] + 1, center1[1] + 1),
-                        (center2[0] + 1, center2[1] + 1),
-                        self.WHITE,
-                        1,
-                    )
-        for obj_id, data in self.objects.items():
-            cx, cy = data["center"]
-            size = data["size"]
-            radius = int(size / 2)
-            cv2.circle(
-                frame,
-                (cx + self.shadow_offset, cy + self.shadow_offset),
-                radius,
-                self.GRAY,
-                2,
-            )
-            cv2.circle(frame, (cx, cy), radius, self.WHITE, 2)
-            text = f"#{obj_id}"
-            text_size, _ = cv2.getTextSize(text, self.font, self.font_scale, 1)
-            tx, ty = int(cx + size / 2 + 5), int(cy)
-            cv2.rectangle(
-                frame,
-                (tx - 3, ty - text_size[1] - 3),
-                (tx + text_size[0] + 3, ty + 3),
-                self.BLACK,
-                -1,
-            )
-            cv2.putText(
-                frame,
-                text,
-                (tx + 1, ty + 1),
-                self.font,
-                self.font_scale,
-                self.GRAY,
-                1,
-            )
-            cv2.putText(
-                frame,
-                text,
-                (tx, ty),
-                self.font,
-                self.font_scale,
-                self.WHITE,
-                1,
-            )
-
-        frame = cv2.addWeighted(frame, 0.7, trail_frame, 0.3, 0)
-        status = f"Blobs: {len(self.objects)} | Frame: {self.frame_count}/{self.total_frames}"
-        text_size, _ = cv2.getTextSize(status, self.font, self.font_scale, 1)
-        cv2.rectangle(
-            frame,
-            (5, 5),
-            (15 + text_size[0], 15 + text_size[1]),
-            self.BLACK,
-            -1,
-        )
-        cv2.putText(
-            frame,
-            status,
-            (10, 10 + text_size[1]),
-            self.font,
-            self.font_scale,
-            self.WHITE,
-            1,
-        )
-        return frame
-
-    def _process_frame(self, frame):
-        self.frame_count += 1
-        tracked_objects = self._track_motion(frame)
-        self._assign_objects(tracked_objects)
-        return self._draw_elements(frame)
+        self._poll_preview()
+
+    def _poll_preview(self):
+        latest = self.preview_mailbox.take()
+        if latest:
+            frame_count, total_frames, frame = latest
+            if self.preview_enabled.get():
+                self._update_preview(frame)
+            progress = (frame_count / total_frames) * 100 if total_frames else 0
+            self.progress.set(progress)
+            self.progress_label.config(text=f"Progress: {progress:.1f}% | Frame: {frame_count}/{total_frames}")
+        if self.running:
+            self.root.after(max(1, 1000 // max(1, self.preview_fps.get())), self._poll_preview)
+
+    def _finish_processing(self):
+        self.running = False
+        self._poll_preview()
+        self.process_button.config(state=tk.NORMAL, text="Unleash Blobs!")
 
     def _process_video(self):
         try:
-            self.video = cv2.VideoCapture(self.input_path)
-            if not self.video.isOpened():
-                raise Exception("Failed to open video")
-            self.frame_width = int(self.video.get(cv2.CAP_PROP_FRAME_WIDTH))
-            self.frame_height = int(self.video.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            self.fps = self.video.get(cv2.CAP_PROP_FPS)
-            self.total_frames = int(self.video.get(cv2.CAP_PROP_FRAME_COUNT))
-
-            if self.output_resolution.get() == "Match Input":
-                w, h = self.frame_width, self.frame_height
+            self.pipeline.run(self.input_path, self.output_path)
+            self.root.after(0, self._log, "Blob domination complete!")
+            if self.pipeline.resumed_at:
+                self.root.after(0, self._log, f"Resumed from checkpoint after {self.pipeline.resumed_at} frames")
+            if self.pipeline.cache_hit:
+                self.root.after(0, self._log, "Motion analysis reused from cache")
             else:
-                w, h = map(int, self.output_resolution.get().split("x"))
-            fourcc = cv2.VideoWriter_fourcc(*"XVID")
-            self.writer = cv2.VideoWriter(self.output_path, fourcc, self.fps, (w, h))
-            if not self.writer.isOpened():
-                raise Exception("Failed to initialize video writer")
-
-            while self.running:
-                ret, frame = self.video.read()
-                if not ret:
-                    break
-                processed_frame = self._process_frame(frame)
-                if (w, h) != (self.frame_width, self.frame_height):
-                    processed_frame = cv2.resize(processed_frame, (w, h), interpolation=cv2.INTER_LANCZOS4)
-                self.writer.write(processed_frame)
-                if self.frame_count % 10 == 0:
-                    self._update_preview(processed_frame)
-                    progress = (self.frame_count / self.total_frames) * 100
-                    self.progress.set(progress)
-                    self.progress_label.config(text=f"Progress: {progress:.1f}% | Frame: {self.frame_count}/{self.total_frames}")
-                    self.root.update()
-
-            self._log("Blob domination complete!")
+                self.root.after(0, self._log, f"Motion backend {self.pipeline.engine.motion.describe()}")
+                gate = self.pipeline.engine.describe_gate()
+                if gate:
+                    self.root.after(0, self._log, gate)
+            if self.pipeline.profiler:
+                trace_path = os.path.splitext(self.output_path)[0] + ".profile.csv"
+                self.pipeline.profiler.write(trace_path)
+                self.root.after(0, self._log, self.pipeline.profiler.describe())
+                self.root.after(0, self._log, f"Profile trace saved to: {os.path.basename(trace_path)}")
+            if self.pipeline.export_tracks:
+                self.root.after(0, self._log, f"Track data saved to: {os.path.basename(self.pipeline.export_tracks)}")
             self.root.after(0, lambda: messagebox.showinfo("Success", f"Video saved to: {self.output_path}"))
         except Exception as e:
-            self._log(f"Error: {str(e)}")
-            self.root.after(0, lambda: messagebox.showerror("Error", str(e)))
+            error = str(e)
+            self.root.after(0, self._log, f"Error: {error}")
+            self.root.after(0, lambda: messagebox.showerror("Error", error))
         finally:
-            self._cleanup()
-            self.root.after(0, lambda: self.process_button.config(state=tk.NORMAL, text="Unleash Blobs!"))
-            self.running = False
+            self.root.after(0, self._finish_processing)
+
+    def _add_to_queue(self):
+        if not (self.input_path and self.output_path):
+            messagebox.showwarning("Queue", "Load a video and choose where to save it first.")
+            return
+        job = self.job_queue.add(self.input_path, self.output_path, self._settings())
+        name = os.path.basename(self.input_path)
+        if job["status"] != "pending":
+            # Running (with any settings) or done with these settings; add() leaves it alone
+            if job["status"] == "running":
+                self._log(f"Not queued: {name} is running; add it again once it is done")
+            else:
+                self._log(f"Not queued: {name} is already {job['status']} with these settings")
+            return
+        self._log(f"Queued: {name} ({len(self.job_queue.pending())} pending)")
+
+    def _queue_folder(self):
+        directory = filedialog.askdirectory(title="Queue every video in")
+        if not directory:
+            return
+        # Renders go to a blobs/ folder inside it, as <video>_blobs.avi
+        jobs = self.job_queue.add_directory(directory, os.path.join(directory, "blobs"), self._settings())
+        queued = sum(job["status"] == "pending" for job in jobs)
+        self._log(
+            f"Queued {queued} of {len(jobs)} videos from {os.path.basename(directory)} ({len(self.job_queue.pending())} pending)"
+        )
+
+    def _toggle_queue(self):
+        if self.batch_runner and self.batch_runner.running:
+            self.batch_runner.stop()
+            self.queue_button.config(state=tk.DISABLED, text="Stopping...")
+            self._log("Queue will stop once the running jobs finish")
+            return
+        self.job_queue.retry_failed()
+        pending = len(self.job_queue.pending())
+        if not pending:
+            self._log("Queue is empty")
+            return
+        self.batch_runner = BatchRunner(self.job_queue)
+        # Callbacks arrive on the queue thread; the Tk loop does the drawing
+        self.batch_runner.on_progress = lambda *args: self.root.after(0, self._show_job_progress, *args)
+        self.batch_runner.on_job_done = lambda job: self.root.after(0, self._log_job, dict(job))
+        self.queue_button.config(text="Stop Queue")
+        self._log(f"Running {pending} queued jobs, up to {self.batch_runner.workers} at once")
+        threading.Thread(target=self._run_queue, daemon=True).start()
+
+    def _show_job_progress(self, job, frame_count, total_frames, fps):
+        progress = (frame_count / total_frames) * 100 if total_frames else 0
+        self.progress.set(progress)
+        self.progress_label.config(text=f"{os.path.basename(job['input'])}: {progress:.1f}% | {fps:.1f} fps")
+
+    def _log_job(self, job):
+        name = os.path.basename(job["input"])
+        if job["status"] == "done":
+            self._log(f"Job done: {name}, {job['frames']} frames at {job['fps']:.1f} fps")
+        else:
+            retry = ", retrying" if job["status"] == "pending" else ""
+            self._log(f"Job failed{retry}: {name}: {job['error']}")
 
-    def _cleanup(self):
-        if self.video and self.video.isOpened():
-            self.video.release()
-        if self.writer:
-            self.writer.release()
+    def _run_queue(self):
+        runner = self.batch_runner
+        try:
+            runner.run()
+            report_path = os.path.join(os.path.dirname(self.job_queue.path), "batch-report.csv")
+            runner.write_report(report_path)
+            self.root.after(0, self._log, runner.describe())
+            self.root.after(0, self._log, f"Queue report saved to: {report_path}")
+        except Exception as e:
+            self.root.after(0, self._log, f"Queue error: {e}")
+        finally:
+            self.root.after(0, lambda: self.queue_button.config(state=tk.NORMAL, text="Run Queue"))
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = DelusionalMotionVideoBlobEditorApp(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
\ No newline at end of file
@@ -0,0 +1,11 @@
+from .chunked import ChunkedPipeline
+from .detect import BLOB_DETECTORS
+from .engine import BlobEngine
+from .live import LivePipeline
+from .motion import MOTION_BACKENDS, MotionBackend
+from .pipeline import BlobPipeline
+from .settings import OUTPUT_RESOLUTIONS, BlobSettings
+from .sweep import SweepPipeline
+from .trails import TRAIL_MODES
+
+__all__ = ["BlobEngine", "BlobPipeline", "ChunkedPipeline", "SweepPipeline", "LivePipeline", "MotionBackend", "MOTION_BACKENDS", "BLOB_DETECTORS", "TRAIL_MODES", "BlobSettings", "OUTPUT_RESOLUTIONS"]
@@ -0,0 +1,334 @@
+import csv
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import cv2
+
+from .cache import default_cache_dir
+from .checkpoint import Checkpoint
+from .pipeline import BlobPipeline
+from .settings import BlobSettings
+
+# Inputs picked up from a directory, as in the GUI's file dialog
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+REPORT_COLUMNS = ("input", "output", "status", "attempts", "frames", "seconds", "fps", "memory_mb", "error")
+
+
+def default_queue_path():
+    return os.path.join(default_cache_dir(), "queue.json")
+
+
+def available_memory_mb():
+    # Memory that can be used without swapping; None where the platform does not say
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def estimate_job_mb(width, height, settings, queue_size=8):
+    # Rough peak RSS of one BlobPipeline: source and output frames in flight on the stage
+    # queues and in the trail, the analysis planes and flow fields, plus Python and OpenCV
+    frame_mb = width * height * 3 / 2 ** 20
+    out_width, out_height = settings.output_size(width, height)
+    output_mb = out_width * out_height * 3 / 2 ** 20
+    gray_mb = frame_mb / 3 * settings.analysis_scale ** 2
+    return 150 + frame_mb * (2 * queue_size + 4) + output_mb * (queue_size + settings.trail_length + 2) + gray_mb * 24
+
+
+def _probe(path):
+    video = cv2.VideoCapture(path)
+    try:
+        if not video.isOpened():
+            return 0, 0, 0
+        return (
+            int(video.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            int(video.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            int(video.get(cv2.CAP_PROP_FRAME_COUNT)),
+        )
+    finally:
+        video.release()
+
+
+class JobQueue:
+    # Render jobs (input, output, settings) kept in a JSON file, so a queue survives
+    # restarts and can be filled from the GUI, a directory or a manifest. The file is
+    # rewritten atomically on every change; jobs found running on load were interrupted
+    # and are queued again.
+    def __init__(self, path=None):
+        self.path = path or default_queue_path()
+        self.jobs = []
+        self.lock = threading.Lock()
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.jobs = json.load(f)["jobs"]
+            for job in self.jobs:
+                if job["status"] == "running":
+                    job["status"] = "pending"
+
+    def save(self):
+        with self.lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            temp_path = f"{self.path}.tmp-{os.getpid()}"
+            with open(temp_path, "w") as f:
+                json.dump({"jobs": self.jobs}, f, indent=1)
+            os.replace(temp_path, self.path)
+
+    def add(self, input_path, output_path, settings=None):
+        # A job is its input and output; adding it again with other settings queues it again,
+        # except while it runs: resetting it then would dispatch it a second time
+        input_path, output_path = os.path.abspath(input_path), os.path.abspath(output_path)
+        # Round-tripped so tuples (rois) compare equal to what was loaded from the file
+        values = json.loads(json.dumps((settings or BlobSettings()).to_dict()))
+        with self.lock:
+            job = next((j for j in self.jobs if j["input"] == input_path and j["output"] == output_path), None)
+            if job is None:
+                job = {"id": max((j["id"] for j in self.jobs), default=0) + 1, "input": input_path, "output": output_path}
+                self.jobs.append(job)
+            elif job["status"] == "running" or (job["settings"] == values and job["status"] != "failed"):
+                return job
+            job.update(settings=values, status="pending", attempts=0, frames=0, total_frames=0, seconds=0.0, fps=0.0, error="")
+            job.pop("memory_mb", None)  # estimated again for the new settings
+        self.save()
+        return job
+
+    def add_directory(self, directory, output_dir, settings=None, suffix="_blobs", extension=".avi"):
+        jobs = []
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            stem, ext = os.path.splitext(name)
+            if os.path.isfile(path) and ext.lower() in VIDEO_EXTENSIONS:
+                jobs.append(self.add(path, os.path.join(output_dir, stem + suffix + extension), settings))
+        return jobs
+
+    def add_manifest(self, path, output_dir, settings=None, suffix="_blobs", extension=".avi"):
+        # JSON list (or {"jobs": [...]}, e.g. another queue file) of {"input", "output",
+        # "settings"}; output defaults to output_dir/<stem><suffix><extension>, settings
+        # override the given ones, and relative paths are taken from the manifest's directory
+        with open(path) as f:
+            entries = json.load(f)
+        if isinstance(entries, dict):
+            entries = entries["jobs"]
+        base = os.path.dirname(os.path.abspath(path))
+        defaults = (settings or BlobSettings()).to_dict()
+        jobs = []
+        for entry in entries:
+            if isinstance(entry, str):
+                entry = {"input": entry}
+            input_path = os.path.join(base, entry["input"])
+            stem = os.path.splitext(os.path.basename(input_path))[0]
+            output_path = os.path.join(base, entry["output"]) if entry.get("output") else os.path.join(output_dir, stem + suffix + extension)
+            job_settings = BlobSettings.from_dict({**defaults, **entry.get("settings", {})})
+            jobs.append(self.add(input_path, output_path, job_settings))
+        return jobs
+
+    def pending(self):
+        return [job for job in self.jobs if job["status"] == "pending"]
+
+    def retry_failed(self):
+        for job in self.jobs:
+            if job["status"] == "failed":
+                job.update(status="pending", attempts=0, error="")
+        self.save()
+
+
+def _init_worker(events, threads):
+    # Each job gets its share of the cores: OpenCV's thread pool is sized to it, and with a
+    # single core the pipeline runs serially instead of on four stage threads
+    global _events, _staged
+    _events = events
+    _staged = threads > 1
+    cv2.setNumThreads(threads)
+
+
+def _run_job(job_id, input_path, output_path, values, checkpoint_every, progress_every):
+    # Runs in a pool process; progress goes back over the events queue
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    checkpoint = Checkpoint(f"{output_path}.ckpt", checkpoint_every) if checkpoint_every else None
+    pipeline = BlobPipeline(BlobSettings.from_dict(values), progress_every=progress_every, staged=_staged, checkpoint=checkpoint)
+    start = time.perf_counter()
+    pipeline.on_progress = lambda written, total, frame: _events.put((job_id, written, total, time.perf_counter() - start))
+    frames = pipeline.run(input_path, output_path)
+    # A job resumed from a checkpoint only timed the frames after it
+    return frames, frames - pipeline.resumed_at, time.perf_counter() - start
+
+
+class BatchRunner:
+    # Runs the pending jobs of a JobQueue on a process pool. At most `workers` jobs run at
+    # once (default: one per core), and a job only starts while the estimated memory of
+    # the running jobs stays within memory_mb (default: 80% of the memory available at
+    # start); a job that fits nowhere still runs alone. Failed jobs are retried up to
+    # `retries` times, resuming from their last checkpoint when checkpoint_every is set.
+    def __init__(self, queue, workers=0, memory_mb=0, retries=1, checkpoint_every=0, progress_every=25):
+        self.queue = queue
+        self.workers = workers or os.cpu_count() or 1
+        self.memory_mb = memory_mb
+        self.retries = retries
+        self.checkpoint_every = checkpoint_every
+        self.progress_every = progress_every
+        self.on_progress = None  # callback(job, frames_written, total_frames, fps)
+        self.on_job_done = None  # callback(job) once a job is done, failed or queued for a retry
+        self.running = False
+        self.finished = []
+        self.elapsed = 0.0
+
+    def stop(self):
+        # No new jobs are started; running ones finish
+        self.running = False
+
+    def _pool(self, events):
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        return ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(events, threads))
+
+    def _budget(self):
+        if self.memory_mb:
+            return self.memory_mb
+        available = available_memory_mb()
+        return available * 0.8 if available else None
+
+    @staticmethod
+    def _estimate(job):
+        if "memory_mb" not in job:
+            width, height, total_frames = _probe(job["input"])
+            job["memory_mb"] = round(estimate_job_mb(width, height, BlobSettings.from_dict(job["settings"])))
+            job["total_frames"] = total_frames
+        return job["memory_mb"]
+
+    def _start(self, pool, job):
+        job["status"] = "running"
+        job["attempts"] += 1
+        self.queue.save()
+        return pool.submit(
+            _run_job, job["id"], job["input"], job["output"], job["settings"], self.checkpoint_every, self.progress_every
+        )
+
+    def _admit(self, running, budget):
+        # Pending jobs that fit next to the running ones, in queue order; smaller jobs
+        # further down may start while a large one waits for memory
+        used = sum(job["memory_mb"] for job in running.values())
+        for job in self.queue.pending():
+            if len(running) >= self.workers:
+                return
+            memory = self._estimate(job)
+            if running and budget and used + memory > budget:
+                continue
+            yield job
+            used += memory
+
+    def _drain(self, events, jobs):
+        while True:
+            try:
+                job_id, written, total, elapsed = events.get_nowait()
+            except queue.Empty:
+                return
+            job = jobs.get(job_id)
+            if job is None:
+                continue
+            job["frames"], job["total_frames"] = written, total or job["total_frames"]
+            if self.on_progress:
+                self.on_progress(job, written, job["total_frames"], written / elapsed if elapsed > 0 else 0.0)
+
+    def _collect(self, future, job):
+        try:
+            frames, timed, seconds = future.result()
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                e = "worker process died (out of memory?)"
+            job["error"] = str(e)
+            job["status"] = "pending" if job["attempts"] <= self.retries else "failed"
+        else:
+            job.update(status="done", frames=frames, seconds=round(seconds, 3), fps=round(timed / seconds, 2) if seconds > 0 else 0.0, error="")
+        if job["status"] != "pending":
+            self.finished.append(job)
+        self.queue.save()
+        if self.on_job_done:
+            self.on_job_done(job)
+
+    def run(self):
+        self.running = True
+        self.finished = []
+        budget = self._budget()
+        started = time.perf_counter()
+        events = multiprocessing.Queue()
+        running = {}  # future -> job
+        pool = self._pool(events)
+        try:
+            while True:
+                if self.running:
+                    for job in self._admit(running, budget):
+                        running[self._start(pool, job)] = job
+                if not running:
+                    break
+                done, _ = wait(running, timeout=0.2, return_when=FIRST_COMPLETED)
+                self._drain(events, {job["id"]: job for job in running.values()})
+                broken = False
+                for future in done:
+                    broken = broken or isinstance(future.exception(), BrokenProcessPool)
+                    self._collect(future, running.pop(future))
+                if broken:
+                    # A dead worker takes the whole pool down with every job on it
+                    for future in wait(running).done:
+                        self._collect(future, running.pop(future))
+                    pool.shutdown(wait=False)
+                    pool = self._pool(events)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            for job in running.values():
+                if job["status"] == "running":
+                    job["status"] = "pending"
+            self.queue.save()
+            self.elapsed = time.perf_counter() - started
+            self.running = False
+        return self.finished
+
+    def summary(self):
+        done = [job for job in self.finished if job["status"] == "done"]
+        frames = sum(job["frames"] for job in done)
+        return {
+            "jobs": len(self.finished),
+            "done": len(done),
+            "failed": len(self.finished) - len(done),
+            "frames": frames,
+            "seconds": self.elapsed,
+            "fps": frames / self.elapsed if self.elapsed > 0 else 0.0,
+            "workers": self.workers,
+        }
+
+    def describe(self):
+        lines = [f"{'job':<32} {'status':<7} {'frames':>7} {'seconds':>8} {'fps':>7} {'tries':>5} {'est MB':>7}"]
+        for job in self.finished:
+            name = os.path.basename(job["input"])[:32]
+            lines.append(
+                f"{name:<32} {job['status']:<7} {job['frames']:>7} {job['seconds']:>8.1f} {job['fps']:>7.1f} {job['attempts']:>5} {job.get('memory_mb', 0):>7}"
+            )
+        s = self.summary()
+        lines.append(
+            f"{s['done']} done, {s['failed']} failed: {s['frames']} frames in {s['seconds']:.1f}s "
+            f"({s['fps']:.1f} fps aggregate, {s['workers']} workers)"
+        )
+        return "\n".join(lines)
+
+    def write_report(self, path):
+        # Per-job results of this run; format follows the extension, like StageProfiler.write
+        rows = [{name: job.get(name, "") for name in REPORT_COLUMNS} for job in self.finished]
+        if path.lower().endswith(".json"):
+            with open(path, "w") as f:
+                json.dump({"jobs": rows, "summary": self.summary()}, f, indent=1)
+        else:
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=REPORT_COLUMNS)
+                writer.writeheader()
+                writer.writerows(rows)
@@ -0,0 +1,19 @@
+import numpy as np
+
+
+class BufferPool:
+    # Named scratch arrays for OpenCV dst= arguments. A buffer is allocated the first time
+    # it is asked for and reused while its shape and dtype stay the same, so after the first
+    # frame the per-frame loop allocates nothing. Contents survive until the next get().
+    def __init__(self):
+        self.buffers = {}
+
+    def get(self, name, shape, dtype=np.uint8):
+        buffer = self.buffers.get(name)
+        if buffer is None or buffer.shape != tuple(shape) or buffer.dtype != dtype:
+            buffer = self.buffers[name] = np.empty(shape, dtype)
+        return buffer
+
+    @property
+    def nbytes(self):
+        return sum(buffer.nbytes for buffer in self.buffers.values())
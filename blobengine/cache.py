@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+from .engine import STATIC_FRAME
+
+# Settings that change what _track_motion detects; everything else (blob size scale, trail,
+# connection distance, resolution...) is applied after it and can reuse a cached analysis
+MOTION_SETTINGS = (
+    "motion_backend", "motion_scale", "flow_tiles", "flow_warm_start", "motion_threshold", "motion_gate", "blob_detector", "min_area", "analysis_scale",
+    "start_time", "end_time", "rois", "roi_mask", "decoder",
+)
+
+
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "blobengine")
+
+
+class CachedAnalysis:
+    # Per-frame raw keypoints (x, y, size before blob_size_scale), memory-mapped from disk.
+    # Row ranges of frame i (1-based, like engine.frame_count) are offsets[i - 1]:offsets[i];
+    # static[i - 1] marks frames the motion gate skipped.
+    def __init__(self, path):
+        self.keypoints = np.load(os.path.join(path, "keypoints.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"))
+        self.static = np.load(os.path.join(path, "static.npy"))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def frame(self, frame_count):
+        if not 0 < frame_count <= len(self):
+            return None
+        if self.static[frame_count - 1]:
+            return STATIC_FRAME
+        return np.array(self.keypoints[self.offsets[frame_count - 1]:self.offsets[frame_count]])
+
+
+class AnalysisCache:
+    # Directory of analyses keyed by input file and motion settings, evicted least recently
+    # used first once the total size passes max_bytes
+    def __init__(self, directory=None, max_bytes=1 << 30):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(input_path, settings):
+        stat = os.stat(input_path)
+        identity = {
+            "path": os.path.realpath(input_path),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "roi_mask_stamp": settings.roi_mask_stamp(),
+            **{name: getattr(settings, name) for name in MOTION_SETTINGS},
+        }
+        return hashlib.sha1(json.dumps(identity, sort_keys=True).encode()).hexdigest()
+
+    def load(self, key):
+        path = os.path.join(self.directory, key)
+        try:
+            analysis = CachedAnalysis(path)
+        except (OSError, ValueError):
+            return None
+        os.utime(path)  # mark as recently used
+        return analysis
+
+    def store(self, key, frames):
+        # frames: one (M, 3) keypoint array per frame, in order
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, key)
+        temp_path = f"{path}.tmp-{os.getpid()}"
+        os.makedirs(temp_path, exist_ok=True)
+        try:
+            counts = [len(keypoints) for keypoints in frames]
+            offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+            keypoints = np.concatenate([np.asarray(k, np.float64).reshape(-1, 3) for k in frames] or [np.empty((0, 3))])
+            np.save(os.path.join(temp_path, "keypoints.npy"), keypoints)
+            np.save(os.path.join(temp_path, "offsets.npy"), offsets)
+            np.save(os.path.join(temp_path, "static.npy"), np.array([k is STATIC_FRAME for k in frames], bool))
+            if os.path.exists(path):
+                shutil.rmtree(path)
+            os.replace(temp_path, path)
+        finally:
+            shutil.rmtree(temp_path, ignore_errors=True)
+        self.evict()
+
+    def entries(self):
+        # (mtime, size, path) of every complete entry
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if ".tmp-" in name or not os.path.isdir(path):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+            entries.append((os.path.getmtime(path), size, path))
+        return entries
+
+    def evict(self):
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            shutil.rmtree(path, ignore_errors=True)
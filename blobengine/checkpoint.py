@@ -0,0 +1,80 @@
+import os
+import pickle
+
+# Motion state that cannot be restored, so a resumed run could not match an uninterrupted one
+_STATEFUL_BACKENDS = ("mog2",)
+
+
+def check_resumable(settings):
+    if settings.motion_backend in _STATEFUL_BACKENDS or settings.flow_warm_start:
+        raise ValueError("Checkpoints need a stateless motion setup (not mog2, not flow warm start)")
+
+
+class Checkpoint:
+    # Directory with the finished output segments of a long render and the pipeline state
+    # after the last of them (frame position, tracker, trail, previous gray frame), saved
+    # every `every` output frames. A later run with the same input, output format and
+    # settings resumes from it; the segments are stream-copied into the output at the end.
+    def __init__(self, directory, every=1000):
+        self.directory = directory
+        self.every = max(1, int(every))
+
+    @staticmethod
+    def identity(input_path, output_path, settings, every):
+        stat = os.stat(input_path)
+        return {
+            "path": os.path.realpath(input_path),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "extension": os.path.splitext(output_path)[1].lower(),
+            "every": every,
+            "settings": settings.to_dict(),
+            "roi_mask_stamp": settings.roi_mask_stamp(),
+        }
+
+    @property
+    def state_path(self):
+        return os.path.join(self.directory, "state.pkl")
+
+    def segment_path(self, index, extension):
+        return os.path.join(self.directory, f"segment_{index:05d}{extension}")
+
+    def _owned(self, name):
+        # Files a checkpoint writes (segments.txt is the concat list); nothing else in the
+        # directory is ever removed
+        return name == "segments.txt" or name.startswith(("state.pkl", "segment_"))
+
+    def load(self, identity):
+        # The saved state if it belongs to this job; a checkpoint of another job is stale.
+        # A directory holding other files is refused rather than cleared.
+        if os.path.isdir(self.directory) and not os.path.exists(self.state_path):
+            foreign = [name for name in os.listdir(self.directory) if not self._owned(name)]
+            if foreign:
+                raise ValueError(f"Checkpoint directory {self.directory} is not empty and holds no checkpoint")
+        try:
+            with open(self.state_path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+            state = None
+        if state is not None and state.get("identity") == identity and all(map(os.path.exists, state["segments"])):
+            return state
+        self.clear()
+        return None
+
+    def save(self, state):
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f"{self.state_path}.tmp-{os.getpid()}"
+        with open(temp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self.state_path)
+
+    def clear(self):
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if self._owned(name):
+                os.remove(os.path.join(self.directory, name))
+        try:
+            os.rmdir(self.directory)
+        except OSError:  # other files were put there
+            pass
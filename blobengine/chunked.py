@@ -0,0 +1,220 @@
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+from .engine import BlobEngine
+from .settings import BlobSettings
+from .trackio import TrackReader, TrackWriter
+from .tracking import Tracks
+from .videoio import find_ffmpeg, open_reader, open_writer
+
+
+def _open_at(input_path, settings, frame_index):
+    video = open_reader(input_path, settings)
+    if frame_index and not video.set(cv2.CAP_PROP_POS_FRAMES, frame_index):
+        video.release()
+        raise RuntimeError("Input does not support seeking to a chunk start")
+    return video
+
+
+def _analyze_chunk(input_path, settings, warm_start, start, end, total_frames, tracks_path):
+    # Runs the tracker from warm_start so prev_gray and the objects converge before start,
+    # streaming one snapshot per output frame to tracks_path. Returns the tracker state on
+    # the frame before start, the last snapshot, the local ids in order of first
+    # appearance and the number of frames, so the parent never holds a whole chunk.
+    engine = BlobEngine(settings)
+    engine.total_frames = total_frames
+    engine.frame_count = warm_start
+    video = _open_at(input_path, settings, warm_start)
+    writer = TrackWriter(tracks_path)
+    boundary = None
+    tail = Tracks.empty()
+    ids = {}
+    frames = 0
+    try:
+        index = warm_start
+        while end is None or index < end:
+            ret, frame = video.read()
+            if not ret:
+                break
+            tracks, _ = engine.analyze_frame(frame)
+            if index >= start:
+                writer.append(index + 1, tracks)
+                ids.update(dict.fromkeys(tracks.ids.tolist()))
+                tail = tracks
+                frames += 1
+            elif index == start - 1:
+                boundary = tracks
+            index += 1
+    finally:
+        video.release()
+        writer.close()
+        engine.close()
+    return boundary, tail, list(ids), frames
+
+
+def _render_chunk(input_path, settings, start, frames, tracks_path, mapping, total_frames, fps, output_size, segment_path):
+    engine = BlobEngine(settings)
+    engine.total_frames = total_frames
+    warm_start = max(0, start - engine.trail.history)
+    video = _open_at(input_path, settings, warm_start)
+    try:
+        writer = open_writer(segment_path, fps, output_size, settings)
+    except Exception:
+        video.release()
+        raise
+    try:
+        # Refill the trail with the frames preceding the chunk
+        for _ in range(start - warm_start):
+            ret, frame = video.read()
+            if not ret:
+                break
+            engine.render_output(frame, Tracks.empty(), 0, output_size)
+
+        reader = TrackReader(tracks_path)
+        written = 0
+        for frame_count in range(start + 1, start + frames + 1):
+            ret, frame = video.read()
+            if not ret:
+                break
+            tracks = reader.at(frame_count)
+            tracks = tracks.with_ids([mapping[lid] for lid in tracks.ids.tolist()])
+            processed_frame = engine.render_output(frame, tracks, frame_count, output_size)
+            writer.write(processed_frame)
+            written += 1
+    finally:
+        video.release()
+        writer.release()
+        engine.close()
+    return written
+
+
+def match_boundary(previous, current):
+    # Greedy nearest-center matching between the previous chunk's final tracks and the
+    # warm-up tracks of the next chunk, gated like _assign_objects (50 + size * 0.2)
+    pairs = []
+    previous = list(zip(previous.ids.tolist(), previous.centers.tolist()))
+    for lid, (cx, cy), size in zip(current.ids.tolist(), current.centers.tolist(), current.sizes.tolist()):
+        for gid, (px, py) in previous:
+            dist = ((cx - px) ** 2 + (cy - py) ** 2) ** 0.5
+            if dist < 50 + size * 0.2:
+                pairs.append((dist, lid, gid))
+    pairs.sort()
+    mapping, used = {}, set()
+    for _, lid, gid in pairs:
+        if lid not in mapping and gid not in used:
+            mapping[lid] = gid
+            used.add(gid)
+    return mapping
+
+
+class ChunkedPipeline:
+    def __init__(self, settings=None, workers=None, chunks=None, warmup_frames=30):
+        self.settings = settings or BlobSettings()
+        self.workers = workers or os.cpu_count() or 1
+        self.chunks = chunks or self.workers
+        self.warmup_frames = warmup_frames
+        self.on_progress = None  # callback(frame_count, total_frames, frame); frame is None here
+        self.object_id = 0
+
+    def _probe(self, input_path):
+        video = open_reader(input_path, self.settings)
+        try:
+            frame_width = int(video.get(cv2.CAP_PROP_FRAME_WIDTH))
+            frame_height = int(video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            fps = video.get(cv2.CAP_PROP_FPS)
+            total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+        finally:
+            video.release()
+        return frame_width, frame_height, fps, total_frames
+
+    def _split(self, total_frames):
+        count = max(1, min(self.chunks, total_frames // max(1, self.warmup_frames) or 1))
+        bounds = [round(total_frames * i / count) for i in range(count + 1)]
+        ranges = []
+        for i in range(count):
+            end = None if i == count - 1 else bounds[i + 1]  # last chunk reads to EOF
+            ranges.append((bounds[i], end))
+        return ranges
+
+    def _remap(self, results):
+        # Maps each chunk's local ids into one global id space, continuing tracks across
+        # chunk boundaries where the warm-up overlap lets us match them
+        next_id = 0
+        previous_tail = Tracks.empty()
+        mappings = []
+        for boundary, tail, ids, frames in results:
+            mapping = match_boundary(previous_tail, boundary if boundary is not None else Tracks.empty())
+            for lid in ids:
+                if lid not in mapping:
+                    next_id += 1
+                    mapping[lid] = next_id
+            if frames:
+                previous_tail = tail.with_ids([mapping[lid] for lid in tail.ids.tolist()])
+            mappings.append(mapping)
+        self.object_id = next_id
+        return mappings
+
+    def _report(self, done, total_frames):
+        # Analysis and rendering each count as half of a frame's work
+        if self.on_progress:
+            self.on_progress(done // 2, total_frames, None)
+
+    def run(self, input_path, output_path):
+        # Segments must be joined by stream copy; re-encoding them would change the output
+        if not shutil.which("ffmpeg"):
+            raise RuntimeError("Chunked renders need ffmpeg on PATH to join their segments without re-encoding")
+        frame_width, frame_height, fps, total_frames = self._probe(input_path)
+        output_size = self.settings.output_size(frame_width, frame_height)
+        ranges = self._split(total_frames)
+        segment_dir = tempfile.mkdtemp(prefix="blobchunks-")
+        try:
+            # Track snapshots go to one .npz directory per chunk, written by the analysis
+            # worker and read back by the render worker
+            track_paths = [os.path.join(segment_dir, f"chunk{i:04d}.tracks") for i in range(len(ranges))]
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = [
+                    pool.submit(_analyze_chunk, input_path, self.settings, max(0, start - self.warmup_frames), start, end, total_frames, path)
+                    for (start, end), path in zip(ranges, track_paths)
+                ]
+                done = 0
+                for future in as_completed(futures):
+                    done += future.result()[3]
+                    self._report(done, total_frames)
+                results = [future.result() for future in futures]
+                mappings = self._remap(results)
+
+                # Segments use the output's container so they can be joined without re-encoding
+                extension = os.path.splitext(output_path)[1] or ".avi"
+                segments = [os.path.join(segment_dir, f"chunk{i:04d}{extension}") for i in range(len(ranges))]
+                futures = [
+                    pool.submit(
+                        _render_chunk, input_path, self.settings, start, result[3], tracks_path, mapping,
+                        total_frames, fps, output_size, path,
+                    )
+                    for (start, _), result, tracks_path, mapping, path in zip(ranges, results, track_paths, mappings, segments)
+                ]
+                rendered = 0
+                for future in as_completed(futures):
+                    rendered += future.result()
+                    self._report(done + rendered, total_frames)
+            concat_segments(segments, output_path)
+            return rendered
+        finally:
+            shutil.rmtree(segment_dir, ignore_errors=True)
+
+
+def concat_segments(segments, output_path):
+    # Stream copy, no re-encode
+    list_path = os.path.join(os.path.dirname(segments[0]), "segments.txt")
+    with open(list_path, "w") as f:
+        for path in segments:
+            f.write(f"file '{path}'\n")
+    subprocess.run(
+        [find_ffmpeg(), "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", output_path],
+        check=True,
+    )
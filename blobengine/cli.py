@@ -0,0 +1,266 @@
+import argparse
+import os
+import sys
+import time
+
+from .batch import BatchRunner, JobQueue
+from .cache import AnalysisCache, default_cache_dir
+from .checkpoint import Checkpoint
+from .chunked import ChunkedPipeline
+from .live import LivePipeline
+from .detect import BLOB_DETECTORS
+from .motion import MOTION_BACKENDS
+from .pipeline import BlobPipeline
+from .tracking import TRACKERS
+from .trails import TRAIL_MODES
+from .videoio import DECODERS, ENCODERS
+from .settings import OUTSIDE_RANGE, BlobSettings
+from .sweep import SweepPipeline, parse_grid, sweep_outputs
+
+
+def build_parser():
+    defaults = BlobSettings()
+    parser = argparse.ArgumentParser(
+        prog="blobengine",
+        description="Headless Delusional Blob Extreme Pro renderer.",
+    )
+    parser.add_argument("input", help='input video path; with --decoder ffmpeg also "-" for stdin or an image sequence like frames_%%04d.png; with --live a camera index, stream URL or file')
+    parser.add_argument("output", help="output video path; the container follows the extension for ffmpeg encoders")
+    parser.add_argument("--min-area", type=int, default=defaults.min_area, help="minimum blob area for detection")
+    parser.add_argument("--motion-threshold", type=float, default=defaults.motion_threshold, help="sensitivity to motion")
+    parser.add_argument("--blob-size-scale", type=float, default=defaults.blob_size_scale, help="scale the size of detected blobs")
+    parser.add_argument("--connection-distance", dest="max_connection_distance", type=int, default=defaults.max_connection_distance, help="max distance for blob connections")
+    parser.add_argument("--trail-opacity", type=float, default=defaults.trail_opacity, help="opacity of blob motion trails")
+    parser.add_argument("--trail-mode", choices=sorted(TRAIL_MODES), default=defaults.trail_mode, help="trail rendering: blend (original re-blend), window (ring buffer, constant cost) or decay (exponential fade)")
+    parser.add_argument("--trail-length", type=int, default=defaults.trail_length, help="number of frames in the trail")
+    parser.add_argument("--bitrate", type=int, default=defaults.bitrate, help="output video bitrate (kbps), used by the ffmpeg encoders")
+    parser.add_argument("--encoder", choices=list(ENCODERS), default=defaults.encoder, help="opencv (XVID, no rate control) or an ffmpeg encoder: mpeg4, h264, hevc")
+    parser.add_argument("--preset", dest="encoder_preset", default=defaults.encoder_preset, help="x264/x265 preset, e.g. ultrafast, veryfast, medium, slow")
+    parser.add_argument("--encoder-threads", type=int, default=defaults.encoder_threads, help="ffmpeg encoder threads (0 = encoder default)")
+    parser.add_argument("--decoder", choices=DECODERS, default=defaults.decoder, help="opencv or ffmpeg input decoding")
+    parser.add_argument("--resolution", dest="output_resolution", default=defaults.output_resolution, help='output resolution, "Match Input" or WIDTHxHEIGHT')
+    parser.add_argument("--analysis-scale", type=float, default=defaults.analysis_scale, help="run motion analysis and detection on a proxy this fraction of the source size")
+    parser.add_argument("--draw-at-output", action="store_true", default=defaults.draw_at_output, help="resize first and draw overlays once at the output resolution")
+    parser.add_argument("--motion-backend", choices=sorted(MOTION_BACKENDS), default=defaults.motion_backend, help="motion estimation backend")
+    parser.add_argument("--motion-scale", type=float, default=defaults.motion_scale, help="proxy scale for the farneback-proxy backend")
+    parser.add_argument("--flow-tiles", type=int, default=defaults.flow_tiles, help="split motion analysis into this many overlapping strips computed in parallel")
+    parser.add_argument("--flow-warm-start", action="store_true", default=defaults.flow_warm_start, help="seed each frame's optical flow with the previous frame's (helps large, steady motion; slightly different masks)")
+    parser.add_argument("--motion-gate", type=float, default=defaults.motion_gate, help="skip optical flow on frames where nothing changed by more than this many gray levels (0 = off)")
+    parser.add_argument("--blob-detector", choices=sorted(BLOB_DETECTORS), default=defaults.blob_detector, help="blob detector run on the motion mask")
+    parser.add_argument("--tracker", choices=sorted(TRACKERS), default=defaults.tracker, help="object tracker implementation")
+    parser.add_argument("--start", dest="start_time", type=float, default=defaults.start_time, help="first second of the input to process")
+    parser.add_argument("--end", dest="end_time", type=float, default=defaults.end_time, help="second of the input to stop processing at (0 = end of input)")
+    parser.add_argument("--outside-range", choices=OUTSIDE_RANGE, default=defaults.outside_range, help="frames outside --start/--end: skip them, or copy them to the output unprocessed")
+    parser.add_argument("--roi", dest="rois", type=_parse_roi, action="append", default=[], metavar="X,Y,W,H", help="only analyze motion inside this rectangle (repeatable)")
+    parser.add_argument("--roi-mask", default=defaults.roi_mask, help="only analyze motion where this grayscale image is non-zero")
+    parser.add_argument("--serial", action="store_true", help="run decode, analysis, drawing and encoding on one thread")
+    parser.add_argument("--queue-size", type=int, default=8, help="frames buffered between pipeline stages")
+    parser.add_argument("--workers", type=int, default=0, help="split the video into time chunks rendered by this many processes")
+    parser.add_argument("--chunks", type=int, default=0, help="number of time chunks (default: one per worker)")
+    parser.add_argument("--warmup-frames", type=int, default=30, help="frames each chunk analyzes before its first output frame")
+    parser.add_argument("--cache", action="store_true", help="reuse motion analysis from earlier runs with the same motion settings")
+    parser.add_argument("--cache-dir", help=f"analysis cache directory (implies --cache; default {default_cache_dir()})")
+    parser.add_argument("--cache-size", type=int, default=1024, help="analysis cache size cap in MB, least recently used entries are evicted")
+    parser.add_argument("--sweep", action="append", default=[], metavar="NAME=V1,V2,...", help="render every combination of these setting values in one decode/flow pass; output may be a template like out_{index}_{min_area}.avi")
+    parser.add_argument("--export-tracks", metavar="PATH", help="stream per-frame track data to PATH: a directory of .npz segments, or a .csv file")
+    parser.add_argument("--from-tracks", metavar="PATH", help="draw the tracks of an --export-tracks export instead of running motion analysis")
+    parser.add_argument("--checkpoint-every", type=int, default=0, metavar="N", help="write the output in N-frame segments and save the state after each, so an interrupted render resumes where it stopped when rerun")
+    parser.add_argument("--checkpoint-dir", help="checkpoint directory (default: OUTPUT.ckpt)")
+    parser.add_argument("--batch", action="store_true", help="queue every video in the input directory, or every entry of an input .json manifest, and render them on a process pool into the output directory")
+    parser.add_argument("--queue", help="batch: persistent job queue file (default: OUTPUT/blobqueue.json); finished jobs are skipped on rerun")
+    parser.add_argument("--jobs", type=int, default=0, help="batch: videos rendered at once (default: one per core)")
+    parser.add_argument("--memory-limit", type=int, default=0, metavar="MB", help="batch: only start a job while the estimated memory of running jobs stays under this (default: 80%% of available)")
+    parser.add_argument("--retries", type=int, default=1, help="batch: times a failed job is run again")
+    parser.add_argument("--live", action="store_true", help="process the input as a live source in real time, dropping frames and degrading analysis to stay within the latency budget")
+    parser.add_argument("--latency-budget", type=float, default=0.0, metavar="MS", help="live: per-frame budget from capture to output (default: one frame interval)")
+    parser.add_argument("--no-adapt", dest="adapt", action="store_false", help="live: never lower analysis scale or switch motion backend")
+    parser.add_argument("--segment-seconds", type=float, default=60.0, help="live: length of each output file (out_00000.avi, out_00001.avi, ...); dropped frames repeat the previous output frame so files play in real time")
+    parser.add_argument("--duration", type=float, default=0.0, help="live: stop after this many seconds (0 = until the source ends or Ctrl+C)")
+    parser.add_argument("--loop", action="store_true", help="live: replay a file source endlessly, paced at its frame rate")
+    parser.add_argument("--profile", metavar="TRACE", help="record per-stage timings and write a per-frame trace (.csv or .json)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print progress")
+    return parser
+
+
+def _parse_roi(value):
+    try:
+        x, y, w, h = (int(v) for v in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected X,Y,W,H, got {value!r}") from None
+    if w <= 0 or h <= 0:
+        raise argparse.ArgumentTypeError(f"empty region: {value!r}")
+    return x, y, w, h
+
+
+def settings_from_args(args):
+    return BlobSettings.from_dict(vars(args))
+
+
+def _print_progress(frame_count, total_frames, frame):
+    if total_frames:
+        progress = frame_count / total_frames * 100
+        print(f"\rProgress: {progress:.1f}% | Frame: {frame_count}/{total_frames}", end="", file=sys.stderr, flush=True)
+    else:
+        print(f"\rFrame: {frame_count}", end="", file=sys.stderr, flush=True)
+
+
+def _print_job_progress(job, frame_count, total_frames, fps):
+    name = os.path.basename(job["input"])
+    progress = f"{frame_count / total_frames:.0%}" if total_frames else f"{frame_count} frames"
+    print(f"\r{name}: {progress} at {fps:.1f} fps          ", end="", file=sys.stderr, flush=True)
+
+
+def _print_job_done(job):
+    name = os.path.basename(job["input"])
+    if job["status"] == "done":
+        print(f"\r{name}: done, {job['frames']} frames at {job['fps']:.1f} fps", file=sys.stderr)
+    else:
+        retry = " (will retry)" if job["status"] == "pending" else ""
+        print(f"\r{name}: failed{retry}: {job['error']}", file=sys.stderr)
+
+
+def _print_live_stats(stats):
+    level = ", ".join(f"{k}={v}" for k, v in stats["level_settings"].items())
+    print(
+        f"\rLive: {stats['fps']:.1f} fps | latency p50 {stats['latency_p50_ms']:.0f} ms p95 {stats['latency_p95_ms']:.0f} ms"
+        f" | dropped {stats['drop_rate']:.1%} | level {stats['level']} ({level})   ",
+        end="", file=sys.stderr, flush=True,
+    )
+
+
+def _run_batch(args, settings):
+    os.makedirs(args.output, exist_ok=True)
+    queue = JobQueue(args.queue or os.path.join(args.output, "blobqueue.json"))
+    try:
+        if os.path.isdir(args.input):
+            queue.add_directory(args.input, args.output, settings)
+        else:
+            queue.add_manifest(args.input, args.output, settings)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: cannot read {args.input}: {e}", file=sys.stderr)
+        return 1
+    queue.retry_failed()
+    runner = BatchRunner(queue, workers=args.jobs, memory_mb=args.memory_limit, retries=args.retries, checkpoint_every=args.checkpoint_every)
+    if not args.quiet:
+        runner.on_progress = _print_job_progress
+        runner.on_job_done = _print_job_done
+        print(f"{len(queue.pending())} jobs queued, {runner.workers} workers", file=sys.stderr)
+    try:
+        runner.run()
+    except KeyboardInterrupt:
+        print("\nInterrupted; rerun the same command to continue the queue.", file=sys.stderr)
+        return 130
+    report_path = os.path.join(args.output, "batch-report.csv")
+    runner.write_report(report_path)
+    if not args.quiet:
+        print(f"\n{runner.describe()}", file=sys.stderr)
+        print(f"Report saved to: {report_path}", file=sys.stderr)
+    return 1 if runner.summary()["failed"] else 0
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.live and (args.workers or args.sweep or args.profile or args.cache or args.cache_dir or args.export_tracks or args.from_tracks):
+        parser.error("--live cannot be combined with --workers, --sweep, --profile, --cache or track export/import")
+    if args.live and (args.start_time or args.end_time):
+        parser.error("--start/--end are not supported with --live")
+    if args.workers and (args.profile or args.cache or args.cache_dir or args.serial or args.queue_size != parser.get_default("queue_size")):
+        parser.error("--workers cannot be combined with --profile, --cache, --serial or --queue-size")
+    if args.sweep and (args.workers or args.profile or args.cache or args.cache_dir):
+        parser.error("--sweep cannot be combined with --workers, --profile or --cache")
+    if args.workers and (args.start_time or args.end_time):
+        parser.error("--start/--end are not supported with --workers")
+    if (args.export_tracks or args.from_tracks) and (args.workers or args.sweep):
+        parser.error("--export-tracks/--from-tracks cannot be combined with --workers or --sweep")
+    if args.batch and (args.live or args.workers or args.sweep or args.profile or args.export_tracks or args.from_tracks or args.checkpoint_dir):
+        parser.error("--batch cannot be combined with --live, --workers, --sweep, --profile, --checkpoint-dir or track export/import")
+    if args.batch:
+        return _run_batch(args, settings_from_args(args))
+    if (args.checkpoint_every or args.checkpoint_dir) and (args.workers or args.sweep or args.live or args.export_tracks):
+        parser.error("--checkpoint-every cannot be combined with --workers, --sweep, --live or --export-tracks")
+    settings = settings_from_args(args)
+    outputs = args.output
+    if args.live:
+        pipeline = LivePipeline(
+            settings, budget_ms=args.latency_budget, segment_seconds=args.segment_seconds, adapt=args.adapt,
+            loop=args.loop, duration=args.duration,
+        )
+    elif args.sweep:
+        try:
+            variants = parse_grid(args.sweep)
+        except ValueError as e:
+            parser.error(str(e))
+        outputs = sweep_outputs(args.output, variants, settings)
+        pipeline = SweepPipeline(settings, variants)
+    elif args.workers:
+        pipeline = ChunkedPipeline(settings, workers=args.workers, chunks=args.chunks or None, warmup_frames=args.warmup_frames)
+    else:
+        cache = None
+        if args.cache or args.cache_dir:
+            cache = AnalysisCache(args.cache_dir, args.cache_size * 1024 * 1024)
+        checkpoint = None
+        if args.checkpoint_every or args.checkpoint_dir:
+            checkpoint = Checkpoint(args.checkpoint_dir or f"{args.output}.ckpt", args.checkpoint_every or 1000)
+        pipeline = BlobPipeline(
+            settings, staged=not args.serial, queue_size=args.queue_size, profile=bool(args.profile), cache=cache,
+            export_tracks=args.export_tracks, from_tracks=args.from_tracks, checkpoint=checkpoint,
+        )
+    if not args.quiet:
+        if args.live:
+            pipeline.on_stats = _print_live_stats
+        else:
+            pipeline.on_progress = _print_progress
+
+    start = time.perf_counter()
+    try:
+        frames = pipeline.run(args.input, outputs)
+    except KeyboardInterrupt:
+        if not args.live:
+            print("\nInterrupted.", file=sys.stderr)
+            if isinstance(pipeline, BlobPipeline) and pipeline.checkpoint is not None:
+                print(f"Rerun the same command to resume from {pipeline.checkpoint.directory}", file=sys.stderr)
+            return 130
+        # Ctrl+C is how a live run normally ends; its segments are already closed
+        frames = pipeline.processed
+    except Exception as e:
+        print(f"\nError: {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    if args.profile:
+        pipeline.profiler.write(args.profile)
+    if not args.quiet:
+        # A resumed run only timed the frames after the checkpoint
+        done = frames - pipeline.resumed_at if isinstance(pipeline, BlobPipeline) else frames
+        fps = done / elapsed if elapsed > 0 else 0.0
+        print(f"\nBlob domination complete! {frames} frames in {elapsed:.1f}s ({fps:.1f} fps)", file=sys.stderr)
+        if isinstance(pipeline, BlobPipeline):
+            if pipeline.resumed_at:
+                print(f"Resumed from checkpoint after {pipeline.resumed_at} frames", file=sys.stderr)
+            if args.from_tracks:
+                print(f"Tracks drawn from: {args.from_tracks}", file=sys.stderr)
+            elif pipeline.cache_hit:
+                print("Motion analysis reused from cache", file=sys.stderr)
+            else:
+                print(f"Motion backend {pipeline.engine.motion.describe()}", file=sys.stderr)
+                gate = pipeline.engine.describe_gate()
+                if gate:
+                    print(gate, file=sys.stderr)
+        if args.profile:
+            print(pipeline.profiler.describe(), file=sys.stderr)
+        if args.live:
+            stats = pipeline.stats
+            print(
+                f"Captured {stats.get('captured', 0)} frames, dropped {stats.get('drop_rate', 0.0):.1%}, "
+                f"final level {stats.get('level', 0)}", file=sys.stderr,
+            )
+            for path in pipeline.segments:
+                print(f"Video saved to: {path}", file=sys.stderr)
+        elif args.sweep:
+            for variant, path in zip(variants, outputs):
+                print(f"Video saved to: {path}  ({', '.join(f'{k}={v}' for k, v in variant.items())})", file=sys.stderr)
+        else:
+            print(f"Video saved to: {args.output}", file=sys.stderr)
+        if args.export_tracks:
+            print(f"Tracks saved to: {args.export_tracks}", file=sys.stderr)
+    return 0
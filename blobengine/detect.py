@@ -0,0 +1,66 @@
+import cv2
+import numpy as np
+
+from .buffers import BufferPool
+
+MAX_BLOB_AREA = 25000
+
+
+class SimpleBlobDetection:
+    # cv2.SimpleBlobDetector over the blurred, motion-masked grayscale image
+    name = "simple"
+
+    def __init__(self, min_area, max_area=MAX_BLOB_AREA):
+        params = cv2.SimpleBlobDetector_Params()
+        params.minThreshold = 5
+        params.maxThreshold = 250
+        params.filterByArea = True
+        params.minArea = min_area
+        params.maxArea = max_area
+        params.filterByCircularity = False
+        params.filterByConvexity = False
+        params.filterByInertia = False
+        self.detector = cv2.SimpleBlobDetector_create(params)
+        self.buffers = BufferPool()
+
+    def detect(self, gray, motion_mask):
+        # Motion masks are 0/255, so a plain AND zeroes everything outside them
+        shape = gray.shape[:2]
+        masked_gray = cv2.bitwise_and(gray, motion_mask, dst=self.buffers.get("masked", shape))
+        masked_gray = cv2.GaussianBlur(masked_gray, (5, 5), 0, dst=self.buffers.get("blurred", shape))
+        keypoints = self.detector.detect(masked_gray)
+        return np.array([(kp.pt[0], kp.pt[1], kp.size) for kp in keypoints], np.float64).reshape(-1, 3)
+
+
+class ConnectedComponentsDetection:
+    # One labeling pass over the binary motion mask; size is the equal-area circle diameter.
+    # Both detectors return an (M, 3) array of x, y, size
+    name = "components"
+
+    def __init__(self, min_area, max_area=MAX_BLOB_AREA):
+        self.min_area = min_area
+        self.max_area = max_area
+
+    def detect(self, gray, motion_mask):
+        _, _, stats, centroids = cv2.connectedComponentsWithStats(motion_mask, connectivity=8)
+        areas = stats[1:, cv2.CC_STAT_AREA]
+        keep = (areas >= self.min_area) & (areas <= self.max_area)
+        centers = centroids[1:][keep]
+        sizes = 2.0 * np.sqrt(areas[keep] / np.pi)
+        return np.column_stack((centers, sizes))
+
+
+BLOB_DETECTORS = {
+    SimpleBlobDetection.name: SimpleBlobDetection,
+    ConnectedComponentsDetection.name: ConnectedComponentsDetection,
+}
+
+
+def create_blob_detector(settings):
+    try:
+        detector = BLOB_DETECTORS[settings.blob_detector]
+    except KeyError:
+        raise ValueError(f"Unknown blob detector: {settings.blob_detector}") from None
+    # Areas are given in source pixels; proxy analysis detects on a scaled frame
+    area_scale = settings.analysis_scale ** 2
+    return detector(settings.min_area * area_scale, MAX_BLOB_AREA * area_scale)
@@ -0,0 +1,350 @@
+import time
+
+import cv2
+import numpy as np
+
+from .buffers import BufferPool
+from .detect import create_blob_detector
+from .motion import create_motion_backend
+from .profiling import NullProfiler
+from .settings import BlobSettings
+from .spatial import neighbor_pairs
+from .tracking import Tracks, create_tracker
+from .trails import create_trail
+
+# Keypoints of a frame the motion gate found static (compared by identity): the tracker
+# carries its tracks forward instead of matching detections
+STATIC_FRAME = np.empty((0, 3))
+
+
+class BlobEngine:
+    def __init__(self, settings=None):
+        self.settings = settings or BlobSettings()
+
+        # OpenCV constants
+        self.WHITE = (255, 255, 255)
+        self.BLACK = (0, 0, 0)
+        self.GRAY = (180, 180, 180)
+        self.font = cv2.FONT_HERSHEY_SIMPLEX
+        self.font_scale = 0.4
+        self.line_thickness = 1
+        self.shadow_offset = 2
+
+        # Receives per-frame stage timings; see profiling.StageProfiler
+        self.profiler = NullProfiler()
+        # Analysis frames are written into these; gray alternates between two buffers so
+        # prev_gray stays intact while the next frame is converted
+        self.buffers = BufferPool()
+        self.gray_slot = 0
+        self.reset()
+        self._setup_blob_detector()
+
+    def reset(self):
+        self.tracker = create_tracker(self.settings)
+        self.frame_count = self.total_frames = 0
+        self.prev_gray = self.keypoints = self.roi = None
+        # Motion gate: frames checked and frames whose flow was skipped as static
+        self.gate_checks = self.gate_skipped = 0
+        self._setup_motion_backend()
+        self._setup_trail()
+
+    @property
+    def objects(self):
+        return self.tracker.objects
+
+    @property
+    def object_id(self):
+        return self.tracker.object_id
+
+    def update_settings(self, **changes):
+        detector = (self.settings.blob_detector, self.settings.min_area, self.settings.analysis_scale)
+        motion = (
+            self.settings.motion_backend, self.settings.motion_scale, self.settings.flow_tiles, self.settings.flow_warm_start,
+            self.settings.analysis_scale,
+        )
+        trail = (self.settings.trail_mode, self.settings.trail_length)
+        roi = (self.settings.rois, self.settings.roi_mask, self.settings.analysis_scale)
+        for name, value in changes.items():
+            if not hasattr(self.settings, name):
+                raise AttributeError(f"Unknown setting: {name}")
+            setattr(self.settings, name, value)
+        if (self.settings.blob_detector, self.settings.min_area, self.settings.analysis_scale) != detector:
+            self._setup_blob_detector()
+        if (self.settings.motion_backend, self.settings.motion_scale, self.settings.flow_tiles, self.settings.flow_warm_start, self.settings.analysis_scale) != motion:
+            self._setup_motion_backend()
+            self.prev_gray = None
+        if (self.settings.rois, self.settings.roi_mask, self.settings.analysis_scale) != roi:
+            self.prev_gray = self.roi = None
+        if (self.settings.trail_mode, self.settings.trail_length) != trail:
+            self._setup_trail()
+
+    def close(self):
+        # Stops the motion backend's threads; reset() or update_settings() start new ones
+        self.motion.close()
+
+    def _setup_motion_backend(self):
+        # A replaced backend's threads would otherwise live as long as the process
+        if getattr(self, "motion", None) is not None:
+            self.motion.close()
+        self.motion = create_motion_backend(self.settings)
+
+    def _setup_trail(self):
+        self.trail = create_trail(self.settings)
+
+    def _setup_blob_detector(self):
+        self.blob_detector = create_blob_detector(self.settings)
+
+    def _track_motion(self, frame):
+        return self._blob_objects(self._detect_keypoints(frame))
+
+    def _detect_keypoints(self, frame):
+        # Raw (M, 3) x, y, size from the motion mask; this is what an AnalysisCache stores
+        profiler, frame_count = self.profiler, self.frame_count
+        start = time.perf_counter()
+        gray = self._analysis_gray(frame)
+        profiler.add(frame_count, "gray", time.perf_counter() - start)
+        if self.prev_gray is None:
+            self.prev_gray = gray
+            return np.empty((0, 3))
+
+        start = time.perf_counter()
+        static = self._is_static(self.prev_gray, gray)
+        if self.settings.motion_gate:
+            profiler.add(frame_count, "gate", time.perf_counter() - start)
+        if static:
+            # Nothing moved: skip flow and detection, the tracks stay where they are
+            self.prev_gray = gray
+            return STATIC_FRAME
+
+        motion_mask = self._motion_mask(self.prev_gray, gray)
+        profiler.add(frame_count, "flow", self.motion.last_time - self.motion.last_threshold_time)
+        profiler.add(frame_count, "threshold", self.motion.last_threshold_time)
+
+        start = time.perf_counter()
+        keypoints = self._to_source(self.blob_detector.detect(gray, motion_mask))
+        profiler.add(frame_count, "detect", time.perf_counter() - start)
+
+        self.prev_gray = gray
+        return keypoints
+
+    @staticmethod
+    def _gray(frame, gray=None, equalized=None):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray)
+        return cv2.equalizeHist(gray, dst=equalized)
+
+    # Motion and detection run on the region of interest's bounding box, scaled by
+    # analysis_scale; keypoints are mapped back so tracking and drawing stay in source pixels
+    def _setup_roi(self, frame):
+        h, w = frame.shape[:2]
+        settings = self.settings
+        x, y, roi_w, roi_h, mask = 0, 0, w, h, None
+        if settings.rois or settings.roi_mask:
+            region = np.zeros((h, w), np.uint8)
+            for rx, ry, rw, rh in settings.rois:
+                region[max(0, ry):max(0, ry + rh), max(0, rx):max(0, rx + rw)] = 255
+            if settings.roi_mask:
+                image = cv2.imread(settings.roi_mask, cv2.IMREAD_GRAYSCALE)
+                if image is None:
+                    raise RuntimeError(f"Failed to read ROI mask: {settings.roi_mask}")
+                if image.shape != (h, w):
+                    image = cv2.resize(image, (w, h), interpolation=cv2.INTER_NEAREST)
+                region[image > 0] = 255
+            x, y, roi_w, roi_h = cv2.boundingRect(region)
+            if not roi_w or not roi_h:
+                raise ValueError("Region of interest is empty")
+            mask = region[y:y + roi_h, x:x + roi_w]
+            if mask.all():
+                mask = None
+        scale = settings.analysis_scale
+        size = (max(1, round(roi_w * scale)), max(1, round(roi_h * scale)))
+        if mask is not None and size != (roi_w, roi_h):
+            mask = cv2.resize(mask, size, interpolation=cv2.INTER_NEAREST)
+        # (x, y, w, h) of the analyzed box, analysis size, mask over that size or None
+        self.roi = ((x, y, roi_w, roi_h), size, mask)
+
+    def _analysis_gray(self, frame):
+        if self.roi is None:
+            self._setup_roi(frame)
+        (x, y, w, h), size, _ = self.roi
+        if (w, h) != frame.shape[1::-1]:
+            frame = frame[y:y + h, x:x + w]
+        shape = (size[1], size[0])
+        if size != (w, h):
+            frame = cv2.resize(frame, size, dst=self.buffers.get("proxy", shape + frame.shape[2:]), interpolation=cv2.INTER_AREA)
+        self.gray_slot ^= 1
+        return self._gray(frame, self.buffers.get("gray", shape), self.buffers.get(f"equalized{self.gray_slot}", shape))
+
+    def _is_static(self, prev_gray, gray):
+        # Cheap pre-check before optical flow: largest change between the two frames on a
+        # 1/8 proxy, where area averaging evens out sensor noise and compression artifacts
+        gate = self.settings.motion_gate
+        if not gate:
+            return False
+        h, w = gray.shape[:2]
+        size = (max(1, w // 8), max(1, h // 8))
+        prev_small = cv2.resize(prev_gray, size, interpolation=cv2.INTER_AREA)
+        small = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+        static = cv2.absdiff(prev_small, small).max() <= gate
+        self.gate_checks += 1
+        self.gate_skipped += static
+        return static
+
+    def describe_gate(self):
+        if not self.gate_checks:
+            return None
+        text = f"Motion gate skipped {self.gate_skipped}/{self.gate_checks} frames ({self.gate_skipped / self.gate_checks:.1%})"
+        if self.gate_skipped and self.motion.calls:
+            text += f", saving about {self.gate_skipped * self.motion.cost_ms / 1000:.1f}s of {self.motion.name} flow"
+        return text
+
+    def _motion_mask(self, prev_gray, gray):
+        motion_mask = self.motion.motion_mask(prev_gray, gray, self._motion_threshold())
+        mask = self.roi[2]
+        if mask is not None:
+            cv2.bitwise_and(motion_mask, mask, dst=motion_mask)
+        return motion_mask
+
+    def _motion_threshold(self):
+        # Flow magnitudes shrink with the proxy, so the threshold (in source pixels) does too
+        if self.motion.flow_units:
+            return self.settings.motion_threshold * self.settings.analysis_scale
+        return self.settings.motion_threshold
+
+    def _to_source(self, keypoints):
+        scale = self.settings.analysis_scale
+        if scale != 1:
+            keypoints = keypoints / scale
+        x, y = self.roi[0][:2]
+        if x or y:
+            keypoints = keypoints + (x, y, 0)
+        return keypoints
+
+    def _blob_objects(self, keypoints):
+        sizes = keypoints[:, 2] * self.settings.blob_size_scale
+        areas = np.pi * (sizes / 2) ** 2
+        # (M, 4) rows of cx, cy, size, area
+        return np.column_stack((np.trunc(keypoints[:, :2]), sizes, areas))
+
+    def _assign_objects(self, tracked_objects):
+        self.tracker.assign(tracked_objects)
+
+    def _draw_elements(self, frame, tracks=None, frame_count=None, scale=None):
+        # tracks/frame_count let a separate render stage draw a tracker snapshot;
+        # scale (sx, sy) maps source-pixel tracks onto a resized frame
+        if tracks is None:
+            tracks = self.tracker.snapshot()
+        if frame_count is None:
+            frame_count = self.frame_count
+        max_connection_distance = self.settings.max_connection_distance
+        if scale is not None:
+            sx, sy = scale
+            size_scale = (sx * sy) ** 0.5
+            tracks = Tracks(
+                tracks.ids,
+                np.trunc(tracks.centers * (sx, sy)).astype(np.int64),
+                tracks.sizes * size_scale,
+                tracks.areas * size_scale ** 2,
+                tracks.ages,
+                tracks.activity,
+            )
+            max_connection_distance *= size_scale
+        # The trail is built from the raw frame, before the overlay is drawn on it
+        trail_frame = self.trail.update(frame, self.settings.trail_opacity)
+        self._draw_overlay(frame, tracks, max_connection_distance)
+
+        # The overlay is already drawn into frame, so the blend can overwrite it
+        frame = cv2.addWeighted(frame, 0.7, trail_frame, 0.3, 0, dst=frame)
+        status = f"Blobs: {len(tracks)} | Frame: {frame_count}/{self.total_frames}"
+        text_size, _ = cv2.getTextSize(status, self.font, self.font_scale, 1)
+        cv2.rectangle(
+            frame,
+            (5, 5),
+            (15 + text_size[0], 15 + text_size[1]),
+            self.BLACK,
+            -1,
+        )
+        cv2.putText(
+            frame,
+            status,
+            (10, 10 + text_size[1]),
+            self.font,
+            self.font_scale,
+            self.WHITE,
+            1,
+        )
+        return frame
+
+    def _draw_overlay(self, frame, tracks, max_connection_distance):
+        # Connection pairs come from a grid hash instead of testing every pair of centers.
+        # Strokes are still drawn one by one in the original order: gray and white strokes
+        # overlap where lines cross, so regrouping them by color would change pixels.
+        centers = tracks.centers
+        first, second = neighbor_pairs(centers, max_connection_distance)
+        if len(first):
+            starts, ends = centers[first], centers[second]
+            segments = np.concatenate((starts, ends, starts + 1, ends + 1), axis=1).tolist()
+            for x1, y1, x2, y2, sx1, sy1, sx2, sy2 in segments:
+                cv2.line(frame, (x1, y1), (x2, y2), self.GRAY, 1)
+                cv2.line(frame, (sx1, sy1), (sx2, sy2), self.WHITE, 1)
+
+        if len(tracks):
+            offset = self.shadow_offset
+            radii = np.trunc(tracks.sizes / 2).astype(np.int64)
+            label_x = np.trunc(centers[:, 0] + tracks.sizes / 2 + 5).astype(np.int64)
+            rows = np.column_stack((tracks.ids, centers, radii, label_x)).tolist()
+            for obj_id, cx, cy, radius, tx in rows:
+                cv2.circle(frame, (cx + offset, cy + offset), radius, self.GRAY, 2)
+                cv2.circle(frame, (cx, cy), radius, self.WHITE, 2)
+                text = f"#{obj_id}"
+                (text_w, text_h), _ = cv2.getTextSize(text, self.font, self.font_scale, 1)
+                cv2.rectangle(frame, (tx - 3, cy - text_h - 3), (tx + text_w + 3, cy + 3), self.BLACK, -1)
+                cv2.putText(frame, text, (tx + 1, cy + 1), self.font, self.font_scale, self.GRAY, 1)
+                cv2.putText(frame, text, (tx, cy), self.font, self.font_scale, self.WHITE, 1)
+
+    def analyze_frame(self, frame, keypoints=None):
+        # keypoints: this frame's cached _detect_keypoints result, skipping motion analysis
+        self.frame_count += 1
+        if keypoints is None:
+            keypoints = self._detect_keypoints(frame)
+        self.keypoints = keypoints
+        tracked_objects = self._blob_objects(keypoints)
+        self.profiler.count(self.frame_count, "blobs", len(tracked_objects))
+        start = time.perf_counter()
+        if keypoints is STATIC_FRAME:
+            self.tracker.carry_forward()
+        else:
+            self._assign_objects(tracked_objects)
+        # Trackers replace their state every frame, so this is a stable snapshot
+        tracks = self.tracker.snapshot()
+        self.profiler.add(self.frame_count, "assign", time.perf_counter() - start)
+        self.profiler.count(self.frame_count, "tracks", len(tracks))
+        return tracks, self.frame_count
+
+    def render_frame(self, frame, tracks, frame_count, scale=None):
+        start = time.perf_counter()
+        frame = self._draw_elements(frame, tracks, frame_count, scale)
+        self.profiler.add(frame_count, "draw", time.perf_counter() - start)
+        return frame
+
+    def render_output(self, frame, tracks, frame_count, output_size):
+        # Renders a source frame at output_size: either draw at source size then resize
+        # (the original behavior), or with draw_at_output resize first and draw once at
+        # the output size with coordinates mapped
+        height, width = frame.shape[:2]
+        if output_size == (width, height):
+            return self.render_frame(frame, tracks, frame_count)
+        if not self.settings.draw_at_output:
+            frame = self.render_frame(frame, tracks, frame_count)
+            start = time.perf_counter()
+            frame = cv2.resize(frame, output_size, interpolation=cv2.INTER_LANCZOS4)
+            self.profiler.add(frame_count, "resize", time.perf_counter() - start)
+            return frame
+        start = time.perf_counter()
+        shrink = output_size[0] * output_size[1] < width * height
+        frame = cv2.resize(frame, output_size, interpolation=cv2.INTER_AREA if shrink else cv2.INTER_LANCZOS4)
+        self.profiler.add(frame_count, "resize", time.perf_counter() - start)
+        return self.render_frame(frame, tracks, frame_count, (output_size[0] / width, output_size[1] / height))
+
+    def process_frame(self, frame):
+        tracks, frame_count = self.analyze_frame(frame)
+        return self.render_frame(frame, tracks, frame_count)
@@ -0,0 +1,239 @@
+import os
+import threading
+import time
+from dataclasses import replace
+
+import cv2
+import numpy as np
+
+from .engine import BlobEngine
+from .settings import BlobSettings
+from .videoio import SegmentWriter
+
+# Relative cost of the motion backends, most expensive first, for the degrade ladder
+MOTION_COST = {"farneback": 4, "farneback-proxy": 3, "dis": 2, "mog2": 1, "diff": 0}
+# Steps tried in order while frames take longer than the budget; a step never makes a
+# setting more expensive than the user's choice
+DEGRADE_STEPS = (
+    {},
+    {"analysis_scale": 0.5},
+    {"analysis_scale": 0.5, "motion_backend": "dis"},
+    {"analysis_scale": 0.25, "motion_backend": "dis"},
+    {"analysis_scale": 0.25, "motion_backend": "diff"},
+)
+
+
+def degrade_levels(settings):
+    levels = []
+    for step in DEGRADE_STEPS:
+        level = {
+            "analysis_scale": min(step.get("analysis_scale", settings.analysis_scale), settings.analysis_scale),
+            "motion_backend": settings.motion_backend,
+        }
+        backend = step.get("motion_backend")
+        if backend and MOTION_COST[backend] < MOTION_COST.get(settings.motion_backend, 0):
+            level["motion_backend"] = backend
+        if not levels or level != levels[-1]:
+            levels.append(level)
+    return levels
+
+
+def open_live_source(source):
+    # Device index ("0"), stream URL (rtsp://, http://...) or file
+    source = str(source)
+    capture = cv2.VideoCapture(int(source) if source.isdigit() else source)
+    if not capture.isOpened():
+        raise RuntimeError(f"Failed to open live source: {source}")
+    return capture
+
+
+class LiveCapture:
+    # Reads the source on its own thread and keeps only the newest frame: a frame the
+    # processor had no time for is overwritten and counted as dropped. Files are paced at
+    # their frame rate, and optionally looped, to stand in for a camera.
+    def __init__(self, source, loop=False):
+        self.capture = open_live_source(source)
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+        self.paced = os.path.isfile(str(source))
+        self.loop = loop
+        self.condition = threading.Condition()
+        self.latest = None  # (capture index, capture time, frame)
+        self.captured = self.dropped = 0
+        self.running = True
+        self.ended = False
+        self.thread = threading.Thread(target=self._run, name="blob-capture", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        start = time.perf_counter()
+        try:
+            while self.running:
+                ret, frame = self.capture.read()
+                if not ret:
+                    if self.loop and self.paced and self.captured:
+                        self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                        continue
+                    break
+                now = time.perf_counter()
+                if self.paced:
+                    due = start + self.captured / self.fps
+                    if due > now:
+                        time.sleep(due - now)
+                        now = time.perf_counter()
+                with self.condition:
+                    if self.latest is not None:
+                        self.dropped += 1
+                    self.latest = (self.captured, now, frame)
+                    self.captured += 1
+                    self.condition.notify()
+        finally:
+            self.capture.release()
+            with self.condition:
+                self.ended = True
+                self.condition.notify()
+
+    def take(self, timeout=0.1):
+        # Newest frame, None if nothing arrived within timeout; raises EOFError once the source ended
+        with self.condition:
+            if self.latest is None and not self.ended:
+                self.condition.wait(timeout)
+            if self.latest is None and self.ended:
+                raise EOFError
+            latest, self.latest = self.latest, None
+        return latest
+
+    def stop(self):
+        self.running = False
+        self.thread.join(timeout=1)
+
+
+class LivePipeline:
+    # Processes a live source in real time. Each frame gets budget_ms (default one frame
+    # interval) from capture to written output; capture never waits for processing, so
+    # frames arriving while the previous one is processed are dropped. With adapt, a slow
+    # average cost steps down degrade_levels() (smaller analysis proxy, cheaper motion
+    # backend) and spare time steps back up. Output goes to segment_seconds long files;
+    # a dropped frame is filled with the previous output frame, so they play in real time.
+    def __init__(self, settings=None, budget_ms=0.0, segment_seconds=60.0, adapt=True, loop=False, duration=0.0, report_every=1.0):
+        self.settings = replace(settings or BlobSettings())
+        self.budget_ms = budget_ms
+        self.segment_seconds = segment_seconds
+        self.adapt = adapt
+        self.loop = loop
+        self.duration = duration
+        self.report_every = report_every
+        self.on_progress = None  # callback(frame_count, 0, frame) per processed frame, e.g. a PreviewMailbox
+        self.on_stats = None  # callback(stats) every report_every seconds and at the end
+        # Levels are taken from the settings as given; switching levels updates them in place
+        self.levels = degrade_levels(self.settings)
+        self.engine = BlobEngine(self.settings)
+        self.running = False
+        self.stats = {}
+        self.segments = []
+        self.processed = self.written = 0
+
+    def stop(self):
+        self.running = False
+
+    def _set_level(self, level):
+        self.level = level
+        self.engine.update_settings(**self.levels[level])
+        self.cost = None
+        self.since_change = 0
+
+    def _adapt(self, work_ms, budget_ms):
+        # Exponential average of the per-frame cost, with hysteresis: step down as soon as a
+        # few frames at this level run over budget, step up only after a long quiet stretch
+        self.cost = work_ms if self.cost is None else self.cost * 0.8 + work_ms * 0.2
+        self.since_change += 1
+        if not self.adapt:
+            return
+        if self.cost > budget_ms and self.since_change >= 10 and self.level < len(self.levels) - 1:
+            self.hold[self.level] *= 2
+            self._set_level(self.level + 1)
+        elif self.cost < budget_ms * 0.5 and self.level > 0 and self.since_change >= self.hold[self.level - 1]:
+            self._set_level(self.level - 1)
+
+    def _report(self, capture, latencies, elapsed):
+        # A window without processed frames (the tail after the last report) keeps the
+        # previous rates and only updates the counters
+        if latencies or not self.stats:
+            latency = np.array(latencies) if latencies else np.zeros(1)
+            self.stats = {
+                "fps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+                "latency_p50_ms": float(np.percentile(latency, 50)),
+                "latency_p95_ms": float(np.percentile(latency, 95)),
+            }
+        self.stats.update({
+            "captured": capture.captured,
+            "processed": self.processed,
+            "written": self.written,
+            "dropped": capture.dropped,
+            "drop_rate": capture.dropped / capture.captured if capture.captured else 0.0,
+            "cost_ms": self.cost or 0.0,
+            "level": self.level,
+            "level_settings": self.levels[self.level],
+        })
+        if self.on_stats:
+            self.on_stats(self.stats)
+
+    def run(self, source, output_path):
+        self.running = True
+        self.engine.reset()
+        # Frames a level must stay comfortably under budget before stepping up to it; doubles
+        # each time that level had to be abandoned, so the controller does not oscillate
+        self.hold = [60] * len(self.levels)
+        self._set_level(0)
+        capture = LiveCapture(source, self.loop)
+        writer = None
+        self.processed = self.written = 0
+        self.stats = {}
+        last_index = last_output = None
+        try:
+            budget_ms = self.budget_ms or 1000.0 / capture.fps
+            started = window_start = time.perf_counter()
+            latencies = []
+            while self.running:
+                if self.duration and time.perf_counter() - started >= self.duration:
+                    break
+                try:
+                    item = capture.take()
+                except EOFError:
+                    break
+                if item is None:
+                    continue
+                index, captured_at, frame = item
+                start = time.perf_counter()
+                if writer is None:
+                    # Streams often report their size only once frames arrive
+                    height, width = frame.shape[:2]
+                    self.output_size = self.settings.output_size(width, height)
+                    writer = SegmentWriter(output_path, capture.fps, self.output_size, self.settings, self.segment_seconds * capture.fps)
+                tracks, frame_count = self.engine.analyze_frame(frame)
+                processed_frame = self.engine.render_output(frame, tracks, frame_count, self.output_size)
+                # Frames dropped since the last one hold its output, keeping the capture timing
+                if last_output is not None:
+                    for _ in range(index - last_index - 1):
+                        writer.write(last_output)
+                        self.written += 1
+                writer.write(processed_frame)
+                self.written += 1
+                last_index, last_output = index, processed_frame
+                done = time.perf_counter()
+                self.processed += 1
+                latencies.append((done - captured_at) * 1000)
+                self._adapt((done - start) * 1000, budget_ms)
+                if self.on_progress:
+                    self.on_progress(frame_count, 0, processed_frame)
+                if done - window_start >= self.report_every:
+                    self._report(capture, latencies, done - window_start)
+                    window_start, latencies = done, []
+            self._report(capture, latencies, time.perf_counter() - window_start)
+            return self.processed
+        finally:
+            capture.stop()
+            self.engine.close()
+            if writer is not None:
+                writer.release()
+                self.segments = writer.paths
+            self.running = False
@@ -0,0 +1,231 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import cv2
+import numpy as np
+
+from .buffers import BufferPool
+
+_DILATE_KERNEL = np.ones((5, 5), np.uint8)
+
+
+class MotionBackend:
+    name = "base"
+    # Masks come from a flow magnitude in pixels, so thresholds scale with frame size
+    flow_units = True
+
+    def __init__(self):
+        self.calls = 0
+        self.total_time = 0.0
+        # Duration of the last call and of its threshold/dilate step, for the stage profiler
+        self.last_time = self.last_threshold_time = 0.0
+        # Scratch arrays; the returned mask is one of them and is overwritten by the next call
+        self.buffers = BufferPool()
+
+    def motion_mask(self, prev_gray, gray, threshold):
+        self.last_threshold_time = 0.0
+        start = time.perf_counter()
+        mask = self._motion_mask(prev_gray, gray, threshold)
+        self.last_time = time.perf_counter() - start
+        self.total_time += self.last_time
+        self.calls += 1
+        return mask
+
+    def _motion_mask(self, prev_gray, gray, threshold):
+        raise NotImplementedError
+
+    def close(self):
+        # Releases worker threads; describe() still works, motion_mask() does not
+        pass
+
+    @property
+    def cost_ms(self):
+        return self.total_time / self.calls * 1000 if self.calls else 0.0
+
+    def describe(self):
+        return f"{self.name}: {self.cost_ms:.2f} ms/frame over {self.calls} frames"
+
+    def _threshold_magnitude(self, magnitude, threshold):
+        start = time.perf_counter()
+        shape = magnitude.shape[:2]
+        binary = self.buffers.get("binary", shape)
+        if magnitude.dtype == np.uint8:
+            cv2.threshold(magnitude, threshold, 255, cv2.THRESH_BINARY, dst=binary)
+        else:
+            # Same test as THRESH_BINARY, written straight to uint8
+            cv2.compare(magnitude, threshold, cv2.CMP_GT, dst=binary)
+        motion_mask = cv2.dilate(binary, _DILATE_KERNEL, dst=self.buffers.get("mask", shape), iterations=1)
+        self.last_threshold_time = time.perf_counter() - start
+        return motion_mask
+
+    def _flow_magnitude(self, flow):
+        # cartToPolar, as before, so masks stay bit-identical; the angle goes to scratch
+        shape = flow.shape[:2]
+        x, y = self.buffers.get("flow_x", shape, np.float32), self.buffers.get("flow_y", shape, np.float32)
+        cv2.split(flow, [x, y])
+        magnitude = self.buffers.get("magnitude", shape, np.float32)
+        cv2.cartToPolar(x, y, magnitude, self.buffers.get("angle", shape, np.float32))
+        return magnitude
+
+
+class FlowMotion(MotionBackend):
+    # Optical-flow backends keep their flow field between calls; with warm_start it seeds
+    # the next frame's estimate (OPTFLOW_USE_INITIAL_FLOW), a better starting point for
+    # large, steady motion, though masks no longer match a cold start bit for bit
+    def __init__(self, warm_start=False):
+        super().__init__()
+        self.warm_start = warm_start
+        self.previous_flow = None
+
+    def _flow(self, shape):
+        # (flow buffer, whether it holds the previous estimate)
+        flow = self.buffers.get("flow", shape + (2,), np.float32)
+        warm = self.warm_start and flow is self.previous_flow
+        self.previous_flow = flow
+        return flow, warm
+
+
+class FarnebackMotion(FlowMotion):
+    name = "farneback"
+
+    def _motion_mask(self, prev_gray, gray, threshold):
+        flow, warm = self._flow(gray.shape[:2])
+        flags = cv2.OPTFLOW_USE_INITIAL_FLOW if warm else 0
+        cv2.calcOpticalFlowFarneback(prev_gray, gray, flow, 0.5, 3, 10, 3, 5, 1.1, flags)
+        return self._threshold_magnitude(self._flow_magnitude(flow), threshold)
+
+
+class ProxyFarnebackMotion(FlowMotion):
+    name = "farneback-proxy"
+
+    def __init__(self, scale=0.5, warm_start=False):
+        super().__init__(warm_start)
+        self.scale = scale
+
+    def _motion_mask(self, prev_gray, gray, threshold):
+        h, w = gray.shape[:2]
+        size = (max(1, round(w * self.scale)), max(1, round(h * self.scale)))
+        small_shape = (size[1], size[0])
+        small_prev = cv2.resize(prev_gray, size, dst=self.buffers.get("small_prev", small_shape), interpolation=cv2.INTER_AREA)
+        small = cv2.resize(gray, size, dst=self.buffers.get("small", small_shape), interpolation=cv2.INTER_AREA)
+        flow, warm = self._flow(small_shape)
+        flags = cv2.OPTFLOW_USE_INITIAL_FLOW if warm else 0
+        cv2.calcOpticalFlowFarneback(small_prev, small, flow, 0.5, 3, 10, 3, 5, 1.1, flags)
+        # Back to full-resolution pixel units so motion_threshold keeps its meaning
+        magnitude = self.buffers.get("full_magnitude", (h, w), np.float32)
+        cv2.resize(self._flow_magnitude(flow), (w, h), dst=magnitude, interpolation=cv2.INTER_LINEAR)
+        magnitude *= 1.0 / self.scale
+        return self._threshold_magnitude(magnitude, threshold)
+
+
+class DISMotion(FlowMotion):
+    name = "dis"
+
+    def __init__(self, preset=cv2.DISOPTICAL_FLOW_PRESET_FAST, warm_start=False):
+        super().__init__(warm_start)
+        self.dis = cv2.DISOpticalFlow_create(preset)
+
+    def _motion_mask(self, prev_gray, gray, threshold):
+        # DIS refines any same-sized flow it is given, so a cold start must pass None (and
+        # gets a new array); with warm_start that array is then reused from frame to frame
+        flow = self.previous_flow
+        if self.warm_start and flow is not None and flow.shape[:2] == gray.shape[:2]:
+            self.dis.calc(prev_gray, gray, flow)
+        else:
+            flow = self.dis.calc(prev_gray, gray, None)
+        self.previous_flow = flow
+        return self._threshold_magnitude(self._flow_magnitude(flow), threshold)
+
+
+class FrameDiffMotion(MotionBackend):
+    name = "diff"
+    flow_units = False
+
+    def __init__(self, intensity_scale=20.0):
+        super().__init__()
+        # motion_threshold (flow pixels) times this gives the gray-level difference threshold
+        self.intensity_scale = intensity_scale
+
+    def _motion_mask(self, prev_gray, gray, threshold):
+        shape = gray.shape[:2]
+        diff = cv2.absdiff(prev_gray, gray, dst=self.buffers.get("diff", shape))
+        diff = cv2.GaussianBlur(diff, (5, 5), 0, dst=self.buffers.get("blurred", shape))
+        return self._threshold_magnitude(diff, threshold * self.intensity_scale)
+
+
+class BackgroundSubtractorMotion(MotionBackend):
+    name = "mog2"
+    flow_units = False
+
+    def __init__(self, history=200, var_threshold=16):
+        super().__init__()
+        self.subtractor = cv2.createBackgroundSubtractorMOG2(history=history, varThreshold=var_threshold, detectShadows=False)
+
+    def _motion_mask(self, prev_gray, gray, threshold):
+        shape = gray.shape[:2]
+        foreground = self.subtractor.apply(gray, self.buffers.get("foreground", shape))
+        foreground = cv2.medianBlur(foreground, 5, dst=self.buffers.get("blurred", shape))
+        return self._threshold_magnitude(foreground, 127)
+
+
+class TiledMotion(MotionBackend):
+    # Splits each frame into horizontal strips overlapping by `overlap` rows and runs one
+    # backend per strip (flow, threshold and dilate) on a thread pool; OpenCV releases the
+    # GIL, so strips run in parallel. Each strip contributes only its own rows to the
+    # stitched mask; the overlap gives flow context across the border, and detection runs
+    # on the whole mask, so a blob crossing a border is found once.
+    def __init__(self, create, tiles, overlap=48):
+        super().__init__()
+        self.backends = [create() for _ in range(tiles)]
+        self.name = f"{self.backends[0].name} x{tiles} tiles"
+        self.flow_units = self.backends[0].flow_units
+        self.overlap = overlap
+        self.pool = ThreadPoolExecutor(max_workers=tiles, thread_name_prefix="blob-flow")
+
+    def _motion_mask(self, prev_gray, gray, threshold):
+        height = gray.shape[0]
+        tiles = len(self.backends)
+        bounds = [round(height * i / tiles) for i in range(tiles + 1)]
+        mask = self.buffers.get("mask", gray.shape[:2])
+
+        def strip(i):
+            top, bottom = bounds[i], bounds[i + 1]
+            start, end = max(0, top - self.overlap), min(height, bottom + self.overlap)
+            part = self.backends[i]._motion_mask(prev_gray[start:end], gray[start:end], threshold)
+            mask[top:bottom] = part[top - start:bottom - start]
+
+        list(self.pool.map(strip, range(tiles)))
+        # Strips threshold concurrently; report the slowest
+        self.last_threshold_time = max(backend.last_threshold_time for backend in self.backends)
+        return mask
+
+    def close(self):
+        self.pool.shutdown()
+        for backend in self.backends:
+            backend.close()
+
+
+MOTION_BACKENDS = {
+    FarnebackMotion.name: FarnebackMotion,
+    ProxyFarnebackMotion.name: ProxyFarnebackMotion,
+    DISMotion.name: DISMotion,
+    FrameDiffMotion.name: FrameDiffMotion,
+    BackgroundSubtractorMotion.name: BackgroundSubtractorMotion,
+}
+
+
+def create_motion_backend(settings):
+    try:
+        backend = MOTION_BACKENDS[settings.motion_backend]
+    except KeyError:
+        raise ValueError(f"Unknown motion backend: {settings.motion_backend}") from None
+    if backend is ProxyFarnebackMotion:
+        create = partial(backend, settings.motion_scale, warm_start=settings.flow_warm_start)
+    elif issubclass(backend, FlowMotion):
+        create = partial(backend, warm_start=settings.flow_warm_start)
+    else:
+        create = backend
+    if settings.flow_tiles > 1:
+        return TiledMotion(create, settings.flow_tiles)
+    return create()
@@ -0,0 +1,393 @@
+import copy
+import os
+import queue
+import shutil
+import threading
+import time
+
+import cv2
+
+from .checkpoint import check_resumable
+from .chunked import concat_segments
+from .engine import BlobEngine
+from .profiling import StageProfiler, peak_rss_mb
+from .trackio import TrackReader, TrackWriter
+from .videoio import open_reader, open_writer
+from .settings import OUTSIDE_RANGE, BlobSettings
+
+_END = object()
+
+
+class BlobPipeline:
+    def __init__(self, settings=None, progress_every=10, staged=True, queue_size=8, profile=False, cache=None,
+                 export_tracks=None, from_tracks=None, checkpoint=None):
+        self.settings = settings or BlobSettings()
+        self.engine = BlobEngine(self.settings)
+        self.progress_every = progress_every
+        self.on_progress = None  # callback(frames_written, total_frames, frame)
+        # staged: decode, analyze, draw and encode each get a thread, linked by bounded queues
+        self.staged = staged
+        self.queue_size = queue_size
+        # profile: record per-stage timings and counters into self.profiler
+        self.profiler = StageProfiler() if profile else None
+        # cache: AnalysisCache reused when only styling settings change between runs
+        self.cache = cache
+        self.analysis = self.recorded = None
+        # export_tracks: path the per-frame tracks are streamed to (directory of .npz
+        # segments, or .csv); from_tracks: such an export drawn instead of running analysis
+        self.export_tracks = export_tracks
+        self.from_tracks = from_tracks
+        self.track_writer = self.track_reader = None
+        # checkpoint: Checkpoint the output is written to in segments, saving the state
+        # needed to resume after each; a rerun of the same job picks up from the last one
+        self.checkpoint = checkpoint
+        self.resumed_at = 0  # frames already written by the run a checkpoint resumed
+        self.segments = []
+        self.running = False
+        self.video = self.writer = None
+        self.frame_width = self.frame_height = 0
+        self.fps = 0.0
+        # Setting changes posted by another thread during a run; the analyze stage applies
+        # them between frames, holding render_lock so no frame is drawn half old, half new
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._render_lock = threading.Lock()
+
+    def stop(self):
+        self.running = False
+
+    def update_settings(self, **changes):
+        # Safe to call from another thread (e.g. a GUI) while run() is in progress
+        with self._pending_lock:
+            self._pending.update(changes)
+        if not self.running:
+            self._apply_pending()
+
+    def _apply_pending(self):
+        with self._pending_lock:
+            changes, self._pending = self._pending, {}
+        if changes:
+            with self._render_lock:
+                self.engine.update_settings(**changes)
+
+    def _open(self, input_path, output_path):
+        self.video = open_reader(input_path, self.settings)
+        self.frame_width = int(self.video.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.frame_height = int(self.video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = self.video.get(cv2.CAP_PROP_FPS)
+        total_frames = int(self.video.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        # Only frames in [first, last) are analyzed; in passthrough mode the others are
+        # copied to the output, otherwise decoding starts at first and stops at last
+        self.passthrough = self.settings.outside_range == "passthrough"
+        self.first_frame, self.last_frame = self.settings.frame_range(self.fps, total_frames)
+        self.position = 0
+        if self.first_frame and not self.passthrough:
+            if not self.video.set(cv2.CAP_PROP_POS_FRAMES, self.first_frame):
+                raise RuntimeError("Input does not support seeking to the start time")
+            self.position = self.first_frame
+        analyzed = self.last_frame - self.first_frame if self.last_frame is not None else 0
+        self.engine.total_frames = max(0, analyzed)
+        self.output_frames = total_frames if self.passthrough else self.engine.total_frames
+
+        self.output_size = self.settings.output_size(self.frame_width, self.frame_height)
+        if self.checkpoint is not None:
+            # Segment writers are opened by _encode as output reaches them
+            self._resume(input_path, output_path)
+        else:
+            self.writer = open_writer(output_path, self.fps, self.output_size, self.settings)
+        if self.from_tracks:
+            self.track_reader = TrackReader(self.from_tracks)
+            self._check_tracks(self.track_reader.meta)
+        if self.export_tracks:
+            meta = {
+                "source": input_path,
+                "fps": self.fps,
+                "width": self.frame_width,
+                "height": self.frame_height,
+                "first_frame": self.first_frame,
+                "settings": self.settings.to_dict(),
+            }
+            self.track_writer = TrackWriter(self.export_tracks, meta=meta)
+
+    def _check_tracks(self, meta):
+        # Track frames are numbered from the export's first frame, so replaying them against
+        # another range, frame rate or video would draw every track in the wrong place
+        if not meta:
+            raise ValueError(f"Track data has no meta.json to check it against this video: {self.from_tracks}")
+        expected = {"first_frame": self.first_frame, "width": self.frame_width, "height": self.frame_height}
+        for name, value in expected.items():
+            if meta.get(name) != value:
+                raise ValueError(f"Track data was exported with {name}={meta.get(name)}, this run has {value}")
+        if abs((meta.get("fps") or 0) - self.fps) > 1e-3:
+            raise ValueError(f"Track data was exported at {meta.get('fps')} fps, this video is {self.fps} fps")
+
+    def _resume(self, input_path, output_path):
+        self.identity = self.checkpoint.identity(input_path, output_path, self.settings, self.checkpoint.every)
+        self.extension = os.path.splitext(output_path)[1] or ".avi"
+        self.segments = []
+        self._snapshots = {}
+        state = self.checkpoint.load(self.identity)
+        if state is None:
+            os.makedirs(self.checkpoint.directory, exist_ok=True)
+            return
+        if not self.video.set(cv2.CAP_PROP_POS_FRAMES, state["position"]):
+            raise RuntimeError("Input does not support seeking to the checkpoint")
+        self.position = state["position"]
+        self.written = self.resumed_at = state["written"]
+        self.segments = state["segments"]
+        engine = self.engine
+        engine.frame_count = state["frame_count"]
+        engine.tracker = state["tracker"]
+        engine.trail = state["trail"]
+        engine.prev_gray = state["prev_gray"]
+        engine.gate_checks, engine.gate_skipped = state["gate"]
+
+    def _output_index(self, index):
+        # 1-based position of a source frame in the output
+        return index - (0 if self.passthrough else self.first_frame) + 1
+
+    def _at_checkpoint(self, index):
+        return self.checkpoint is not None and self._output_index(index) % self.checkpoint.every == 0
+
+    def _save_checkpoint(self, index):
+        # Runs on the encode stage once a segment is complete; the analysis and draw state
+        # for this frame was snapshotted by those stages as it went past them
+        self.writer.release()
+        self.writer = None
+        self.segments.append(self.checkpoint.segment_path(len(self.segments), self.extension))
+        state = self._snapshots.pop(self.written)
+        state.update(identity=self.identity, written=self.written, position=index + 1, segments=list(self.segments))
+        self.checkpoint.save(state)
+
+    def _finish_segments(self, output_path):
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+            self.segments.append(self.checkpoint.segment_path(len(self.segments), self.extension))
+        if not self.segments:
+            raise RuntimeError("No frames were written")
+        concat_segments(self.segments, output_path)
+        self.checkpoint.clear()
+
+    def run(self, input_path, output_path):
+        if self.settings.outside_range not in OUTSIDE_RANGE:
+            raise ValueError(f"Unknown outside_range mode: {self.settings.outside_range}")
+        if self.checkpoint is not None:
+            check_resumable(self.settings)
+            if self.export_tracks:
+                raise ValueError("Track export cannot be resumed from a checkpoint")
+            # Segments must be joined by stream copy; re-encoding them would change the output
+            if not shutil.which("ffmpeg"):
+                raise RuntimeError("Checkpointed renders need ffmpeg on PATH to join their segments without re-encoding")
+        self.running = True
+        self.engine.reset()
+        self.written = self.resumed_at = 0
+        if self.profiler is not None:
+            self.profiler = self.engine.profiler = StageProfiler()
+        failed = True
+        try:
+            self._open(input_path, output_path)
+            cache_key = self._load_analysis(input_path)
+            if self.staged:
+                self._run_staged()
+            else:
+                self._run_serial()
+            # Only complete runs whose motion settings did not change midway are cached
+            if self.recorded is not None and self.running and cache_key == self.cache.key(input_path, self.settings):
+                self.cache.store(cache_key, self.recorded)
+            if self.checkpoint is not None and self.running:
+                self._finish_segments(output_path)
+            failed = False
+            return self.written
+        finally:
+            self.recorded = None
+            self._cleanup(failed)
+            self.running = False
+
+    def _load_analysis(self, input_path):
+        self.analysis = self.recorded = None
+        if self.cache is None or self.from_tracks:
+            return None
+        key = self.cache.key(input_path, self.settings)
+        self.analysis = self.cache.load(key)
+        # A resumed run sees only part of the input, so it has nothing complete to store
+        if self.analysis is None and not self.resumed_at:
+            self.recorded = []
+        return key
+
+    @property
+    def cache_hit(self):
+        return self.analysis is not None
+
+    # Stage bodies, shared by the serial and staged loops
+    def _in_range(self, index):
+        return index >= self.first_frame and (self.last_frame is None or index < self.last_frame)
+
+    def _decode(self):
+        # Returns (source frame index, frame), or None at the end of the input or range
+        if not self.passthrough and self.last_frame is not None and self.position >= self.last_frame:
+            return None
+        start = time.perf_counter()
+        ret, frame = self.video.read()
+        if not ret:
+            return None
+        index = self.position
+        self.position += 1
+        if self._in_range(index):
+            # Frames are analyzed in decode order, so this is the frame's number
+            self.engine.profiler.add(index - self.first_frame + 1, "decode", time.perf_counter() - start)
+        return index, frame
+
+    def _analyze(self, item):
+        index, frame = item
+        self._apply_pending()
+        if not self._in_range(index):
+            objects = frame_count = None
+        elif self.track_reader is not None:
+            self.engine.frame_count += 1
+            objects, frame_count = self.track_reader.at(self.engine.frame_count), self.engine.frame_count
+            if self.track_writer is not None:
+                self.track_writer.append(frame_count, objects)
+        else:
+            keypoints = None
+            if self.analysis is not None:
+                keypoints = self.analysis.frame(self.engine.frame_count + 1)
+            objects, frame_count = self.engine.analyze_frame(frame, keypoints)
+            if self.recorded is not None:
+                self.recorded.append(self.engine.keypoints)
+            if self.track_writer is not None:
+                self.track_writer.append(frame_count, objects)
+        if self._at_checkpoint(index):
+            engine = self.engine
+            self._snapshots[self._output_index(index)] = {
+                "frame_count": engine.frame_count,
+                "tracker": copy.deepcopy(engine.tracker),
+                "prev_gray": None if engine.prev_gray is None else engine.prev_gray.copy(),
+                "gate": (engine.gate_checks, engine.gate_skipped),
+            }
+        return index, frame, objects, frame_count
+
+    def _draw(self, item):
+        index, frame, objects, frame_count = item
+        if objects is None:
+            # Passed through unanalyzed, only scaled to the output size
+            if self.output_size != (self.frame_width, self.frame_height):
+                frame = cv2.resize(frame, self.output_size, interpolation=cv2.INTER_LANCZOS4)
+            processed_frame = frame
+        else:
+            with self._render_lock:
+                processed_frame = self.engine.render_output(frame, objects, frame_count, self.output_size)
+        if self._at_checkpoint(index):
+            self._snapshots[self._output_index(index)]["trail"] = copy.deepcopy(self.engine.trail)
+        return index, processed_frame, frame_count
+
+    def _encode(self, item):
+        index, processed_frame, frame_count = item
+        profiler = self.engine.profiler
+        start = time.perf_counter()
+        if self.writer is None:
+            path = self.checkpoint.segment_path(len(self.segments), self.extension)
+            self.writer = open_writer(path, self.fps, self.output_size, self.settings)
+        self.writer.write(processed_frame)
+        if frame_count is not None:
+            profiler.add(frame_count, "encode", time.perf_counter() - start)
+            if profiler.enabled:
+                profiler.count(frame_count, "peak_rss_mb", peak_rss_mb())
+        self.written += 1
+        if self._at_checkpoint(index):
+            self._save_checkpoint(index)
+        if self.on_progress and self.written % self.progress_every == 0:
+            self.on_progress(self.written, self.output_frames, processed_frame)
+
+    def _run_serial(self):
+        while self.running:
+            item = self._decode()
+            if item is None:
+                break
+            self._encode(self._draw(self._analyze(item)))
+
+    def _run_staged(self):
+        errors = []
+        decoded = queue.Queue(self.queue_size)
+        analyzed = queue.Queue(self.queue_size)
+        drawn = queue.Queue(self.queue_size)
+
+        def put(q, item):
+            # Blocks for backpressure, but gives up once another stage has failed
+            while not errors:
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def get(q):
+            while not errors:
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            return _END
+
+        def decode_stage():
+            try:
+                while self.running:
+                    item = self._decode()
+                    if item is None or not put(decoded, item):
+                        break
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                put(decoded, _END)
+
+        def stage(work, source, sink):
+            try:
+                while True:
+                    item = get(source)
+                    if item is _END:
+                        break
+                    result = work(item)
+                    if sink is not None and not put(sink, result):
+                        break
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                if sink is not None:
+                    put(sink, _END)
+
+        threads = [
+            threading.Thread(target=decode_stage, name="blob-decode", daemon=True),
+            threading.Thread(target=stage, args=(self._analyze, decoded, analyzed), name="blob-analyze", daemon=True),
+            threading.Thread(target=stage, args=(self._draw, analyzed, drawn), name="blob-draw", daemon=True),
+            threading.Thread(target=stage, args=(self._encode, drawn, None), name="blob-encode", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+    def _cleanup(self, failed=False):
+        # Everything is released even when one release fails (an ffmpeg writer raises if the
+        # encoder exited with an error); that error is only raised if the run itself succeeded
+        video, writer, track_writer = self.video, self.writer, self.track_writer
+        self.video = self.writer = None
+        self.track_writer = self.track_reader = None
+        error = None
+        for release in (
+            video.release if video and video.isOpened() else None,
+            writer.release if writer else None,
+            track_writer.close if track_writer else None,
+            self.engine.close,
+        ):
+            if release is None:
+                continue
+            try:
+                release()
+            except Exception as e:
+                error = error or e
+        if error is not None and not failed:
+            raise error
@@ -0,0 +1,30 @@
+import threading
+
+import cv2
+
+
+class PreviewMailbox:
+    # Single-slot handoff between the processing thread and a UI: put() never blocks and
+    # overwrites any frame not yet taken, so a slow consumer only ever sees the latest frame
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latest = None
+
+    def put(self, frame_count, total_frames, frame):
+        with self._lock:
+            self._latest = (frame_count, total_frames, frame)
+
+    def take(self):
+        with self._lock:
+            latest, self._latest = self._latest, None
+        return latest
+
+
+def fit_frame(frame, max_width, max_height):
+    # Scale to fit the box keeping aspect ratio; INTER_AREA is cheap and alias-free when shrinking
+    h, w = frame.shape[:2]
+    scale = min(max_width / w, max_height / h)
+    size = (max(1, int(w * scale)), max(1, int(h * scale)))
+    if size == (w, h):
+        return frame
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
@@ -0,0 +1,107 @@
+import csv
+import json
+import sys
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Timed stages in pipeline order; counters are recorded alongside them per frame
+STAGES = ("decode", "gray", "gate", "flow", "threshold", "detect", "assign", "draw", "resize", "encode")
+COUNTERS = ("blobs", "tracks", "peak_rss_mb")
+
+
+def peak_rss_mb():
+    if resource is None:
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+class NullProfiler:
+    # Default profiler: every hook is a no-op, so instrumentation costs a method call per stage
+    enabled = False
+
+    def add(self, frame, stage, seconds):
+        pass
+
+    def count(self, frame, name, value):
+        pass
+
+
+class StageProfiler:
+    # Per-frame stage timings (seconds) and counters. Stages of one frame are recorded by
+    # different pipeline threads; each writes its own keys, so no lock is needed.
+    enabled = True
+
+    def __init__(self):
+        self.frames = {}
+
+    def add(self, frame, stage, seconds):
+        self.frames.setdefault(frame, {})[stage] = seconds
+
+    def count(self, frame, name, value):
+        self.frames.setdefault(frame, {})[name] = value
+
+    def rows(self):
+        columns = STAGES + COUNTERS
+        for frame in sorted(self.frames):
+            record = self.frames[frame]
+            row = {"frame": frame}
+            for name in columns:
+                value = record.get(name)
+                row[name] = round(value * 1000, 4) if name in STAGES and value is not None else value
+            yield row
+
+    def write(self, path):
+        # Per-frame trace, stage times in milliseconds; format follows the extension
+        rows = list(self.rows())
+        if path.lower().endswith(".json"):
+            with open(path, "w") as f:
+                json.dump({"stages": STAGES, "counters": COUNTERS, "frames": rows, "summary": self.summary()}, f, indent=1)
+        else:
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=("frame",) + STAGES + COUNTERS)
+                writer.writeheader()
+                writer.writerows(rows)
+
+    def summary(self):
+        stages = {}
+        for stage in STAGES:
+            times = np.array([r[stage] for r in self.frames.values() if stage in r], np.float64) * 1000
+            if len(times):
+                stages[stage] = {
+                    "frames": len(times),
+                    "mean_ms": float(times.mean()),
+                    "p95_ms": float(np.percentile(times, 95)),
+                    "max_ms": float(times.max()),
+                    "total_s": float(times.sum() / 1000),
+                }
+        counters = {}
+        for name in ("blobs", "tracks"):
+            values = [r[name] for r in self.frames.values() if name in r]
+            if values:
+                counters[f"mean_{name}"] = float(np.mean(values))
+                counters[f"max_{name}"] = int(max(values))
+        counters["peak_rss_mb"] = peak_rss_mb()
+        return {"frames": len(self.frames), "stages": stages, "counters": counters}
+
+    def describe(self):
+        summary = self.summary()
+        busiest = sum(s["total_s"] for s in summary["stages"].values()) or 1.0
+        lines = [f"Stage profile over {summary['frames']} frames:"]
+        for stage, s in summary["stages"].items():
+            lines.append(
+                f"  {stage:<9} {s['mean_ms']:8.2f} ms mean {s['p95_ms']:8.2f} ms p95 {s['total_s'] / busiest:6.1%}"
+            )
+        counters = summary["counters"]
+        if "mean_blobs" in counters:
+            lines.append(f"  blobs {counters['mean_blobs']:.1f} mean / {counters['max_blobs']} max")
+        if "mean_tracks" in counters:
+            lines.append(f"  tracks {counters['mean_tracks']:.1f} mean / {counters['max_tracks']} max")
+        lines.append(f"  peak memory {counters['peak_rss_mb']:.0f} MB")
+        return "\n".join(lines)
@@ -0,0 +1,102 @@
+import os
+from dataclasses import asdict, dataclass, field, fields
+
+OUTPUT_RESOLUTIONS = ("Match Input", "1920x1080", "3840x2160")
+# What happens to frames outside start_time/end_time
+OUTSIDE_RANGE = ("skip", "passthrough")
+
+
+@dataclass
+class BlobSettings:
+    # Control Panel parameters
+    min_area: int = 50
+    motion_threshold: float = 1.0
+    blob_size_scale: float = 0.5
+    max_connection_distance: int = 150
+    trail_opacity: float = 0.2
+    output_resolution: str = "Match Input"
+    bitrate: int = 8000  # kbps, as ffmpeg's -b:v NNNk
+    # Motion estimation, see motion.MOTION_BACKENDS
+    motion_backend: str = "farneback"
+    motion_scale: float = 0.5
+    # Split motion analysis into this many overlapping horizontal strips run in parallel
+    flow_tiles: int = 1
+    # Seed each frame's optical flow with the previous one (OPTFLOW_USE_INITIAL_FLOW)
+    flow_warm_start: bool = False
+    # Skip flow and detection on frames where no pixel of a 1/8 proxy changed by more than
+    # this many gray levels since the previous frame (0 = off)
+    motion_gate: float = 0.0
+    # Blob detection, see detect.BLOB_DETECTORS
+    blob_detector: str = "simple"
+    # Object tracking, see tracking.TRACKERS
+    tracker: str = "array"
+    # Trail rendering, see trails.TRAIL_MODES
+    trail_mode: str = "blend"
+    trail_length: int = 5
+    # Proxy analysis: motion/detection run at this fraction of the source size; with
+    # draw_at_output the overlays are drawn once at the output size instead of resized
+    analysis_scale: float = 1.0
+    draw_at_output: bool = False
+    # Time range in seconds (end_time 0 = to the end) and regions of interest: (x, y, w, h)
+    # rectangles in source pixels and/or a mask image path; motion analysis is limited to them
+    start_time: float = 0.0
+    end_time: float = 0.0
+    outside_range: str = "skip"
+    rois: list = field(default_factory=list)
+    roi_mask: str = ""
+    # Video I/O, see videoio.ENCODERS / videoio.DECODERS; bitrate applies to ffmpeg encoders
+    encoder: str = "opencv"
+    encoder_preset: str = "medium"
+    encoder_threads: int = 0
+    decoder: str = "opencv"
+
+    def output_size(self, frame_width, frame_height):
+        if self.output_resolution == "Match Input":
+            return frame_width, frame_height
+        w, h = map(int, self.output_resolution.lower().split("x"))
+        return w, h
+
+    def frame_range(self, fps, total_frames=0):
+        # [first, last) source frame indices; last is None when the end is unknown
+        first = max(0, round(self.start_time * fps)) if self.start_time else 0
+        last = round(self.end_time * fps) if self.end_time else total_frames or None
+        if last is not None and total_frames:
+            last = min(last, total_frames)
+        return first, last
+
+    def roi_mask_stamp(self):
+        # Size and mtime of the mask image, so results keyed on settings notice an edited
+        # mask; None without a mask (or a missing one, which the engine reports)
+        if not self.roi_mask:
+            return None
+        try:
+            stat = os.stat(self.roi_mask)
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, values):
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in values.items() if k in names})
+
+
+def parse_setting(name, value):
+    # A NAME=VALUE string converted to the type of the setting's default
+    default = getattr(BlobSettings(), name)
+    if isinstance(default, bool):
+        lowered = value.strip().lower()
+        if lowered in ("true", "1", "yes", "on"):
+            return True
+        if lowered in ("false", "0", "no", "off"):
+            return False
+        raise ValueError(f"Expected true/false for {name}, got {value!r}")
+    if isinstance(default, (list, tuple, dict)):
+        raise ValueError(f"{name} takes a list and cannot be given as NAME=VALUE")
+    try:
+        return type(default)(value)
+    except ValueError:
+        raise ValueError(f"Bad value for {name}: {value!r}") from None
@@ -0,0 +1,54 @@
+import numpy as np
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def grid_candidates(queries, points, cell):
+    # Index pairs (qi, pj) for every point in the 3x3 block of grid cells around each query.
+    # Any pair closer than `cell` is guaranteed to be among them; callers apply the exact test.
+    queries = np.asarray(queries, dtype=np.float64).reshape(-1, 2)
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if not len(queries) or not len(points) or cell <= 0:
+        return _EMPTY, _EMPTY
+
+    query_cells = np.floor(queries / cell).astype(np.int64)
+    point_cells = np.floor(points / cell).astype(np.int64)
+    low = np.minimum(query_cells.min(axis=0), point_cells.min(axis=0)) - 1
+    height = max(query_cells[:, 1].max(), point_cells[:, 1].max()) - low[1] + 2
+
+    point_keys = (point_cells[:, 0] - low[0]) * height + (point_cells[:, 1] - low[1])
+    order = np.argsort(point_keys, kind="stable")
+    sorted_keys = point_keys[order]
+
+    query_index = np.arange(len(queries))
+    qi_parts, pj_parts = [], []
+    for ox in (-1, 0, 1):
+        for oy in (-1, 0, 1):
+            keys = (query_cells[:, 0] + ox - low[0]) * height + (query_cells[:, 1] + oy - low[1])
+            lo = np.searchsorted(sorted_keys, keys, "left")
+            counts = np.searchsorted(sorted_keys, keys, "right") - lo
+            total = int(counts.sum())
+            if not total:
+                continue
+            qi = np.repeat(query_index, counts)
+            starts = np.repeat(np.cumsum(counts) - counts, counts)
+            qi_parts.append(qi)
+            pj_parts.append(order[lo[qi] + np.arange(total) - starts])
+    if not qi_parts:
+        return _EMPTY, _EMPTY
+    return np.concatenate(qi_parts), np.concatenate(pj_parts)
+
+
+def neighbor_pairs(points, radius):
+    # Index pairs (i, j), i < j, of points closer than radius, ordered like a double loop over i then j
+    points = np.asarray(points).reshape(-1, 2)
+    if len(points) < 2 or radius <= 0:
+        return _EMPTY, _EMPTY
+    qi, pj = grid_candidates(points, points, radius)
+    keep = qi < pj
+    qi, pj = qi[keep], pj[keep]
+    delta = (points[qi] - points[pj]).astype(np.float64)
+    close = np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2) < radius
+    qi, pj = qi[close], pj[close]
+    order = np.lexsort((pj, qi))
+    return qi[order], pj[order]
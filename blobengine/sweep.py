@@ -0,0 +1,163 @@
+import itertools
+import os
+from dataclasses import replace
+
+import cv2
+import numpy as np
+
+from .cache import MOTION_SETTINGS
+from .engine import STATIC_FRAME, BlobEngine
+from .settings import BlobSettings, parse_setting
+from .videoio import open_reader, open_writer
+
+# Variants that agree on these share one optical-flow pass; variants that also agree on
+# the rest of MOTION_SETTINGS (detector, min area) share their detections too
+FLOW_SETTINGS = ("motion_backend", "motion_scale", "flow_tiles", "flow_warm_start", "motion_threshold", "motion_gate", "analysis_scale", "rois", "roi_mask")
+# Variants that agree on these share the (cropped, scaled) grayscale frame
+GRAY_SETTINGS = ("analysis_scale", "rois", "roi_mask")
+# The source is opened and seeked once for every variant, so these cannot vary
+SOURCE_SETTINGS = ("decoder", "start_time", "end_time", "outside_range")
+
+
+def check_variants(variants):
+    for variant in variants:
+        fixed = [name for name in SOURCE_SETTINGS if name in variant]
+        if fixed:
+            raise ValueError(f"Sweeps share one decode pass, so {', '.join(fixed)} cannot vary between variants")
+
+
+def parse_grid(specs):
+    # ["min_area=30,50", "trail_opacity=0.2,0.5"] -> the cartesian product as override dicts
+    defaults = BlobSettings()
+    axes = []
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        if not hasattr(defaults, name) or not values:
+            raise ValueError(f"Bad sweep parameter: {spec}")
+        axes.append([(name, parse_setting(name, value)) for value in values.split(",")])
+    variants = [dict(combination) for combination in itertools.product(*axes)]
+    check_variants(variants)
+    return variants
+
+
+def sweep_outputs(output_path, variants, settings=None):
+    # A template like "out_{index}_{min_area}.avi" is filled from each variant's settings;
+    # otherwise the variant index is appended to the file name
+    settings = settings or BlobSettings()
+    if "{" in output_path:
+        return [output_path.format(index=i, **replace(settings, **v).to_dict()) for i, v in enumerate(variants)]
+    stem, ext = os.path.splitext(output_path)
+    return [f"{stem}_{i:02d}{ext}" for i in range(len(variants))]
+
+
+class SweepPipeline:
+    # Renders several parameter variants of one video in a single pass: each frame is
+    # decoded and its optical flow computed once, then every variant runs its own
+    # detector/tracker/renderer/writer on the shared motion mask
+    def __init__(self, settings=None, variants=(), progress_every=10):
+        self.settings = settings or BlobSettings()
+        self.variants = [dict(v) for v in variants] or [{}]
+        self.progress_every = progress_every
+        self.on_progress = None  # callback(frame_count, total_frames, frame); frame is the first variant's
+        self.running = False
+
+    def stop(self):
+        self.running = False
+
+    def variant_settings(self):
+        return [replace(self.settings, **variant) for variant in self.variants]
+
+    def run(self, input_path, output_paths):
+        if len(output_paths) != len(self.variants):
+            raise ValueError("Need one output path per variant")
+        check_variants(self.variants)
+        if self.settings.outside_range != "skip":
+            raise ValueError("Sweeps only support outside_range='skip'")
+        self.running = True
+        video = None
+        writers = []
+        self.engines = []
+        try:
+            video = open_reader(input_path, self.settings)
+            frame_size = (int(video.get(cv2.CAP_PROP_FRAME_WIDTH)), int(video.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            fps = video.get(cv2.CAP_PROP_FPS)
+            first, last = self.settings.frame_range(fps, int(video.get(cv2.CAP_PROP_FRAME_COUNT)))
+            if first and not video.set(cv2.CAP_PROP_POS_FRAMES, first):
+                raise RuntimeError("Input does not support seeking to the start time")
+            total_frames = max(0, last - first) if last is not None else 0
+
+            self.engines = [BlobEngine(settings) for settings in self.variant_settings()]
+            sizes = []
+            for engine, path in zip(self.engines, output_paths):
+                engine.total_frames = total_frames
+                size = engine.settings.output_size(*frame_size)
+                writers.append(open_writer(path, fps, size, engine.settings))
+                sizes.append(size)
+
+            # One engine runs the motion analysis for each distinct flow configuration
+            flows = {}
+            for engine in self.engines:
+                flows.setdefault(self._key(engine, FLOW_SETTINGS), engine)
+
+            frame_count = 0
+            while self.running and not (total_frames and frame_count >= total_frames):
+                ret, frame = video.read()
+                if not ret:
+                    break
+                frame_count += 1
+                if frame_count == 1:
+                    # Engines that reuse another's gray frame still map detections through their ROI
+                    for engine in self.engines:
+                        engine._setup_roi(frame)
+                grays, masks, static = {}, {}, set()
+                for key, engine in flows.items():
+                    gray_key = self._key(engine, GRAY_SETTINGS)
+                    if gray_key not in grays:
+                        grays[gray_key] = engine._analysis_gray(frame)
+                    gray = grays[gray_key]
+                    if engine.prev_gray is not None:
+                        if engine._is_static(engine.prev_gray, gray):
+                            static.add(key)
+                        else:
+                            masks[key] = engine._motion_mask(engine.prev_gray, gray)
+                    engine.prev_gray = gray
+
+                detections = {}
+                last = len(self.engines) - 1
+                for i, (engine, writer, size) in enumerate(zip(self.engines, writers, sizes)):
+                    key = self._key(engine, MOTION_SETTINGS)
+                    if key not in detections:
+                        flow_key = self._key(engine, FLOW_SETTINGS)
+                        if flow_key in masks:
+                            gray = grays[self._key(engine, GRAY_SETTINGS)]
+                            detections[key] = engine._to_source(engine.blob_detector.detect(gray, masks[flow_key]))
+                        elif flow_key in static:
+                            detections[key] = STATIC_FRAME
+                        else:
+                            detections[key] = np.empty((0, 3))
+                    tracks, _ = engine.analyze_frame(frame, detections[key])
+                    # Drawing happens in place, so every variant but the last gets its own copy
+                    processed_frame = engine.render_output(frame if i == last else frame.copy(), tracks, frame_count, size)
+                    writer.write(processed_frame)
+                    if i == 0:
+                        preview = processed_frame
+
+                if self.on_progress and frame_count % self.progress_every == 0:
+                    self.on_progress(frame_count, total_frames, preview)
+            return frame_count
+        finally:
+            if video is not None:
+                video.release()
+            for writer in writers:
+                writer.release()
+            for engine in self.engines:
+                engine.close()
+            self.running = False
+
+    @staticmethod
+    def _key(engine, names):
+        # Lists (rois) are made hashable
+        return tuple(
+            tuple(map(tuple, value)) if isinstance(value, list) else value
+            for value in (getattr(engine.settings, name) for name in names)
+        )
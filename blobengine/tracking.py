@@ -0,0 +1,253 @@
+import numpy as np
+
+from .spatial import grid_candidates
+
+MAX_AGE = 50
+MAX_ACTIVITY = 200
+
+
+class Tracks:
+    # Immutable per-frame tracker snapshot; rows are in track order
+    __slots__ = ("ids", "centers", "sizes", "areas", "ages", "activity")
+
+    def __init__(self, ids, centers, sizes, areas, ages, activity):
+        self.ids = ids
+        self.centers = centers
+        self.sizes = sizes
+        self.areas = areas
+        self.ages = ages
+        self.activity = activity
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def empty(cls):
+        return cls(
+            np.empty(0, np.int64),
+            np.empty((0, 2), np.int64),
+            np.empty(0, np.float64),
+            np.empty(0, np.float64),
+            np.empty(0, np.int64),
+            np.empty(0, np.float64),
+        )
+
+    @classmethod
+    def from_dict(cls, objects):
+        if not objects:
+            return cls.empty()
+        values = list(objects.values())
+        return cls(
+            np.fromiter(objects.keys(), np.int64, len(objects)),
+            np.array([data["center"] for data in values], np.int64).reshape(-1, 2),
+            np.array([data["size"] for data in values], np.float64),
+            np.array([data["area"] for data in values], np.float64),
+            np.array([data["age"] for data in values], np.int64),
+            np.array([data["activity"] for data in values], np.float64),
+        )
+
+    def to_dict(self):
+        return {
+            oid: {
+                "center": (cx, cy),
+                "size": size,
+                "area": area,
+                "age": age,
+                "activity": activity,
+                "is_yolo": False,
+            }
+            for oid, (cx, cy), size, area, age, activity in zip(
+                self.ids.tolist(),
+                self.centers.tolist(),
+                self.sizes.tolist(),
+                self.areas.tolist(),
+                self.ages.tolist(),
+                self.activity.tolist(),
+            )
+        }
+
+    def with_ids(self, ids):
+        return Tracks(np.asarray(ids, np.int64), self.centers, self.sizes, self.areas, self.ages, self.activity)
+
+
+class DictTracker:
+    # Reference tracker: one dict per object, Python loops over all pairs
+    name = "dict"
+
+    def __init__(self):
+        self.objects = {}
+        self.object_id = 0
+
+    def snapshot(self):
+        return Tracks.from_dict(self.objects)
+
+    def assign(self, detections):
+        # detections: (M, 4) array of cx, cy, size, area
+        tracked_objects = [(int(cx), int(cy), size, area, None) for cx, cy, size, area in np.asarray(detections).tolist()]
+
+        current_objects = {}
+        for cx, cy, size, area, obj_id in tracked_objects:
+            key = obj_id if obj_id is not None else (cx, cy)
+            current_objects[key] = (cx, cy, size, area)
+
+        updated_objects = {}
+        for key, (cx, cy, size, area) in current_objects.items():
+            matched = False
+            if key in self.objects:
+                prev_cx, prev_cy = self.objects[key]["center"]
+                dist = ((cx - prev_cx) ** 2 + (cy - prev_cy) ** 2) ** 0.5
+                new_cx = int(cx * 0.5 + prev_cx * 0.5)
+                new_cy = int(cy * 0.5 + prev_cy * 0.5)
+                new_size = size * 0.6 + self.objects[key]["size"] * 0.4
+                updated_objects[key] = {
+                    "center": (new_cx, new_cy),
+                    "size": new_size,
+                    "area": area,
+                    "age": min(self.objects[key]["age"] + 1, MAX_AGE),
+                    "activity": min(self.objects[key]["activity"] + dist * 0.3, MAX_ACTIVITY),
+                    "is_yolo": False,
+                }
+                matched = True
+            elif isinstance(key, tuple):
+                for oid, data in self.objects.items():
+                    prev_cx, prev_cy = data["center"]
+                    dist = ((cx - prev_cx) ** 2 + (cy - prev_cy) ** 2) ** 0.5
+                    if dist < 50 + size * 0.2:
+                        new_cx = int(cx * 0.5 + prev_cx * 0.5)
+                        new_cy = int(cy * 0.5 + prev_cy * 0.5)
+                        new_size = size * 0.6 + data["size"] * 0.4
+                        updated_objects[oid] = {
+                            "center": (new_cx, new_cy),
+                            "size": new_size,
+                            "area": area,
+                            "age": min(data["age"] + 1, MAX_AGE),
+                            "activity": min(data["activity"] + dist * 0.3, MAX_ACTIVITY),
+                            "is_yolo": False,
+                        }
+                        matched = True
+                        break
+            if not matched:
+                self.object_id += 1
+                updated_objects[self.object_id] = {
+                    "center": (cx, cy),
+                    "size": size,
+                    "area": area,
+                    "age": 0,
+                    "activity": 0,
+                    "is_yolo": False,
+                }
+
+        self.objects = {
+            oid: data for oid, data in updated_objects.items()
+            if data["age"] < MAX_AGE or data["activity"] > 5
+        }
+
+    def carry_forward(self):
+        # A frame the motion gate skipped: every track is matched in place, so it ages as a
+        # matched track does while center, size and activity stay put
+        aged = {oid: {**data, "age": min(data["age"] + 1, MAX_AGE)} for oid, data in self.objects.items()}
+        self.objects = {oid: data for oid, data in aged.items() if data["age"] < MAX_AGE or data["activity"] > 5}
+
+
+class ArrayTracker:
+    # Same matching, smoothing and pruning rules as DictTracker, with state held in NumPy
+    # arrays and candidate pairs found through a spatial grid instead of a Python double loop
+    name = "array"
+
+    def __init__(self):
+        self.tracks = Tracks.empty()
+        self.object_id = 0
+
+    @property
+    def objects(self):
+        return self.tracks.to_dict()
+
+    def snapshot(self):
+        return self.tracks
+
+    @staticmethod
+    def _dedupe(detections):
+        # Detections sharing an integer center collapse like dict keys: first position, last values
+        if len(detections) < 2:
+            return detections
+        _, first, inverse = np.unique(detections[:, :2], axis=0, return_index=True, return_inverse=True)
+        if len(first) == len(detections):
+            return detections
+        last = np.zeros(len(first), np.int64)
+        np.maximum.at(last, inverse.reshape(-1), np.arange(len(detections)))
+        return detections[last[np.argsort(first)]]
+
+    def assign(self, detections):
+        detections = self._dedupe(np.asarray(detections, np.float64).reshape(-1, 4))
+        tracks = self.tracks
+        m, n = len(detections), len(tracks)
+        xy = detections[:, :2]
+        gate = 50 + detections[:, 2] * 0.2
+
+        # Each detection takes the first track (in track order) inside its gate
+        match = np.full(m, n, np.int64)
+        if m and n:
+            qi, pj = grid_candidates(xy, tracks.centers, gate.max())
+            delta = xy[qi] - tracks.centers[pj]
+            dist = np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+            inside = dist < gate[qi]
+            np.minimum.at(match, qi[inside], pj[inside])
+        matched = match < n
+
+        # A track matched by several detections keeps its first position and the last detection's values
+        rows = np.arange(m)
+        matched_rows, matched_tracks = rows[matched], match[matched]
+        track_index, first = np.unique(matched_tracks, return_index=True)
+        _, last_reversed = np.unique(matched_tracks[::-1], return_index=True)
+        first_rows = matched_rows[first]
+        last_rows = matched_rows[len(matched_rows) - 1 - last_reversed]
+
+        det = detections[last_rows]
+        prev_centers = tracks.centers[track_index]
+        delta = det[:, :2] - prev_centers
+        dist = np.sqrt(delta[:, 0] ** 2 + delta[:, 1] ** 2)
+        updated = Tracks(
+            tracks.ids[track_index],
+            np.trunc(det[:, :2] * 0.5 + prev_centers * 0.5).astype(np.int64),
+            det[:, 2] * 0.6 + tracks.sizes[track_index] * 0.4,
+            det[:, 3],
+            np.minimum(tracks.ages[track_index] + 1, MAX_AGE),
+            np.minimum(tracks.activity[track_index] + dist * 0.3, MAX_ACTIVITY),
+        )
+
+        new_rows = rows[~matched]
+        new = detections[new_rows]
+        created = Tracks(
+            self.object_id + 1 + np.arange(len(new_rows), dtype=np.int64),
+            new[:, :2].astype(np.int64),
+            new[:, 2],
+            new[:, 3],
+            np.zeros(len(new_rows), np.int64),
+            np.zeros(len(new_rows), np.float64),
+        )
+        self.object_id += len(new_rows)
+
+        order = np.argsort(np.concatenate((first_rows, new_rows)), kind="stable")
+        keep = np.concatenate((updated.ages, created.ages))[order]
+        activity = np.concatenate((updated.activity, created.activity))[order]
+        order = order[(keep < MAX_AGE) | (activity > 5)]
+        self.tracks = Tracks(*(np.concatenate((getattr(updated, name), getattr(created, name)))[order] for name in Tracks.__slots__))
+
+    def carry_forward(self):
+        tracks = self.tracks
+        ages = np.minimum(tracks.ages + 1, MAX_AGE)
+        keep = (ages < MAX_AGE) | (tracks.activity > 5)
+        self.tracks = Tracks(tracks.ids[keep], tracks.centers[keep], tracks.sizes[keep], tracks.areas[keep], ages[keep], tracks.activity[keep])
+
+
+TRACKERS = {
+    DictTracker.name: DictTracker,
+    ArrayTracker.name: ArrayTracker,
+}
+
+
+def create_tracker(settings):
+    try:
+        return TRACKERS[settings.tracker]()
+    except KeyError:
+        raise ValueError(f"Unknown tracker: {settings.tracker}") from None
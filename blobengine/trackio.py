@@ -0,0 +1,163 @@
+import csv
+import glob
+import json
+import os
+
+import numpy as np
+
+from .tracking import Tracks
+
+# One row per track per frame; frame is the engine's 1-based frame number
+COLUMNS = ("frame", "id", "cx", "cy", "size", "area", "age", "activity")
+_INTEGER = ("frame", "id", "cx", "cy", "age")
+
+
+def _segments(path):
+    return sorted(glob.glob(os.path.join(path, "tracks-*.npz")))
+
+
+def _meta_path(path):
+    # A directory export keeps meta.json inside it, a .csv export next to it
+    if path.lower().endswith(".csv"):
+        return f"{path}.meta.json"
+    return os.path.join(path, "meta.json")
+
+
+class TrackWriter:
+    # Streams per-frame tracker snapshots to disk, chunk_frames frames at a time, so memory
+    # stays constant however long the video. A directory gets one tracks-NNNNN.npz segment
+    # per chunk (a column per field plus per-frame row counts) and a meta.json; a .csv
+    # path gets the same rows appended and flushed at every chunk, and a <path>.meta.json.
+    def __init__(self, path, chunk_frames=256, meta=None):
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.meta = dict(meta or {}, columns=COLUMNS)
+        self.frames = self.segments = 0
+        self._pending = []
+        self.csv = path.lower().endswith(".csv")
+        if self.csv:
+            self._file = open(path, "w", newline="")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(COLUMNS)
+        else:
+            os.makedirs(path, exist_ok=True)
+            for segment in _segments(path):
+                os.remove(segment)
+        self._write_meta()
+
+    def _write_meta(self):
+        with open(_meta_path(self.path), "w") as f:
+            json.dump(dict(self.meta, frames=self.frames), f, indent=1)
+
+    def append(self, frame_count, tracks):
+        self._pending.append((frame_count, tracks))
+        self.frames += 1
+        if len(self._pending) >= self.chunk_frames:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        frames = np.array([frame_count for frame_count, _ in self._pending], np.int64)
+        chunk = [tracks for _, tracks in self._pending]
+        counts = np.array([len(tracks) for tracks in chunk], np.int64)
+        centers = np.concatenate([tracks.centers for tracks in chunk]).reshape(-1, 2)
+        columns = {
+            "frame": np.repeat(frames, counts),
+            "id": np.concatenate([tracks.ids for tracks in chunk]),
+            "cx": centers[:, 0],
+            "cy": centers[:, 1],
+            "size": np.concatenate([tracks.sizes for tracks in chunk]),
+            "area": np.concatenate([tracks.areas for tracks in chunk]),
+            "age": np.concatenate([tracks.ages for tracks in chunk]),
+            "activity": np.concatenate([tracks.activity for tracks in chunk]),
+        }
+        self._pending = []
+        if self.csv:
+            self._writer.writerows(zip(*(columns[name].tolist() for name in COLUMNS)))
+            self._file.flush()
+        else:
+            # Written under a temporary name so a reader never sees half a segment
+            path = os.path.join(self.path, f"tracks-{self.segments:05d}.npz")
+            temp_path = f"{path}.tmp-{os.getpid()}.npz"
+            np.savez(temp_path, frames=frames, counts=counts, **columns)
+            os.replace(temp_path, path)
+        self._write_meta()
+        self.segments += 1
+
+    def close(self):
+        self.flush()
+        if self.csv:
+            self._file.close()
+
+
+class TrackReader:
+    # Reads a TrackWriter export back one frame at a time, a segment (or CSV chunk) in
+    # memory at once. at(frame_count) must be called with non-decreasing frame numbers;
+    # frames without rows get empty Tracks.
+    def __init__(self, path):
+        if not os.path.exists(path):
+            raise RuntimeError(f"Track data not found: {path}")
+        self.path = path
+        self.meta = {}
+        if os.path.exists(_meta_path(path)):
+            with open(_meta_path(path)) as f:
+                self.meta = json.load(f)
+        self._frames = self._read()
+        self._next = next(self._frames, None)
+
+    def _read(self):
+        if os.path.isdir(self.path):
+            for segment in _segments(self.path):
+                with np.load(segment) as data:
+                    columns = {name: data[name] for name in COLUMNS}
+                    frames, counts = data["frames"], data["counts"]
+                ends = np.cumsum(counts)
+                for frame_count, end, count in zip(frames.tolist(), ends.tolist(), counts.tolist()):
+                    yield frame_count, self._tracks(columns, slice(end - count, end))
+        else:
+            with open(self.path, newline="") as f:
+                reader = csv.reader(f)
+                header = next(reader, None)
+                if header is None or tuple(header) != COLUMNS:
+                    raise ValueError(f"Not a track export: {self.path}")
+                rows = []
+                for row in reader:
+                    if rows and row[0] != rows[-1][0]:
+                        yield self._csv_frame(rows)
+                        rows = []
+                    rows.append(row)
+                if rows:
+                    yield self._csv_frame(rows)
+
+    def _csv_frame(self, rows):
+        values = np.array(rows, np.float64).reshape(-1, len(COLUMNS))
+        columns = {
+            name: values[:, i].astype(np.int64) if name in _INTEGER else values[:, i]
+            for i, name in enumerate(COLUMNS)
+        }
+        return int(columns["frame"][0]), self._tracks(columns, slice(None))
+
+    @staticmethod
+    def _tracks(columns, rows):
+        return Tracks(
+            columns["id"][rows],
+            np.column_stack((columns["cx"][rows], columns["cy"][rows])),
+            columns["size"][rows],
+            columns["area"][rows],
+            columns["age"][rows],
+            columns["activity"][rows],
+        )
+
+    def __iter__(self):
+        while self._next is not None:
+            item = self._next
+            self._next = next(self._frames, None)
+            yield item
+
+    def at(self, frame_count):
+        while self._next is not None and self._next[0] < frame_count:
+            self._next = next(self._frames, None)
+        if self._next is not None and self._next[0] == frame_count:
+            return self._next[1]
+        return Tracks.empty()
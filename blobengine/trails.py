@@ -0,0 +1,136 @@
+import cv2
+import numpy as np
+
+
+def trail_weight(opacity, frames):
+    # Total weight the original chained addWeighted blend gives its frames, used so the
+    # incremental modes keep the same overall trail strength
+    remaining = 1.0
+    for i in range(1, frames + 1):
+        remaining *= 1 - opacity * i / frames
+    return 1 - remaining
+
+
+class BlendTrail:
+    # Original trail: re-blend the last `length` frames every step (O(length) per frame).
+    # Frames live in a preallocated ring and the chained addWeighted runs in place, so the
+    # output is unchanged but nothing is allocated per frame.
+    name = "blend"
+
+    def __init__(self, length):
+        self.length = length
+        self.ring = None
+
+    @property
+    def history(self):
+        return self.length - 1
+
+    def _allocate(self, shape):
+        self.ring = np.empty((self.length,) + shape, np.uint8)
+        self.output = np.empty(shape, np.uint8)
+        self.count = self.head = 0
+
+    def update(self, frame, opacity):
+        if self.ring is None or self.ring.shape[1:] != frame.shape:
+            self._allocate(frame.shape)
+
+        if self.count < self.length:
+            self.ring[self.count] = frame
+            self.count += 1
+        else:
+            self.ring[self.head] = frame
+            self.head = (self.head + 1) % self.length
+
+        n = self.count
+        trail_frame = self.output
+        trail_frame.fill(0)
+        for i in range(n):
+            alpha = opacity * (i + 1) / n
+            past_frame = self.ring[(self.head + i) % self.length]
+            cv2.addWeighted(trail_frame, 1 - alpha, past_frame, alpha, 0, dst=trail_frame)
+        return trail_frame
+
+
+class WindowTrail:
+    # Linearly ramped window over the last `length` frames (newest weighs most). A
+    # preallocated ring buffer plus integer running sums S = sum(b_i) and T = sum(i * b_i)
+    # make each step O(1) in frames: T' = T - S + L * new, S' = S - oldest + new.
+    name = "window"
+
+    def __init__(self, length):
+        self.length = length
+        self.ring = None
+        # Sums are exact integers; uint16 holds them for short trails, float32 up to 2**24
+        self.dtype = np.uint16 if 255 * length * (length + 1) // 2 < 2 ** 16 else np.float32
+
+    @property
+    def history(self):
+        return self.length - 1
+
+    def _allocate(self, shape):
+        self.ring = np.empty((self.length,) + shape, np.uint8)
+        self.total = np.zeros(shape, self.dtype)
+        self.weighted = np.zeros(shape, self.dtype)
+        self.incoming = np.empty(shape, self.dtype)
+        self.outgoing = np.empty(shape, self.dtype)
+        self.output = np.empty(shape, np.uint8)
+        self.count = self.head = 0
+
+    def update(self, frame, opacity):
+        if self.ring is None or self.ring.shape[1:] != frame.shape:
+            self._allocate(frame.shape)
+
+        np.copyto(self.incoming, frame)
+        if self.count < self.length:
+            self.count += 1
+            slot = self.count - 1
+        else:
+            slot = self.head
+            self.head = (self.head + 1) % self.length
+            np.copyto(self.outgoing, self.ring[slot])
+            cv2.subtract(self.weighted, self.total, dst=self.weighted)
+            cv2.subtract(self.total, self.outgoing, dst=self.total)
+        cv2.scaleAdd(self.incoming, float(self.count), self.weighted, dst=self.weighted)
+        cv2.add(self.total, self.incoming, dst=self.total)
+        self.ring[slot] = frame
+
+        n = self.count
+        gain = trail_weight(opacity, n) / (n * (n + 1) / 2)
+        return cv2.convertScaleAbs(self.weighted, dst=self.output, alpha=gain)
+
+
+class DecayTrail:
+    # Exponential decay accumulator: no frame history at all, span of roughly `length` frames
+    name = "decay"
+
+    def __init__(self, length):
+        self.length = length
+        self.rate = 2.0 / (length + 1)
+        self.accumulator = None
+
+    @property
+    def history(self):
+        return 3 * self.length
+
+    def update(self, frame, opacity):
+        if self.accumulator is None or self.accumulator.shape != frame.shape:
+            self.accumulator = frame.astype(np.float32)
+            self.output = np.empty(frame.shape, np.uint8)
+        else:
+            cv2.accumulateWeighted(frame, self.accumulator, self.rate)
+        return cv2.convertScaleAbs(self.accumulator, dst=self.output, alpha=trail_weight(opacity, self.length))
+
+
+TRAIL_MODES = {
+    BlendTrail.name: BlendTrail,
+    WindowTrail.name: WindowTrail,
+    DecayTrail.name: DecayTrail,
+}
+
+
+def create_trail(settings):
+    try:
+        trail = TRAIL_MODES[settings.trail_mode]
+    except KeyError:
+        raise ValueError(f"Unknown trail mode: {settings.trail_mode}") from None
+    return trail(max(1, int(settings.trail_length)))
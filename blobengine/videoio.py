@@ -0,0 +1,244 @@
+import collections
+import os
+import re
+import shutil
+import subprocess
+import threading
+
+import cv2
+import numpy as np
+
+# Output encoders. "opencv" is the original cv2.VideoWriter XVID path, which has no rate
+# control; the others stream raw BGR frames into an ffmpeg subprocess at settings.bitrate.
+# Values are the ffmpeg codec and extra arguments per container extension.
+ENCODERS = {
+    "opencv": None,
+    "mpeg4": ("mpeg4", {".avi": ["-vtag", "xvid"]}),
+    "h264": ("libx264", {}),
+    "hevc": ("libx265", {".mp4": ["-tag:v", "hvc1"], ".mov": ["-tag:v", "hvc1"]}),
+}
+# Encoders that understand -preset
+PRESET_ENCODERS = ("libx264", "libx265")
+DECODERS = ("opencv", "ffmpeg")
+
+
+def find_ffmpeg():
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        raise RuntimeError("ffmpeg not found on PATH")
+    return ffmpeg
+
+
+class _StderrTail:
+    # Drains a subprocess' stderr on a thread so it never blocks, keeping the last lines
+    # for error messages; every line, then None at EOF, is also handed to `on_line`
+    def __init__(self, stream, on_line=None):
+        self.lines = collections.deque(maxlen=20)
+        self.on_line = on_line
+        self.thread = threading.Thread(target=self._drain, args=(stream,), daemon=True)
+        self.thread.start()
+
+    def _drain(self, stream):
+        for raw in iter(stream.readline, b""):
+            line = raw.decode(errors="replace").rstrip()
+            self.lines.append(line)
+            if self.on_line:
+                self.on_line(line)
+        if self.on_line:
+            self.on_line(None)
+
+    def text(self):
+        self.thread.join(timeout=1)
+        return "\n".join(self.lines)
+
+
+class FFmpegWriter:
+    # cv2.VideoWriter-like writer piping raw frames into ffmpeg; the container follows the
+    # output extension (.mp4, .mkv, .avi, ...)
+    def __init__(self, path, fps, size, codec="libx264", bitrate=None, preset=None, threads=0, extra_args=()):
+        width, height = size
+        command = [
+            find_ffmpeg(), "-y", "-hide_banner", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-r", f"{fps or 30:g}", "-i", "pipe:0",
+            "-c:v", codec, "-pix_fmt", "yuv420p",
+        ]
+        if bitrate:
+            command += ["-b:v", f"{int(bitrate)}k"]
+        if preset and codec in PRESET_ENCODERS:
+            command += ["-preset", preset]
+        if threads:
+            command += ["-threads", str(int(threads))]
+        command += list(extra_args) + [path]
+        self.size = (width, height)
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.stderr = _StderrTail(self.process.stderr)
+
+    def isOpened(self):
+        return self.process.poll() is None
+
+    def write(self, frame):
+        if frame.shape[1::-1] != self.size:
+            raise ValueError(f"Frame size {frame.shape[1::-1]} does not match writer size {self.size}")
+        try:
+            self.process.stdin.write(memoryview(np.ascontiguousarray(frame)).cast("B"))
+        except BrokenPipeError:
+            raise RuntimeError(f"ffmpeg encoder exited:\n{self.stderr.text()}") from None
+
+    def release(self):
+        if self.process.stdin.closed:
+            return
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        if self.process.wait() != 0:
+            raise RuntimeError(f"ffmpeg encoder failed:\n{self.stderr.text()}")
+
+
+class FFmpegReader:
+    # cv2.VideoCapture-like reader decoding through ffmpeg. Accepts anything ffmpeg opens:
+    # files, "-" for stdin, and image sequences such as frames_%04d.png (read at `rate` fps)
+    _OUTPUT_STREAM = re.compile(r"Stream #0:\d+.*: Video: rawvideo.*?, (\d+)x(\d+).*?, ([\d.]+) (?:fps|tbr)")
+    _DURATION = re.compile(r"Duration: (\d+):(\d+):([\d.]+)")
+
+    def __init__(self, source, rate=30):
+        self.source = source
+        self.rate = rate
+        self._start()
+        if self._duration:
+            self.frame_count = round(self._duration * self.fps)
+
+    def _start(self, seek=0.0):
+        command = [find_ffmpeg(), "-hide_banner", "-nostats", "-loglevel", "info"]
+        if seek:
+            command += ["-ss", f"{seek:.6f}"]
+        if "%" in self.source:
+            command += ["-framerate", f"{self.rate:g}"]
+        command += ["-i", "pipe:0" if self.source == "-" else self.source, "-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1"]
+        self.width = self.height = self.frame_count = 0
+        self.fps = 0.0
+        self._duration = None
+        header = threading.Event()
+        stdin = None if self.source == "-" else subprocess.DEVNULL
+        self.process = subprocess.Popen(command, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.stderr = _StderrTail(self.process.stderr, lambda line: self._parse(line, header))
+        # ffmpeg prints the stream layout before it writes the first frame
+        header.wait()
+        if not self.width:
+            self.process.kill()
+            self.process.wait()
+            raise RuntimeError(f"ffmpeg could not open {self.source}:\n{self.stderr.text()}")
+        self._frame_bytes = self.width * self.height * 3
+
+    def _parse(self, line, header):
+        if header.is_set():
+            return
+        if line is None:
+            header.set()
+            return
+        duration = self._DURATION.search(line)
+        if duration:
+            hours, minutes, seconds = duration.groups()
+            self._duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+        stream = self._OUTPUT_STREAM.search(line)
+        if stream:
+            self.width, self.height = int(stream.group(1)), int(stream.group(2))
+            self.fps = float(stream.group(3))
+            header.set()
+
+    def isOpened(self):
+        return self.process.stdout is not None and not self.process.stdout.closed
+
+    def get(self, prop):
+        # The subset of VideoCapture properties the pipelines use
+        return {
+            cv2.CAP_PROP_FRAME_WIDTH: self.width,
+            cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+            cv2.CAP_PROP_FPS: self.fps,
+            cv2.CAP_PROP_FRAME_COUNT: self.frame_count,
+        }.get(prop, 0)
+
+    def set(self, prop, value):
+        # Seeking restarts ffmpeg at the frame's timestamp; not possible on stdin
+        if prop != cv2.CAP_PROP_POS_FRAMES or self.source == "-" or not self.fps:
+            return False
+        frame_count = self.frame_count
+        self.release()
+        self._start(value / self.fps)
+        self.frame_count = frame_count
+        return True
+
+    def read(self):
+        frame = np.empty((self.height, self.width, 3), np.uint8)
+        if self.process.stdout.readinto(memoryview(frame).cast("B")) < self._frame_bytes:
+            return False, None
+        return True, frame
+
+    def release(self):
+        if self.process.stdout.closed:
+            return
+        self.process.stdout.close()
+        if self.process.poll() is None:
+            self.process.terminate()
+        self.process.wait()
+
+
+def open_reader(path, settings):
+    if settings.decoder == "ffmpeg" or path == "-":
+        return FFmpegReader(path)
+    if settings.decoder != "opencv":
+        raise ValueError(f"Unknown decoder: {settings.decoder}")
+    video = cv2.VideoCapture(path)
+    if not video.isOpened():
+        raise RuntimeError("Failed to open video")
+    return video
+
+
+def open_writer(path, fps, size, settings):
+    try:
+        encoder = ENCODERS[settings.encoder]
+    except KeyError:
+        raise ValueError(f"Unknown encoder: {settings.encoder}") from None
+    if encoder is None:
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"XVID"), fps, size)
+        if not writer.isOpened():
+            raise RuntimeError("Failed to initialize video writer")
+        return writer
+    codec, container_args = encoder
+    extra_args = container_args.get(os.path.splitext(path)[1].lower(), [])
+    return FFmpegWriter(
+        path, fps, size, codec,
+        bitrate=settings.bitrate, preset=settings.encoder_preset, threads=settings.encoder_threads, extra_args=extra_args,
+    )
+
+
+class SegmentWriter:
+    # Writer for unbounded output: starts a new file every segment_frames frames, named
+    # after the output path with a counter (out.avi -> out_00000.avi, out_00001.avi, ...)
+    def __init__(self, path, fps, size, settings, segment_frames):
+        self.stem, self.ext = os.path.splitext(path)
+        self.fps = fps
+        self.size = size
+        self.settings = settings
+        self.segment_frames = max(1, int(segment_frames))
+        self.paths = []
+        self.writer = None
+        self.frames = 0
+
+    def isOpened(self):
+        return True
+
+    def write(self, frame):
+        if self.writer is None or self.frames >= self.segment_frames:
+            self.release()
+            path = f"{self.stem}_{len(self.paths):05d}{self.ext}"
+            self.writer = open_writer(path, self.fps, self.size, self.settings)
+            self.paths.append(path)
+            self.frames = 0
+        self.writer.write(frame)
+        self.frames += 1
+
+    def release(self):
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
@@ -0,0 +1,30 @@
+import hashlib
+
+import pytest
+
+from benchmarks.synthetic import synthetic_frames, write_video
+from blobengine import BlobPipeline, BlobSettings
+
+
+def digest(path):
+    with open(path, "rb") as f:
+        return hashlib.md5(f.read()).hexdigest()
+
+
+@pytest.fixture(scope="session")
+def clip(tmp_path_factory):
+    # Short synthetic clip of moving discs, shared by every test
+    path = str(tmp_path_factory.mktemp("clips") / "clip.avi")
+    write_video(path, synthetic_frames(320, 240, 60, 12, seed=1))
+    return path
+
+
+@pytest.fixture
+def render(clip, tmp_path):
+    # render(name, settings, **pipeline_options) runs a BlobPipeline on the clip into
+    # tmp_path/name and returns the output's md5
+    def render(name, settings=None, **options):
+        path = str(tmp_path / name)
+        BlobPipeline(settings or BlobSettings(), **options).run(clip, path)
+        return digest(path)
+    return render
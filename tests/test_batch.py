@@ -0,0 +1,157 @@
+import json
+import os
+from concurrent.futures import Future
+
+from blobengine import BlobSettings, batch
+from blobengine.batch import BatchRunner, JobQueue
+
+run_job = batch._run_job
+
+
+def crash_or_run(job_id, input_path, *args):
+    # Stands in for _run_job in the pool processes: a "crash" input kills its worker
+    if "crash" in os.path.basename(input_path):
+        os._exit(1)
+    return run_job(job_id, input_path, *args)
+
+
+def test_queue_persists(tmp_path):
+    path = str(tmp_path / "queue.json")
+    queue = JobQueue(path)
+    first = queue.add("a.avi", str(tmp_path / "out/a.avi"), BlobSettings(rois=[(0, 0, 10, 10)]))
+    second = queue.add("b.avi", str(tmp_path / "out/b.avi"))
+    second["status"] = "running"
+    queue.save()
+
+    loaded = JobQueue(path)
+    assert [job["id"] for job in loaded.jobs] == [first["id"], second["id"]] == [1, 2]
+    # Interrupted while running: queued again
+    assert [job["status"] for job in loaded.jobs] == ["pending", "pending"]
+    assert BlobSettings.from_dict(loaded.jobs[0]["settings"]).rois == [[0, 0, 10, 10]]
+    # Loaded tuples compare equal, so re-adding the same render is a no-op
+    loaded.jobs[0]["status"] = "done"
+    assert loaded.add("a.avi", str(tmp_path / "out/a.avi"), BlobSettings(rois=[(0, 0, 10, 10)]))["status"] == "done"
+    assert not os.path.exists(f"{path}.tmp-{os.getpid()}")
+
+
+def test_add_requeues_changed_and_failed_jobs(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.json"))
+    job = queue.add("a.avi", "a_out.avi")
+    job.update(status="done", attempts=1, frames=60)
+    assert queue.add("a.avi", "a_out.avi") is job and job["status"] == "done"
+    queue.add("a.avi", "a_out.avi", BlobSettings(min_area=80))
+    assert job["status"] == "pending" and job["attempts"] == 0 and job["frames"] == 0
+    job["status"] = "failed"
+    queue.add("a.avi", "a_out.avi", BlobSettings(min_area=80))
+    assert job["status"] == "pending" and len(queue.jobs) == 1
+
+
+def test_add_leaves_running_job_alone(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.json"))
+    job = queue.add("a.avi", "a_out.avi")
+    job.update(status="running", attempts=1)
+    assert queue.add("a.avi", "a_out.avi", BlobSettings(min_area=80)) is job
+    assert job["status"] == "running" and job["attempts"] == 1
+    assert job["settings"]["min_area"] == BlobSettings().min_area
+    assert not queue.pending()
+
+
+def test_add_directory_and_manifest(tmp_path):
+    for name in ("b.mp4", "a.avi", "notes.txt"):
+        (tmp_path / name).write_bytes(b"")
+    queue = JobQueue(str(tmp_path / "queue.json"))
+    jobs = queue.add_directory(str(tmp_path), str(tmp_path / "out"))
+    assert [os.path.basename(job["output"]) for job in jobs] == ["a_blobs.avi", "b_blobs.avi"]
+
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps(["a.avi", {"input": "c.mov", "output": "c.avi", "settings": {"min_area": 90}}]))
+    jobs = queue.add_manifest(str(manifest), str(tmp_path / "out"), BlobSettings(min_area=70))
+    assert jobs[0]["settings"]["min_area"] == 70 and jobs[0]["status"] == "pending"
+    assert jobs[1]["output"] == str(tmp_path / "c.avi") and jobs[1]["settings"]["min_area"] == 90
+    assert len(queue.jobs) == 3
+
+
+def test_retries_then_fails(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.json"))
+    job = queue.add("a.avi", "a_out.avi")
+    runner = BatchRunner(queue, workers=1, retries=1)
+    for attempt, status in ((1, "pending"), (2, "failed")):
+        job.update(status="running", attempts=attempt)
+        future = Future()
+        future.set_exception(RuntimeError("Failed to open video"))
+        runner._collect(future, job)
+        assert job["status"] == status and job["error"] == "Failed to open video"
+    assert runner.finished == [job]
+    queue.retry_failed()
+    assert job["status"] == "pending" and job["attempts"] == 0 and not job["error"]
+
+
+def admit(runner, running, budget):
+    # As run() does: every admitted job joins the running ones before the next is considered
+    admitted = []
+    for job in runner._admit(running, budget):
+        running[object()] = job
+        admitted.append(job["id"])
+    return admitted
+
+
+def test_memory_budget_admission(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.json"))
+    jobs = [queue.add(f"{name}.avi", f"{name}_out.avi") for name in "abcd"]
+    for job, memory in zip(jobs, (600, 900, 300, 200)):
+        job["memory_mb"] = memory
+    runner = BatchRunner(queue, workers=3)
+    # b does not fit next to a, so the smaller c further down starts instead
+    assert admit(runner, {}, 1000) == [1, 3]
+    # Without a budget only the worker limit applies
+    assert admit(runner, {}, None) == [1, 2, 3]
+    jobs[0]["status"] = jobs[2]["status"] = "running"
+    assert admit(runner, {"a": jobs[0], "c": jobs[2]}, None) == [2]
+    # A job too large for the budget still runs alone, but not next to another
+    for job in jobs[0], jobs[2], jobs[3]:
+        job["status"] = "done"
+    jobs[1]["memory_mb"] = 5000
+    assert admit(runner, {}, 1000) == [2]
+    assert admit(runner, {"x": {"memory_mb": 100}}, 1000) == []
+
+
+def test_estimate(clip):
+    settings = BlobSettings()
+    small = batch.estimate_job_mb(320, 240, settings)
+    assert batch.estimate_job_mb(3840, 2160, settings) > 5 * small
+    assert batch.estimate_job_mb(3840, 2160, BlobSettings(output_resolution="1280x720")) < batch.estimate_job_mb(3840, 2160, settings)
+    job = {"input": clip, "settings": settings.to_dict()}
+    assert BatchRunner._estimate(job) == round(small) and job["total_frames"] == 60
+
+
+def test_broken_pool_is_replaced(clip, tmp_path, monkeypatch):
+    # The crashing job takes its worker down; the pool is rebuilt, the job retried once and
+    # failed, and the job queued behind it still renders
+    monkeypatch.setattr(batch, "_run_job", crash_or_run)
+    queue = JobQueue(str(tmp_path / "queue.json"))
+    crash = queue.add(str(tmp_path / "crash.avi"), str(tmp_path / "out/crash.avi"))
+    good = queue.add(clip, str(tmp_path / "out/clip.avi"))
+    runner = BatchRunner(queue, workers=1, retries=1, progress_every=20)
+    progress = []
+    runner.on_progress = lambda job, written, total, fps: progress.append((job["id"], written, total))
+    finished = runner.run()
+
+    assert {job["id"] for job in finished} == {crash["id"], good["id"]}
+    assert crash["status"] == "failed" and crash["attempts"] == 2 and "worker process died" in crash["error"]
+    assert good["status"] == "done" and good["frames"] == 60 and good["attempts"] == 1
+    assert os.path.exists(good["output"])
+    assert progress and all(job_id == good["id"] and total == 60 for job_id, _, total in progress)
+    # The saved queue agrees
+    saved = {job["id"]: job["status"] for job in JobQueue(queue.path).jobs}
+    assert saved == {crash["id"]: "failed", good["id"]: "done"}
+    assert runner.summary()["done"] == 1 and runner.summary()["failed"] == 1
+
+
+def test_report(tmp_path):
+    runner = BatchRunner(JobQueue(str(tmp_path / "queue.json")))
+    runner.finished = [{"input": "a.avi", "output": "a_out.avi", "status": "done", "attempts": 1, "frames": 60, "seconds": 2.0, "fps": 30.0, "memory_mb": 200, "error": ""}]
+    runner.write_report(str(tmp_path / "report.csv"))
+    runner.write_report(str(tmp_path / "report.json"))
+    assert (tmp_path / "report.csv").read_text().splitlines()[0] == ",".join(batch.REPORT_COLUMNS)
+    assert json.loads((tmp_path / "report.json").read_text())["summary"]["frames"] == 60
+
@@ -0,0 +1,44 @@
+import numpy as np
+
+from benchmarks.synthetic import synthetic_frames
+from blobengine import BlobEngine, BlobSettings
+from blobengine.buffers import BufferPool
+
+
+def test_get_reuses_by_name_shape_and_dtype():
+    pool = BufferPool()
+    gray = pool.get("gray", (4, 6))
+    assert gray.shape == (4, 6) and gray.dtype == np.uint8
+    assert pool.get("gray", [4, 6]) is gray
+    assert pool.get("other", (4, 6)) is not gray
+    resized = pool.get("gray", (8, 6))
+    assert resized is not gray and resized.shape == (8, 6)
+    flow = pool.get("gray", (8, 6), np.float32)
+    assert flow is not resized and flow.dtype == np.float32
+    assert pool.nbytes == flow.nbytes + pool.get("other", (4, 6)).nbytes
+
+
+def test_frame_loop_stops_allocating():
+    # After the first two frames (the first has no previous frame to compare) every
+    # engine and motion buffer is reused
+    engine = BlobEngine(BlobSettings(analysis_scale=0.5))
+    frames = synthetic_frames(320, 240, 6, 8, seed=3)
+    for _, (frame, _) in zip(range(2), frames):
+        engine.analyze_frame(frame)
+    pools = (engine.buffers.buffers, engine.motion.buffers.buffers)
+    before = [dict(pool) for pool in pools]
+    for frame, _ in frames:
+        engine.analyze_frame(frame)
+    for pool, seen in zip(pools, before):
+        assert pool.keys() == seen.keys()
+        assert all(pool[name] is buffer for name, buffer in seen.items())
+
+
+def test_prev_gray_survives_the_next_frame():
+    engine = BlobEngine()
+    frames = synthetic_frames(320, 240, 2, 8, seed=3)
+    engine.analyze_frame(next(frames)[0])
+    prev_gray = engine.prev_gray
+    kept = prev_gray.copy()
+    engine._analysis_gray(next(frames)[0])
+    assert np.array_equal(prev_gray, kept)
@@ -0,0 +1,26 @@
+from dataclasses import replace
+
+from blobengine import BlobSettings
+from blobengine.cache import AnalysisCache
+
+
+def test_cache_replay_matches_fresh_render(render, tmp_path):
+    cache = AnalysisCache(str(tmp_path / "cache"))
+    settings = BlobSettings()
+    fresh = render("fresh.avi", settings)
+    assert render("store.avi", settings, cache=cache) == fresh
+    assert len(cache.entries()) == 1
+    assert render("replay.avi", settings, cache=cache) == fresh
+
+    # A styling change replays the same analysis
+    styled = replace(settings, trail_opacity=0.6, max_connection_distance=40)
+    assert render("styled.avi", styled, cache=cache) == render("styled_fresh.avi", styled)
+    assert len(cache.entries()) == 1
+
+
+def test_cache_replay_with_motion_gate(render, tmp_path):
+    cache = AnalysisCache(str(tmp_path / "cache"))
+    settings = BlobSettings(motion_gate=10)
+    fresh = render("fresh.avi", settings)
+    render("store.avi", settings, cache=cache)
+    assert render("replay.avi", settings, cache=cache) == fresh
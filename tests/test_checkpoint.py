@@ -0,0 +1,84 @@
+import os
+import shutil
+
+import pytest
+
+from blobengine import BlobPipeline, BlobSettings
+from blobengine.checkpoint import Checkpoint, check_resumable
+
+from .conftest import digest
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="checkpointed renders need ffmpeg")
+
+
+def test_load_matches_identity(clip, tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "ckpt"), every=10)
+    identity = checkpoint.identity(clip, "out.avi", BlobSettings(), 10)
+    segment = checkpoint.segment_path(0, ".avi")
+    os.makedirs(checkpoint.directory)
+    open(segment, "wb").close()
+    checkpoint.save({"identity": identity, "segments": [segment], "position": 10})
+    assert checkpoint.load(identity)["position"] == 10
+
+    # Other settings, output format or interval make the checkpoint stale and clear it
+    other = checkpoint.identity(clip, "out.avi", BlobSettings(min_area=80), 10)
+    assert checkpoint.load(other) is None
+    assert not os.path.exists(checkpoint.directory)
+
+
+def test_identity_follows_roi_mask(clip, tmp_path):
+    mask = tmp_path / "mask.png"
+    mask.write_bytes(b"first")
+    settings = BlobSettings(roi_mask=str(mask))
+    before = Checkpoint.identity(clip, "out.avi", settings, 10)
+    mask.write_bytes(b"edited mask")
+    assert Checkpoint.identity(clip, "out.avi", settings, 10) != before
+
+
+def test_clear_keeps_foreign_files(tmp_path):
+    directory = tmp_path / "busy"
+    directory.mkdir()
+    (directory / "notes.txt").write_text("keep me")
+    checkpoint = Checkpoint(str(directory))
+    with pytest.raises(ValueError, match="not empty"):
+        checkpoint.load({})
+    (directory / "state.pkl").write_bytes(b"")
+    (directory / "segment_00000.avi").write_bytes(b"")
+    checkpoint.clear()
+    assert sorted(os.listdir(directory)) == ["notes.txt"]
+
+
+def test_stateful_motion_is_rejected():
+    with pytest.raises(ValueError):
+        check_resumable(BlobSettings(motion_backend="mog2"))
+    with pytest.raises(ValueError):
+        check_resumable(BlobSettings(flow_warm_start=True))
+    check_resumable(BlobSettings())
+
+
+@needs_ffmpeg
+@pytest.mark.parametrize("staged", [True, False])
+def test_resume_matches_uninterrupted_run(clip, tmp_path, staged):
+    settings = BlobSettings()
+    uninterrupted = str(tmp_path / "uninterrupted.avi")
+    BlobPipeline(settings, staged=staged, checkpoint=Checkpoint(str(tmp_path / "a.ckpt"), every=10)).run(clip, uninterrupted)
+
+    # Stopped after the first checkpoint (frames already queued still drain), then rerun
+    output = str(tmp_path / "resumed.avi")
+    checkpoint = Checkpoint(str(tmp_path / "b.ckpt"), every=10)
+    pipeline = BlobPipeline(settings, staged=staged, queue_size=1, checkpoint=checkpoint)
+    pipeline.on_progress = lambda written, total, frame: pipeline.stop()
+    pipeline.run(clip, output)
+    assert os.path.exists(checkpoint.state_path)
+
+    resumed = BlobPipeline(settings, staged=staged, checkpoint=checkpoint)
+    resumed.run(clip, output)
+    assert 10 <= resumed.resumed_at < 60
+    assert digest(output) == digest(uninterrupted)
+    assert not os.path.exists(checkpoint.directory)
+
+
+def test_missing_ffmpeg_is_refused(clip, tmp_path, monkeypatch):
+    monkeypatch.setattr(shutil, "which", lambda name: None)
+    with pytest.raises(RuntimeError, match="ffmpeg"):
+        BlobPipeline(checkpoint=Checkpoint(str(tmp_path / "ckpt"))).run(clip, str(tmp_path / "out.avi"))
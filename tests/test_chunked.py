@@ -0,0 +1,72 @@
+import shutil
+
+import cv2
+import numpy as np
+import pytest
+
+from blobengine import BlobPipeline, BlobSettings, ChunkedPipeline
+from blobengine.chunked import match_boundary
+from blobengine.tracking import Tracks
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="chunked renders need ffmpeg")
+
+
+def tracks(ids, centers, size=10.0):
+    n = len(ids)
+    return Tracks(
+        np.array(ids, np.int64), np.array(centers, np.int64).reshape(-1, 2),
+        np.full(n, size), np.full(n, size * size), np.zeros(n, np.int64), np.zeros(n),
+    )
+
+
+def decoded(path):
+    video = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        ret, frame = video.read()
+        if not ret:
+            break
+        frames.append(frame)
+    video.release()
+    return frames
+
+
+def test_match_boundary_pairs_nearest_within_gate():
+    previous = tracks([1, 2], [(10, 10), (200, 200)])
+    current = tracks([7, 8, 9], [(14, 12), (205, 198), (400, 10)])
+    assert match_boundary(previous, current) == {7: 1, 8: 2}
+    # Each previous track is claimed once, by the closest candidate
+    assert match_boundary(tracks([1], [(0, 0)]), tracks([3, 4], [(30, 0), (5, 0)])) == {4: 1}
+
+
+def test_remap_continues_ids_across_chunks():
+    pipeline = ChunkedPipeline(BlobSettings(), workers=1)
+    first = (None, tracks([1, 2], [(10, 10), (100, 100)]), [1, 2, 3], 30)
+    # Chunk-local ids restart; 5 continues global track 2, 4 and 6 are new
+    second = (tracks([5, 4], [(102, 99), (300, 300)]), tracks([5, 6], [(110, 100), (50, 50)]), [5, 4, 6], 30)
+    assert pipeline._remap([first, second]) == [{1: 1, 2: 2, 3: 3}, {5: 2, 4: 4, 6: 5}]
+    assert pipeline.object_id == 5
+
+
+def test_missing_ffmpeg_is_refused(clip, tmp_path, monkeypatch):
+    monkeypatch.setattr(shutil, "which", lambda name: None)
+    with pytest.raises(RuntimeError, match="ffmpeg"):
+        ChunkedPipeline(BlobSettings(), workers=1).run(clip, str(tmp_path / "out.avi"))
+
+
+@needs_ffmpeg
+def test_single_chunk_matches_pipeline(clip, tmp_path):
+    BlobPipeline(BlobSettings()).run(clip, str(tmp_path / "pipeline.avi"))
+    ChunkedPipeline(BlobSettings(), workers=1, chunks=1).run(clip, str(tmp_path / "chunked.avi"))
+    expected = decoded(str(tmp_path / "pipeline.avi"))
+    frames = decoded(str(tmp_path / "chunked.avi"))
+    assert len(frames) == len(expected) == 60
+    assert all(np.array_equal(a, b) for a, b in zip(frames, expected))
+
+
+@needs_ffmpeg
+def test_chunks_cover_every_frame(clip, tmp_path):
+    pipeline = ChunkedPipeline(BlobSettings(), workers=2, chunks=3, warmup_frames=10)
+    assert pipeline.run(clip, str(tmp_path / "chunked.avi")) == 60
+    assert len(decoded(str(tmp_path / "chunked.avi"))) == 60
+    assert pipeline.object_id > 0
@@ -0,0 +1,54 @@
+import cv2
+import numpy as np
+import pytest
+
+from blobengine import BlobSettings
+from blobengine.detect import ConnectedComponentsDetection, SimpleBlobDetection, create_blob_detector
+
+
+def disc_mask():
+    mask = np.zeros((200, 300), np.uint8)
+    cv2.circle(mask, (50, 60), 20, 255, -1)
+    cv2.circle(mask, (200, 120), 9, 255, -1)
+    cv2.circle(mask, (270, 20), 2, 255, -1)  # below min_area
+    return mask
+
+
+def test_components_centers_and_sizes():
+    mask = disc_mask()
+    blobs = ConnectedComponentsDetection(min_area=50).detect(np.zeros_like(mask), mask)
+    assert blobs.shape == (2, 3)
+    blobs = blobs[np.argsort(blobs[:, 0])]
+    np.testing.assert_allclose(blobs[:, :2], [(50, 60), (200, 120)], atol=0.01)
+    # Equal-area diameter of the drawn discs
+    areas = [np.count_nonzero(mask[30:91, 20:81]), np.count_nonzero(mask[100:141, 180:221])]
+    np.testing.assert_allclose(blobs[:, 2], 2 * np.sqrt(np.array(areas) / np.pi))
+
+
+def test_components_area_limits():
+    mask = disc_mask()
+    assert len(ConnectedComponentsDetection(min_area=1).detect(mask, mask)) == 3
+    assert len(ConnectedComponentsDetection(min_area=50, max_area=1000).detect(mask, mask)) == 1
+    assert ConnectedComponentsDetection(min_area=5000).detect(mask, mask).shape == (0, 3)
+
+
+def test_simple_finds_dark_blob_inside_motion():
+    # SimpleBlobDetector looks for dark blobs; outside the motion mask the image is zeroed
+    gray = np.full((200, 300), 200, np.uint8)
+    cv2.circle(gray, (100, 100), 15, 20, -1)
+    cv2.circle(gray, (250, 100), 15, 20, -1)  # no motion there
+    mask = np.zeros_like(gray)
+    cv2.circle(mask, (100, 100), 40, 255, -1)
+    blobs = SimpleBlobDetection(min_area=50).detect(gray, mask)
+    assert blobs.shape == (1, 3)
+    np.testing.assert_allclose(blobs[0, :2], (100, 100), atol=1)
+
+
+def test_areas_follow_analysis_scale():
+    detector = create_blob_detector(BlobSettings(blob_detector="components", min_area=80, analysis_scale=0.5))
+    assert detector.min_area == 20
+
+
+def test_unknown_detector():
+    with pytest.raises(ValueError, match="Unknown blob detector"):
+        create_blob_detector(BlobSettings(blob_detector="nope"))
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from benchmarks.bench_render import random_tracks, reference_overlay
+from blobengine import BlobEngine, BlobSettings
+from blobengine.spatial import neighbor_pairs
+
+
+@pytest.mark.parametrize("blobs", [0, 1, 40, 400])
+@pytest.mark.parametrize("distance", [0, 60, 150])
+def test_overlay_matches_pairwise_loop(blobs, distance):
+    engine = BlobEngine(BlobSettings())
+    tracks = random_tracks(blobs, 640, 360, seed=blobs)
+    background = np.random.default_rng(1).integers(0, 255, (360, 640, 3), dtype=np.uint8)
+    expected, frame = background.copy(), background.copy()
+    reference_overlay(engine, expected, tracks.to_dict(), distance)
+    engine._draw_overlay(frame, tracks, distance)
+    assert np.array_equal(frame, expected)
+
+
+def test_neighbor_pairs_follow_loop_order():
+    centers = random_tracks(200, 640, 360, seed=3).centers
+    expected = [
+        (i, j)
+        for i in range(len(centers))
+        for j in range(i + 1, len(centers))
+        if np.hypot(*(centers[i] - centers[j]).astype(float)) < 80
+    ]
+    first, second = neighbor_pairs(centers, 80)
+    assert list(zip(first.tolist(), second.tolist())) == expected
@@ -0,0 +1,35 @@
+import os
+
+import cv2
+
+from blobengine import BlobSettings
+from blobengine.live import LivePipeline
+
+
+def _frame_count(path):
+    video = cv2.VideoCapture(path)
+    count = 0
+    while video.read()[0]:
+        count += 1
+    video.release()
+    return count
+
+
+def test_live_loop(clip, tmp_path):
+    pipeline = LivePipeline(BlobSettings(), segment_seconds=0.5, loop=True, duration=2.0)
+    processed = pipeline.run(clip, str(tmp_path / "live.avi"))
+
+    stats = pipeline.stats
+    assert processed == stats["processed"] > 0
+    # Looping kept the source going past its 60 frames for the whole duration
+    assert stats["captured"] > 60
+    assert stats["processed"] + stats["dropped"] <= stats["captured"]
+    assert 0.0 <= stats["drop_rate"] < 1.0
+    assert stats["latency_p95_ms"] >= stats["latency_p50_ms"] > 0
+    assert stats["level_settings"] == pipeline.levels[stats["level"]]
+
+    # 15-frame segments named after the output, with dropped frames filled in
+    assert [os.path.basename(path) for path in pipeline.segments] == [f"live_{i:05d}.avi" for i in range(len(pipeline.segments))]
+    counts = [_frame_count(path) for path in pipeline.segments]
+    assert all(count == 15 for count in counts[:-1])
+    assert sum(counts) == stats["written"] >= stats["processed"]
@@ -0,0 +1,48 @@
+import cv2
+import numpy as np
+import pytest
+
+from blobengine import MOTION_BACKENDS, BlobSettings
+from blobengine.motion import create_motion_backend
+
+
+def moving_disc():
+    # A disc moving 6 px right over a textured, otherwise static background
+    rng = np.random.default_rng(0)
+    background = cv2.GaussianBlur(rng.integers(0, 60, (120, 160), dtype=np.uint8), (3, 3), 0)
+    frames = []
+    for x in (60, 66):
+        frame = background.copy()
+        cv2.circle(frame, (x, 60), 12, 220, -1)
+        frames.append(frame)
+    return frames
+
+
+@pytest.mark.parametrize("name", sorted(MOTION_BACKENDS))
+def test_backend_finds_the_moving_disc(name):
+    prev_gray, gray = moving_disc()
+    backend = create_motion_backend(BlobSettings(motion_backend=name))
+    if name == "mog2":
+        # Needs a background model first
+        for _ in range(5):
+            backend.motion_mask(prev_gray, prev_gray, 1.0)
+    mask = backend.motion_mask(prev_gray, gray, 1.0)
+    assert mask.shape == gray.shape and mask.dtype == np.uint8
+    assert mask[55:66, 60:80].any()
+    assert not mask[:, :20].any()
+    assert backend.calls >= 1 and backend.cost_ms > 0
+
+
+def test_farneback_matches_original_mask():
+    prev_gray, gray = moving_disc()
+    flow = cv2.calcOpticalFlowFarneback(prev_gray, gray, None, 0.5, 3, 10, 3, 5, 1.1, 0)
+    magnitude, _ = cv2.cartToPolar(flow[..., 0], flow[..., 1])
+    _, binary = cv2.threshold(magnitude, 1.0, 255, cv2.THRESH_BINARY)
+    expected = cv2.dilate(binary.astype(np.uint8), np.ones((5, 5), np.uint8), iterations=1)
+    mask = create_motion_backend(BlobSettings()).motion_mask(prev_gray, gray, 1.0)
+    assert np.array_equal(mask, expected)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError, match="Unknown motion backend"):
+        create_motion_backend(BlobSettings(motion_backend="sparkle"))
@@ -0,0 +1,24 @@
+from blobengine import BlobPipeline, BlobSettings
+
+
+def test_update_settings_while_idle():
+    pipeline = BlobPipeline(BlobSettings())
+    pipeline.update_settings(trail_mode="decay", min_area=80)
+    assert pipeline.engine.trail.name == "decay"
+    assert pipeline.engine.settings.min_area == 80
+
+
+def test_update_settings_during_run(clip, tmp_path):
+    # Posted from the encode thread, as a GUI would from its own; picked up between frames
+    pipeline = BlobPipeline(BlobSettings())
+    applied = []
+
+    def on_progress(written, total, frame):
+        if written == 10:
+            pipeline.update_settings(trail_mode="window", trail_length=8)
+        applied.append(pipeline.engine.trail.name)
+
+    pipeline.on_progress = on_progress
+    assert pipeline.run(clip, str(tmp_path / "out.avi")) == 60
+    assert applied[0] == "blend" and applied[-1] == "window"
+    assert pipeline.engine.trail.length == 8
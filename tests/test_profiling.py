@@ -0,0 +1,59 @@
+import csv
+import json
+
+import pytest
+
+from blobengine import BlobPipeline, BlobSettings
+from blobengine.profiling import COUNTERS, STAGES, NullProfiler, StageProfiler
+
+from .conftest import digest
+
+
+@pytest.fixture(scope="module")
+def profiled(clip, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("profile") / "out.avi")
+    pipeline = BlobPipeline(BlobSettings(), profile=True)
+    pipeline.run(clip, path)
+    return pipeline, path
+
+
+def test_every_frame_records_every_stage(profiled):
+    profiler = profiled[0].profiler
+    assert sorted(profiler.frames) == list(range(1, 61))
+    # The first frame has no previous frame to compute flow against
+    for stage in ("decode", "gray", "flow", "threshold", "detect", "assign", "draw", "encode"):
+        assert all(stage in profiler.frames[frame] for frame in range(2, 61)), stage
+    summary = profiler.summary()
+    assert summary["frames"] == 60
+    assert summary["stages"]["draw"]["frames"] == 60
+    assert summary["counters"]["max_tracks"] > 0
+    assert "Stage profile over 60 frames" in profiler.describe()
+
+
+def test_profiling_does_not_change_output(profiled, render):
+    assert digest(profiled[1]) == render("plain.avi")
+
+
+@pytest.mark.parametrize("name", ["trace.csv", "trace.json"])
+def test_trace_formats(profiled, tmp_path, name):
+    profiler = profiled[0].profiler
+    path = str(tmp_path / name)
+    profiler.write(path)
+    if name.endswith(".json"):
+        with open(path) as f:
+            trace = json.load(f)
+        rows = trace["frames"]
+        assert trace["summary"]["frames"] == 60
+    else:
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert list(rows[0]) == ["frame", *STAGES, *COUNTERS]
+    assert len(rows) == 60
+    # Stage times are written in milliseconds
+    draw = profiler.frames[1]["draw"] * 1000
+    assert float(rows[0]["draw"]) == pytest.approx(draw, abs=1e-3)
+
+
+def test_null_profiler_by_default():
+    assert isinstance(BlobPipeline(BlobSettings()).engine.profiler, NullProfiler)
+    assert StageProfiler().summary()["frames"] == 0
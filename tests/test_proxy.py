@@ -0,0 +1,59 @@
+import cv2
+import numpy as np
+import pytest
+
+from benchmarks.bench_detectors import match
+from benchmarks.synthetic import synthetic_frames
+from blobengine import BlobEngine, BlobSettings
+from blobengine.settings import parse_setting
+from blobengine.tracking import Tracks
+
+
+def one_track(cx, cy, size):
+    return Tracks(
+        np.array([1], np.int64), np.array([[cx, cy]], np.int64), np.array([size]),
+        np.array([np.pi * (size / 2) ** 2]), np.zeros(1, np.int64), np.zeros(1),
+    )
+
+
+def test_default_draws_then_resizes():
+    frame = np.full((240, 320, 3), 90, np.uint8)
+    tracks = one_track(100, 80, 30)
+    expected = cv2.resize(BlobEngine(BlobSettings()).render_frame(frame.copy(), tracks, 1), (640, 480), interpolation=cv2.INTER_LANCZOS4)
+    output = BlobEngine(BlobSettings()).render_output(frame.copy(), tracks, 1, (640, 480))
+    assert np.array_equal(output, expected)
+
+
+def test_draw_at_output_maps_tracks():
+    frame = np.zeros((240, 320, 3), np.uint8)
+    engine = BlobEngine(BlobSettings(draw_at_output=True, trail_opacity=0))
+    output = engine.render_output(frame, one_track(100, 80, 40), 1, (640, 480))
+    assert output.shape == (480, 640, 3)
+    # The circle of radius 40 around (200, 160) in output pixels; its label sits to the right
+    rows, cols = np.nonzero(output[100:, :].max(axis=2) > 100)
+    assert abs(cols.min() - 160) <= 3
+    assert abs(rows.max() + 100 - 200) <= 3
+
+
+@pytest.mark.parametrize("scale", [1.0, 0.5])
+def test_proxy_keypoints_are_in_source_pixels(scale):
+    engine = BlobEngine(BlobSettings(analysis_scale=scale))
+    truth_total = detected = 0
+    for index, (frame, truth) in enumerate(synthetic_frames(640, 360, 20, 8, seed=2)):
+        engine.analyze_frame(frame)
+        if index:
+            truth_total += len(truth)
+            detected += match(truth, engine.keypoints, 6)
+    assert detected / truth_total > 0.6
+
+
+def test_parse_setting():
+    assert parse_setting("draw_at_output", "False") is False
+    assert parse_setting("draw_at_output", "on") is True
+    assert parse_setting("analysis_scale", "0.5") == 0.5
+    with pytest.raises(ValueError, match="true/false"):
+        parse_setting("draw_at_output", "maybe")
+    with pytest.raises(ValueError, match="takes a list"):
+        parse_setting("rois", "0,0,10,10")
+    with pytest.raises(ValueError, match="Bad value"):
+        parse_setting("min_area", "big")
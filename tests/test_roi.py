@@ -0,0 +1,77 @@
+import cv2
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import synthetic_frames
+from blobengine import BlobEngine, BlobPipeline, BlobSettings
+
+
+def detections(settings, frames=20):
+    engine = BlobEngine(settings)
+    found = []
+    for frame, _ in synthetic_frames(320, 240, frames, 12, seed=1):
+        engine.analyze_frame(frame)
+        found.append(engine.keypoints)
+    return np.concatenate(found)
+
+
+def test_rois_restrict_detections():
+    everywhere = detections(BlobSettings())
+    inside = detections(BlobSettings(rois=[(0, 0, 160, 240)]))
+    assert (everywhere[:, 0] >= 160).any()
+    assert len(inside) and (inside[:, 0] < 160).all()
+
+
+def test_offset_roi_keypoints_are_in_source_pixels():
+    # Discs well inside the box are found where the full-frame run finds them
+    everywhere = detections(BlobSettings())
+    inside = detections(BlobSettings(rois=[(100, 60, 220, 180)]))
+    assert len(inside) and (inside[:, 0] >= 100).all() and (inside[:, 1] >= 60).all()
+    core = everywhere[(everywhere[:, 0] > 130) & (everywhere[:, 1] > 90)]
+    distances = np.hypot(*(core[:, None, :2] - inside[None, :, :2]).transpose(2, 0, 1)).min(axis=1)
+    assert np.mean(distances < 2) > 0.9
+
+
+def test_roi_mask(tmp_path):
+    path = str(tmp_path / "mask.png")
+    mask = np.zeros((120, 160), np.uint8)  # half size, resized to the frame
+    mask[:, 80:] = 255
+    cv2.imwrite(path, mask)
+    found = detections(BlobSettings(roi_mask=path))
+    assert len(found) and (found[:, 0] >= 160).all()
+
+
+def test_empty_roi_is_rejected():
+    engine = BlobEngine(BlobSettings(rois=[(400, 300, 10, 10)]))
+    with pytest.raises(ValueError, match="empty"):
+        engine.analyze_frame(np.zeros((240, 320, 3), np.uint8))
+
+
+def test_missing_roi_mask_is_reported(tmp_path):
+    engine = BlobEngine(BlobSettings(roi_mask=str(tmp_path / "missing.png")))
+    with pytest.raises(RuntimeError, match="ROI mask"):
+        engine.analyze_frame(np.zeros((240, 320, 3), np.uint8))
+
+
+def test_frame_range():
+    assert BlobSettings().frame_range(30, 60) == (0, 60)
+    assert BlobSettings().frame_range(30) == (0, None)
+    assert BlobSettings(start_time=0.5, end_time=1.5).frame_range(30, 60) == (15, 45)
+    assert BlobSettings(end_time=10).frame_range(30, 60) == (0, 60)
+
+
+@pytest.mark.parametrize("mode, written", [("skip", 30), ("passthrough", 60)])
+def test_time_range_output_frames(clip, tmp_path, mode, written):
+    settings = BlobSettings(start_time=0.5, end_time=1.5, outside_range=mode)
+    pipeline = BlobPipeline(settings)
+    path = str(tmp_path / "out.avi")
+    assert pipeline.run(clip, path) == written
+    assert pipeline.engine.frame_count == 30
+    video = cv2.VideoCapture(path)
+    assert int(video.get(cv2.CAP_PROP_FRAME_COUNT)) == written
+    video.release()
+
+
+def test_unknown_outside_range(clip, tmp_path):
+    with pytest.raises(ValueError, match="outside_range"):
+        BlobPipeline(BlobSettings(outside_range="loop")).run(clip, str(tmp_path / "out.avi"))
@@ -0,0 +1,27 @@
+from dataclasses import replace
+
+import pytest
+
+from blobengine import BlobSettings, SweepPipeline
+from blobengine.sweep import parse_grid, sweep_outputs
+
+from .conftest import digest
+
+
+def test_sweep_matches_single_runs(clip, render, tmp_path):
+    settings = BlobSettings()
+    variants = parse_grid(["min_area=30,80", "trail_opacity=0.2,0.6", "motion_backend=farneback,dis"])
+    outputs = sweep_outputs(str(tmp_path / "sweep.avi"), variants)
+    SweepPipeline(settings, variants).run(clip, outputs)
+    for i, (variant, output) in enumerate(zip(variants, outputs)):
+        assert digest(output) == render(f"single_{i}.avi", replace(settings, **variant)), variant
+
+
+@pytest.mark.parametrize("spec", ["decoder=opencv,ffmpeg", "start_time=0,1", "end_time=1,2", "outside_range=skip,passthrough"])
+def test_source_settings_cannot_vary(clip, tmp_path, spec):
+    with pytest.raises(ValueError, match="cannot vary"):
+        parse_grid([spec])
+    name, _, values = spec.partition("=")
+    variants = [{name: value} for value in values.split(",")]
+    with pytest.raises(ValueError, match="cannot vary"):
+        SweepPipeline(BlobSettings(), variants).run(clip, sweep_outputs(str(tmp_path / "sweep.avi"), variants))
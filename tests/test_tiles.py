@@ -0,0 +1,65 @@
+import threading
+
+import numpy as np
+import pytest
+
+from blobengine import BlobEngine, BlobPipeline, BlobSettings
+from blobengine.motion import TiledMotion, create_motion_backend
+
+from .test_motion import moving_disc
+
+
+def flow_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith("blob-flow")]
+
+
+def test_diff_tiles_match_one_backend():
+    # Frame differencing only looks a few pixels around each one, well inside the overlap
+    prev_gray, gray = moving_disc()
+    expected = create_motion_backend(BlobSettings(motion_backend="diff")).motion_mask(prev_gray, gray, 1.0)
+    for tiles in (2, 3, 4):
+        tiled = create_motion_backend(BlobSettings(motion_backend="diff", flow_tiles=tiles))
+        assert isinstance(tiled, TiledMotion)
+        assert np.array_equal(tiled.motion_mask(prev_gray, gray, 1.0), expected)
+        tiled.close()
+
+
+def test_farneback_tiles_find_a_disc_on_the_seam():
+    # The disc is centered on the border between two strips
+    prev_gray, gray = moving_disc()
+    expected = create_motion_backend(BlobSettings()).motion_mask(prev_gray, gray, 1.0) > 0
+    tiled = create_motion_backend(BlobSettings(flow_tiles=2))
+    mask = tiled.motion_mask(prev_gray, gray, 1.0) > 0
+    tiled.close()
+    assert mask[50:60, 60:80].any() and mask[60:70, 60:80].any()
+    assert (mask & expected).sum() / (mask | expected).sum() > 0.9
+
+
+def test_close_stops_the_threads():
+    prev_gray, gray = moving_disc()
+    tiled = create_motion_backend(BlobSettings(flow_tiles=3))
+    tiled.motion_mask(prev_gray, gray, 1.0)
+    assert flow_threads()
+    tiled.close()
+    assert not flow_threads()
+    assert "x3 tiles" in tiled.describe()
+
+
+def test_replaced_backend_is_closed():
+    # By update_settings and by reset; a shut-down pool refuses new work
+    engine = BlobEngine(BlobSettings(flow_tiles=2))
+    first = engine.motion
+    engine.update_settings(flow_tiles=3)
+    second = engine.motion
+    engine.reset()
+    for backend in (first, second):
+        with pytest.raises(RuntimeError):
+            backend.pool.submit(int)
+    engine.close()
+
+
+def test_runs_do_not_leak_threads(clip, tmp_path):
+    pipeline = BlobPipeline(BlobSettings(flow_tiles=2))
+    for name in ("a.avi", "b.avi"):
+        assert pipeline.run(clip, str(tmp_path / name)) == 60
+        assert not flow_threads()
@@ -0,0 +1,20 @@
+import pytest
+
+from benchmarks.bench_tracker import same_tracks, synthetic_detections
+from blobengine import BlobSettings
+from blobengine.tracking import ArrayTracker, DictTracker
+
+
+@pytest.mark.parametrize("blobs", [10, 200])
+def test_array_tracker_matches_dict_tracker(blobs):
+    trackers = DictTracker(), ArrayTracker()
+    for detections in synthetic_detections(blobs, 40, seed=blobs):
+        snapshots = [tracker.assign(detections) or tracker.snapshot() for tracker in trackers]
+        assert same_tracks(*snapshots)
+    assert len(snapshots[1]) > 0
+
+
+@pytest.mark.parametrize("staged", [True, False])
+def test_tracker_renders_match(render, staged):
+    dict_render = render("dict.avi", BlobSettings(tracker="dict"), staged=staged)
+    assert render("array.avi", BlobSettings(tracker="array"), staged=staged) == dict_render
@@ -0,0 +1,22 @@
+import pytest
+
+from blobengine import BlobSettings
+
+
+@pytest.mark.parametrize("name", ["tracks", "tracks.csv"])
+def test_replay_matches_render(render, tmp_path, name):
+    tracks = str(tmp_path / name)
+    original = render("original.avi", export_tracks=tracks)
+    assert render("replay.avi", from_tracks=tracks) == original
+
+    # Restyling from the export matches a full render with that styling
+    styled = BlobSettings(trail_opacity=0.6)
+    assert render("styled.avi", styled, from_tracks=tracks) == render("styled_fresh.avi", styled)
+
+
+@pytest.mark.parametrize("name", ["tracks", "tracks.csv"])
+def test_replay_refuses_other_range(render, tmp_path, name):
+    tracks = str(tmp_path / name)
+    render("original.avi", export_tracks=tracks)
+    with pytest.raises(ValueError, match="first_frame"):
+        render("shifted.avi", BlobSettings(start_time=0.5), from_tracks=tracks)
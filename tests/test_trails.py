@@ -0,0 +1,29 @@
+import cv2
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import synthetic_frames
+from blobengine.trails import BlendTrail
+
+
+def legacy_trail(frames, opacity, length):
+    # The list-based re-blend BlendTrail replaced
+    buffer = []
+    for frame in frames:
+        buffer.append(frame.copy())
+        if len(buffer) > length:
+            buffer.pop(0)
+        trail_frame = np.zeros_like(frame)
+        for i, past_frame in enumerate(buffer):
+            alpha = opacity * (i + 1) / len(buffer)
+            trail_frame = cv2.addWeighted(trail_frame, 1 - alpha, past_frame, alpha, 0)
+        yield trail_frame
+
+
+@pytest.mark.parametrize("length", [1, 5, 12])
+@pytest.mark.parametrize("opacity", [0.2, 0.7])
+def test_blend_trail_matches_legacy(length, opacity):
+    frames = [frame for frame, _ in synthetic_frames(96, 64, 30, 6, seed=length)]
+    trail = BlendTrail(length)
+    for frame, expected in zip(frames, legacy_trail(frames, opacity, length)):
+        assert np.array_equal(trail.update(frame, opacity), expected)
@@ -0,0 +1,95 @@
+import os
+import shutil
+
+import cv2
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import video_frames
+from blobengine import BlobSettings
+from blobengine import videoio
+from blobengine.videoio import FFmpegReader, open_reader, open_writer
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg")
+
+
+def test_unknown_encoder_and_decoder(tmp_path):
+    with pytest.raises(ValueError, match="Unknown encoder"):
+        open_writer(str(tmp_path / "out.avi"), 30, (64, 48), BlobSettings(encoder="vp9"))
+    with pytest.raises(ValueError, match="Unknown decoder"):
+        open_reader("clip.avi", BlobSettings(decoder="gstreamer"))
+
+
+def test_missing_ffmpeg(tmp_path, monkeypatch):
+    monkeypatch.setattr(shutil, "which", lambda name: None)
+    with pytest.raises(RuntimeError, match="ffmpeg not found"):
+        open_writer(str(tmp_path / "out.mp4"), 30, (64, 48), BlobSettings(encoder="h264"))
+
+
+@needs_ffmpeg
+def test_reader_matches_opencv(clip):
+    reader = open_reader(clip, BlobSettings(decoder="ffmpeg"))
+    assert isinstance(reader, FFmpegReader)
+    assert (reader.get(cv2.CAP_PROP_FRAME_WIDTH), reader.get(cv2.CAP_PROP_FRAME_HEIGHT)) == (320, 240)
+    assert reader.get(cv2.CAP_PROP_FPS) == 30
+    frames = []
+    while True:
+        ret, frame = reader.read()
+        if not ret:
+            break
+        frames.append(frame)
+    reader.release()
+    expected = [frame for frame, _ in video_frames(clip)]
+    assert len(frames) == len(expected) == 60
+    assert all(np.array_equal(a, b) for a, b in zip(frames, expected))
+
+
+@needs_ffmpeg
+def test_reader_seeks(clip):
+    reader = open_reader(clip, BlobSettings(decoder="ffmpeg"))
+    assert reader.set(cv2.CAP_PROP_POS_FRAMES, 30)
+    count = 0
+    while reader.read()[0]:
+        count += 1
+    reader.release()
+    assert count == 30
+
+
+@needs_ffmpeg
+@pytest.mark.parametrize("encoder, name", [("h264", "out.mp4"), ("mpeg4", "out.avi")])
+def test_writer_round_trip(clip, tmp_path, encoder, name):
+    sizes = []
+    for bitrate in (100, 2000):
+        path = str(tmp_path / f"{bitrate}{name}")
+        writer = open_writer(path, 30, (320, 240), BlobSettings(encoder=encoder, bitrate=bitrate))
+        for frame, _ in video_frames(clip):
+            writer.write(frame)
+        writer.release()
+        frames = list(video_frames(path))
+        assert len(frames) == 60 and frames[0][0].shape == (240, 320, 3)
+        sizes.append(os.path.getsize(path))
+    # bitrate is in kbps: 2 s at 2000 kbps is about 500 kB, several times the 100 kbps file
+    assert sizes[1] > 3 * sizes[0]
+    assert sizes[1] < 2 * 2000 * 1000 / 8 * 2
+
+
+@needs_ffmpeg
+def test_writer_rejects_wrong_size(tmp_path):
+    writer = open_writer(str(tmp_path / "out.mp4"), 30, (160, 120), BlobSettings(encoder="h264"))
+    with pytest.raises(ValueError):
+        writer.write(np.zeros((100, 100, 3), np.uint8))
+    writer.release()
+
+
+def test_default_bitrate_is_kbps(monkeypatch, tmp_path):
+    commands = []
+
+    class Process:
+        stderr = None
+
+    monkeypatch.setattr(videoio, "find_ffmpeg", lambda: "ffmpeg")
+    monkeypatch.setattr(videoio.subprocess, "Popen", lambda command, **kwargs: commands.append(command) or Process())
+    monkeypatch.setattr(videoio, "_StderrTail", lambda stream: None)
+    open_writer(str(tmp_path / "out.mp4"), 30, (160, 120), BlobSettings(encoder="h264"))
+    command = commands[0]
+    assert command[command.index("-b:v") + 1] == "8000k"